@@ -0,0 +1,84 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# 두 벤치마크 결과 JSON 을 단계별로 비교한다
+# 사용법: python -m benchmarks.compare results/train-<기준>.json results/train-<새>.json
+#
+# 같은 (stage, rows, 라벨) 끼리 묶어 시간 비율을 출력하고, --threshold 보다 느려진
+# 항목이 있으면 종료 코드 1 로 끝나 CI 에서 회귀를 잡을 수 있다.
+
+# 시간/메모리 측정값 (recall 등 결과 값도 묶는 키에서 뺀다)
+MEASUREMENTS = (
+    "seconds",
+    "rows_per_second",
+    "peak_mb",
+    "recall",
+    "speedup",
+    "index_mb",
+    "bytes",
+    "modeled_ms",
+    "candidate_mb",
+    "agreement",
+    "mean_ms",
+)
+
+
+def _key(result: dict) -> tuple:
+    return tuple(
+        sorted((k, str(v)) for k, v in result.items() if k not in MEASUREMENTS)
+    )
+
+
+def _label(key: tuple) -> str:
+    return " ".join(f"{k}={v}" for k, v in key if v != "None")
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> list[dict]:
+    before = {_key(result): result for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        old = before.get(_key(result))
+        if old is None or not old["seconds"]:
+            continue
+        ratio = result["seconds"] / old["seconds"]
+        rows.append(
+            {
+                "label": _label(_key(result)),
+                "before": old["seconds"],
+                "after": result["seconds"],
+                "ratio": round(ratio, 3),
+                "regressed": ratio > 1 + threshold,
+            }
+        )
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="벤치마크 결과 비교")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="회귀로 볼 시간 증가 비율"
+    )
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    current = json.loads(args.current.read_text(encoding="utf-8"))
+    rows = compare(baseline, current, args.threshold)
+
+    print(
+        f"{baseline['environment']['commit']} -> {current['environment']['commit']}"
+    )
+    for row in rows:
+        marker = "  REGRESSED" if row["regressed"] else ""
+        print(
+            f"{row['label']:<48} {row['before']:>9.3f} -> {row['after']:>9.3f}s "
+            f"x{row['ratio']:.2f}{marker}"
+        )
+    return 1 if any(row["regressed"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import json
+import os
+import platform
+import resource
+import subprocess
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+# 벤치마크 공용 도구: 단계별 시간/메모리 측정과 결과 JSON 저장
+#
+# 결과 파일은 benchmarks/results/<이름>-<커밋>.json 에 쓰고, 커밋끼리의 비교는
+# python -m benchmarks.compare <기준>.json <새 결과>.json 으로 한다.
+
+RESULTS_DIR: Path = Path(__file__).resolve().parent / "results"
+BACKEND_DIR: Path = Path(__file__).resolve().parent.parent
+
+MEMORY_MODES = ("rss", "tracemalloc", "none")
+PROC_STATUS = Path("/proc/self/status")
+PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment() -> dict[str, Any]:
+    import numpy
+    import pandas
+    import sklearn
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def max_rss_mb() -> float:
+    # 리눅스는 KB, macOS 는 바이트 단위
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1 if platform.system() == "Darwin" else 1024
+    return round(rss * scale / 1e6, 1)
+
+
+def _proc_status_kb(field: str) -> int:
+    for line in PROC_STATUS.read_text().splitlines():
+        if line.startswith(f"{field}:"):
+            return int(line.split()[1])
+    raise KeyError(field)
+
+
+def rss_peak_supported() -> bool:
+    # 리눅스는 clear_refs 에 5 를 쓰면 최대 RSS(VmHWM)가 현재 RSS 로 초기화된다
+    try:
+        PROC_CLEAR_REFS.write_text("5")
+        _proc_status_kb("VmHWM")
+    except (OSError, KeyError):
+        return False
+    return True
+
+
+class Recorder:
+    """단계마다 걸린 시간과 그 단계에서 늘어난 최대 메모리(peak_mb)를 기록한다.
+
+    memory="rss" (리눅스 기본값): 단계 시작 때 최대 RSS 를 초기화하고 끝날 때의
+    최대 RSS - 시작 RSS 를 잰다. 측정 비용이 없어 시간에 영향을 주지 않는다.
+    memory="tracemalloc": 파이썬/NumPy 할당의 최댓값. 어디서나 되지만 파이썬 코드가
+    많은 단계를 크게 느리게 하므로 시간은 참고만 한다. memory="none" 은 시간만 잰다.
+    """
+
+    def __init__(self, memory: str | None = None):
+        if memory is None:
+            memory = "rss" if rss_peak_supported() else "tracemalloc"
+        if memory not in MEMORY_MODES:
+            raise ValueError(f"Unknown memory mode: {memory} (expected {MEMORY_MODES})")
+        self.memory = memory
+        self.results: list[dict[str, Any]] = []
+
+    def _memory_start(self) -> int:
+        if self.memory == "rss":
+            PROC_CLEAR_REFS.write_text("5")
+            return _proc_status_kb("VmRSS") * 1024
+        if self.memory == "tracemalloc":
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+            return tracemalloc.get_traced_memory()[0]
+        return 0
+
+    def _memory_peak(self) -> int:
+        if self.memory == "rss":
+            return _proc_status_kb("VmHWM") * 1024
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak
+
+    @contextmanager
+    def stage(self, name: str, rows: int | None = None, repeats: int = 1, **labels):
+        """블록 안에서 같은 작업을 repeats 번 돌렸다면 seconds 는 한 번당 시간이다."""
+        base = self._memory_start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = (time.perf_counter() - start) / repeats
+            result = {"stage": name, "rows": rows, **labels}
+            if repeats > 1:
+                result["repeats"] = repeats
+            result["seconds"] = round(seconds, 6)
+            if rows and seconds > 0:
+                result["rows_per_second"] = round(rows / seconds, 1)
+            if self.memory != "none":
+                result["peak_mb"] = round((self._memory_peak() - base) / 1e6, 2)
+            self.results.append(result)
+
+
+def write_results(
+    name: str,
+    results: list[dict],
+    params: dict,
+    output: Path | None = None,
+) -> Path:
+    """결과를 환경 정보(커밋, 라이브러리 버전 등)와 함께 JSON 으로 쓴다."""
+    env = environment()
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"{name}-{env['commit'] or 'nogit'}.json"
+    report = {
+        "benchmark": name,
+        "environment": env,
+        "params": params,
+        "max_rss_mb": max_rss_mb(),
+        "results": results,
+    }
+    Path(output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return Path(output)
+
+
+def print_table(results: list[dict]):
+    print(f"{'rows':>11} {'stage':<16} {'ms':>11} {'rows/s':>13} {'peak MB':>9}")
+    for row in results:
+        print(
+            f"{row.get('rows') or '':>11} {row['stage']:<16} "
+            f"{row['seconds'] * 1000:>11.3f} "
+            f"{row.get('rows_per_second', ''):>13} {row.get('peak_mb', ''):>9}"
+        )
@@ -0,0 +1,171 @@
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.harness import (
+    MEMORY_MODES,
+    Recorder,
+    print_table,
+    write_results,
+)
+from rag.ann import IVFIndex, default_nlist
+from rag.persona_cache import PersonaMatrix
+
+# 페르소나 ANN(IVF) 인덱스의 recall@k 대 질의 지연 벤치마크 (정확 검색과 비교)
+# 사용법: python -m benchmarks.rag_ann --personas 10000 100000 --nprobe 1 4 16 64
+#
+# - build:   k-평균 학습 + 전체 추가 / save, load: 디스크 저장/읽기
+# - update:  1% 페르소나를 바꿔 넣는 증분 갱신 (upsert 경로)
+# - exact:   PersonaMatrix.search (retrieve_personas 의 정확 검색)
+# - ivf:     nprobe 별 IVFIndex.search, recall 은 정확 검색 top_k 와 겹치는 비율
+# 실제 임베딩처럼 주제별로 뭉친 데이터를 쓰려고 무작위 중심 주변에 점을 뿌린다.
+# (완전 무작위 벡터는 IVF 에 가장 불리한 경우라 --spread 를 키우면 그쪽으로 간다)
+
+DEFAULT_PERSONAS = (10_000, 100_000)
+DEFAULT_NPROBE = (1, 2, 4, 8, 16, 32, 64)
+DEFAULT_DIM = 256
+DEFAULT_TOPICS = 2_000
+DEFAULT_QUERIES = 200
+
+
+def clustered_embeddings(
+    rng: np.random.Generator, n: int, dim: int, topics: int, spread: float
+) -> np.ndarray:
+    centers = rng.normal(size=(topics, dim)).astype(np.float32)
+    labels = rng.integers(topics, size=n)
+    noise = rng.normal(scale=spread, size=(n, dim)).astype(np.float32)
+    return centers[labels] + noise
+
+
+def recall_at_k(expected: list[list[str]], found: list[list[str]]) -> float:
+    hits = sum(len(set(e) & set(f)) for e, f in zip(expected, found))
+    return hits / max(1, sum(len(e) for e in expected))
+
+
+def run(
+    personas=DEFAULT_PERSONAS,
+    nprobe=DEFAULT_NPROBE,
+    dim: int = DEFAULT_DIM,
+    topics: int = DEFAULT_TOPICS,
+    spread: float = 1.0,
+    queries: int = DEFAULT_QUERIES,
+    top_k: int = 10,
+    nlist: int | None = None,
+    seed: int = 0,
+    memory: str | None = None,
+) -> list[dict]:
+    recorder = Recorder(memory=memory)
+    rng = np.random.default_rng(seed)
+
+    for n in personas:
+        embeddings = clustered_embeddings(rng, n, dim, min(topics, n), spread)
+        keys = [f"segment_{idx}" for idx in range(n)]
+        matrix = PersonaMatrix.from_rows(
+            {"cluster_name": key, "embedding": vector}
+            for key, vector in zip(keys, embeddings)
+        )
+        # 질의는 저장된 페르소나 근처의 새 점 (비슷한 고객 프로필)
+        picks = rng.integers(n, size=queries)
+        query_vectors = embeddings[picks] + rng.normal(
+            scale=spread, size=(queries, dim)
+        ).astype(np.float32)
+
+        with recorder.stage("exact", n, repeats=queries, top_k=top_k):
+            expected = [
+                [m["cluster_name"] for m in matrix.search(query, top_k)]
+                for query in query_vectors
+            ]
+        exact_seconds = recorder.results[-1]["seconds"]
+
+        lists = nlist or default_nlist(n)
+        with recorder.stage("build", n, nlist=lists):
+            index = IVFIndex.build(keys, embeddings, nlist=lists, random_state=seed)
+        recorder.results[-1]["index_mb"] = round(index.nbytes() / 1024**2, 1)
+
+        with tempfile.TemporaryDirectory() as workdir:
+            path = Path(workdir) / "index.npz"
+            with recorder.stage("save", n, nlist=lists):
+                index.save(path)
+            with recorder.stage("load", n, nlist=lists):
+                index = IVFIndex.load(path)
+
+        changed = rng.choice(n, size=max(1, n // 100), replace=False)
+        updates = embeddings[changed] + rng.normal(
+            scale=0.1, size=(len(changed), dim)
+        ).astype(np.float32)
+        with recorder.stage("update", len(changed), nlist=lists, personas=n):
+            index.add([keys[idx] for idx in changed], updates)
+        # 정확 검색과 같은 데이터로 recall 을 재도록 되돌린다
+        index.add([keys[idx] for idx in changed], embeddings[changed])
+
+        for probes in nprobe:
+            if probes > lists:
+                continue
+            with recorder.stage("ivf", n, repeats=queries, top_k=top_k, nprobe=probes):
+                found = [
+                    [key for key, _ in index.search(query, top_k, probes)]
+                    for query in query_vectors
+                ]
+            result = recorder.results[-1]
+            result["recall"] = round(recall_at_k(expected, found), 4)
+            result["speedup"] = round(exact_seconds / max(result["seconds"], 1e-9), 1)
+        del matrix, index, embeddings
+
+    return recorder.results
+
+
+def print_recall(results: list[dict]):
+    print(f"\n{'rows':>11} {'nprobe':>7} {'recall':>8} {'ms/query':>10} {'speedup':>8}")
+    for row in results:
+        if row["stage"] == "ivf":
+            print(
+                f"{row['rows']:>11} {row['nprobe']:>7} {row['recall']:>8.4f} "
+                f"{row['seconds'] * 1000:>10.3f} {row['speedup']:>8}"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="페르소나 ANN 인덱스 recall/지연 벤치마크")
+    parser.add_argument(
+        "--personas", type=int, nargs="+", default=list(DEFAULT_PERSONAS)
+    )
+    parser.add_argument("--nprobe", type=int, nargs="+", default=list(DEFAULT_NPROBE))
+    parser.add_argument("--nlist", type=int, help="목록 수 (기본: sqrt(페르소나 수))")
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM, help="임베딩 차원")
+    parser.add_argument("--topics", type=int, default=DEFAULT_TOPICS)
+    parser.add_argument(
+        "--spread", type=float, default=1.0, help="주제 중심 주변 잡음 크기"
+    )
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory", choices=MEMORY_MODES)
+    parser.add_argument("--output", type=Path, help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    results = run(
+        personas=args.personas,
+        nprobe=args.nprobe,
+        dim=args.dim,
+        topics=args.topics,
+        spread=args.spread,
+        queries=args.queries,
+        top_k=args.top_k,
+        nlist=args.nlist,
+        seed=args.seed,
+        memory=args.memory,
+    )
+    print_table(results)
+    print_recall(results)
+    params = {
+        key: str(value) if isinstance(value, Path) else value
+        for key, value in vars(args).items()
+    }
+    path = write_results("rag_ann", results, params, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
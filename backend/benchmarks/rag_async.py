@@ -0,0 +1,182 @@
+import argparse
+import asyncio
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+from benchmarks.harness import (
+    MEMORY_MODES,
+    Recorder,
+    print_table,
+    write_results,
+)
+from operation.core.executors import BoundedExecutor
+from rag import retriever
+from rag.providers import HashingProvider
+from services.local_supabase import AsyncLocalSupabaseClient, LocalSupabaseClient
+
+# /api/rag/query 의 동기 경로와 비동기 경로 지연 벤치마크
+# 사용법: python -m benchmarks.rag_async --concurrency 1 16 64 --latency-ms 100
+#
+# 쿼리 임베딩(OpenAI)과 페르소나 조회(Supabase) 왕복을 --latency-ms 만큼 기다리는 대역으로
+# 바꾸고, 페르소나 캐시를 끈 상태(RAG_PERSONA_CACHE_TTL=0, 매 질의가 캐시 미스)에서
+# 질의 concurrency 개를 동시에 보낸다.
+# - sync:  예전 라우터처럼 retrieve_personas 전체를 rag 실행기(--workers 스레드)에서 돌린다.
+#          한 질의가 두 왕복을 차례로 기다리는 동안 스레드 하나를 잡는다.
+# - async: aretrieve_personas 가 두 왕복을 이벤트 루프에서 동시에 기다리고 검색만 실행기에 넘긴다.
+# seconds 는 concurrency 개가 모두 끝난 시간, mean_ms 는 질의 하나의 평균 지연이다.
+# 페르소나 테이블이 크면 매 질의마다 전체 행을 JSON 으로 파싱하는 CPU 시간(GIL)이 왕복보다
+# 커져 두 경로의 차이가 사라진다. 그래서 기본값은 왕복 지연이 지배하는 작은 테이블이다.
+
+DEFAULT_CONCURRENCY = (1, 16, 64)
+DEFAULT_PERSONAS = 100
+DEFAULT_DIM = 256
+
+
+class LatencyProvider(HashingProvider):
+    def __init__(self, dim: int, latency: float):
+        super().__init__(dim=dim)
+        self.latency = latency
+
+    def embed_query(self, text: str) -> list[float]:
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        await asyncio.sleep(self.latency)
+        return super().embed_query(text)
+
+
+def _client(personas: int, dim: int, seed: int) -> LocalSupabaseClient:
+    rng = np.random.default_rng(seed)
+    client = LocalSupabaseClient()
+    client.table("personas").upsert(
+        [
+            {
+                "title": f"persona {idx}",
+                "description": f"persona {idx} description",
+                "cluster_name": f"segment_{idx}",
+                "embedding": vector,
+            }
+            for idx, vector in enumerate(
+                rng.normal(size=(personas, dim)).astype(np.float32)
+            )
+        ],
+        on_conflict="cluster_name",
+    ).execute()
+    return client
+
+
+async def _timed(call) -> float:
+    start = time.perf_counter()
+    await call
+    return time.perf_counter() - start
+
+
+def run(
+    concurrency=DEFAULT_CONCURRENCY,
+    personas: int = DEFAULT_PERSONAS,
+    dim: int = DEFAULT_DIM,
+    latency_ms: float = 100.0,
+    workers: int = 4,
+    top_k: int = 5,
+    seed: int = 0,
+    memory: str | None = None,
+) -> list[dict]:
+    recorder = Recorder(memory=memory)
+    latency = latency_ms / 1000
+    client = _client(personas, dim, seed)
+    provider = LatencyProvider(dim, latency)
+
+    fetch = retriever.fetch_personas
+
+    def fetch_personas():
+        time.sleep(latency)
+        return fetch(client=client)
+
+    async def get_async_client():
+        return AsyncLocalSupabaseClient(client, latency=latency)
+
+    with ExitStack() as stack:
+        # persona_cache 의 loader 는 fetch_personas / afetch_personas 를 이름으로 찾는다
+        patches = {
+            "configured_embedding_provider": lambda: provider,
+            "fetch_personas": fetch_personas,
+            "get_async_supabase_client": get_async_client,
+        }
+        for name, value in patches.items():
+            stack.enter_context(mock.patch.object(retriever, name, value))
+        stack.enter_context(mock.patch.object(retriever.persona_cache, "ttl", 0))
+        stack.enter_context(
+            mock.patch.object(retriever.setting, "rag_search_mode", "client")
+        )
+
+        for n in concurrency:
+            texts = [f"query {idx}" for idx in range(n)]
+            labels = {"latency_ms": latency_ms, "workers": workers}
+            for mode in ("sync", "async"):
+                executor = BoundedExecutor(mode, max_workers=workers, max_queue=n)
+
+                async def one(text):
+                    if mode == "sync":
+                        return await executor.run(
+                            retriever.retrieve_personas, query_text=text, top_k=top_k
+                        )
+                    return await retriever.aretrieve_personas(
+                        query_text=text, top_k=top_k, run=executor.run
+                    )
+
+                async def batch():
+                    return await asyncio.gather(*(_timed(one(text)) for text in texts))
+
+                with recorder.stage(mode, n, **labels):
+                    durations = asyncio.run(batch())
+                executor.shutdown()
+                recorder.results[-1]["mean_ms"] = round(
+                    float(np.mean(durations)) * 1000, 3
+                )
+
+    return recorder.results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RAG 질의 동기/비동기 경로 지연 벤치마크")
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=list(DEFAULT_CONCURRENCY)
+    )
+    parser.add_argument("--personas", type=int, default=DEFAULT_PERSONAS)
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM, help="임베딩 차원")
+    parser.add_argument(
+        "--latency-ms", type=float, default=100.0, help="왕복 하나의 지연(ms)"
+    )
+    parser.add_argument("--workers", type=int, default=4, help="rag 실행기 스레드 수")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory", choices=MEMORY_MODES)
+    parser.add_argument("--output", type=Path, help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    results = run(
+        concurrency=args.concurrency,
+        personas=args.personas,
+        dim=args.dim,
+        latency_ms=args.latency_ms,
+        workers=args.workers,
+        top_k=args.top_k,
+        seed=args.seed,
+        memory=args.memory,
+    )
+    print_table(results)
+    params = {
+        key: str(value) if isinstance(value, Path) else value
+        for key, value in vars(args).items()
+    }
+    path = write_results("rag_async", results, params, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.harness import (
+    MEMORY_MODES,
+    Recorder,
+    print_table,
+    write_results,
+)
+from rag.persona_cache import PersonaMatrix
+from rag.retriever import EMBEDDING_COLUMN, fetch_personas, match_personas
+from services.local_supabase import LocalSupabaseClient
+
+# 페르소나 검색 위치(client / server)별 전송량과 지연 벤치마크
+# 사용법: python -m benchmarks.rag_pushdown --personas 100 1000 10000 --bandwidth-mbps 100
+#
+# Supabase 대역(services/local_supabase.py)에 페르소나를 넣고 질의 하나를 처리한다.
+# - client:        테이블 전체(임베딩 포함)를 받아 파싱하고 행렬로 쌓아 순위 계산
+#                  (캐시가 비었거나 RAG_PERSONA_CACHE_TTL=0 일 때 retrieve_personas 경로)
+# - client_cached: 캐시된 행렬에서 바로 검색 (전송 없음, ttl 안의 두 번째 질의부터)
+# - server:        match_personas RPC 로 상위 top_k 행과 점수만 받음
+# 대역은 네트워크가 없으므로 bytes(받은 바이트)와 --rtt-ms, --bandwidth-mbps 로
+# 계산한 전송 시간을 더한 modeled_ms 를 함께 적는다. server 의 DB 쪽 계산은 대역의 NumPy
+# 전체 스캔이라 실제 pgvector(인덱스 사용 시 더 빠름)와 다를 수 있다.
+
+DEFAULT_PERSONAS = (100, 1_000, 10_000)
+DEFAULT_DIM = 1536
+
+
+def _modeled_ms(seconds: float, received: int, rtt_ms: float, mbps: float) -> float:
+    transfer_ms = received * 8 / (mbps * 1e6) * 1000
+    return round(seconds * 1000 + rtt_ms + transfer_ms, 3)
+
+
+def run(
+    personas=DEFAULT_PERSONAS,
+    dim: int = DEFAULT_DIM,
+    top_k: int = 10,
+    rtt_ms: float = 20.0,
+    bandwidth_mbps: float = 100.0,
+    seed: int = 0,
+    memory: str | None = None,
+) -> list[dict]:
+    recorder = Recorder(memory=memory)
+    rng = np.random.default_rng(seed)
+    query = rng.normal(size=dim).astype(np.float32)
+
+    for n in personas:
+        client = LocalSupabaseClient()
+        client.table("personas").upsert(
+            [
+                {
+                    "title": f"persona {idx}",
+                    "description": f"persona {idx} description",
+                    "cluster_name": f"segment_{idx}",
+                    EMBEDDING_COLUMN: vector,
+                }
+                for idx, vector in enumerate(
+                    rng.normal(size=(n, dim)).astype(np.float32)
+                )
+            ],
+            on_conflict="cluster_name",
+        ).execute()
+        repeats = max(1, min(100, 10_000 // n))
+
+        client.reset_counters()
+        with recorder.stage("client", n, repeats=repeats, top_k=top_k):
+            for _ in range(repeats):
+                matrix = PersonaMatrix.from_rows(fetch_personas(client=client))
+                expected = matrix.search(query, top_k)
+        received = client.bytes_received // repeats
+
+        with recorder.stage("client_cached", n, repeats=repeats * 10, top_k=top_k):
+            for _ in range(repeats * 10):
+                matrix.search(query, top_k)
+        cached = recorder.results[-1]
+        cached["bytes"] = 0
+        cached["modeled_ms"] = round(cached["seconds"] * 1000, 3)
+        del matrix
+
+        client_result = recorder.results[-2]
+        client_result["bytes"] = received
+        client_result["modeled_ms"] = _modeled_ms(
+            client_result["seconds"], received, rtt_ms, bandwidth_mbps
+        )
+
+        # 대역이 처음 RPC 때 만드는 행렬은 DB 에는 없는 비용이라 미리 만든다
+        match_personas(query, top_k, client=client)
+        client.reset_counters()
+        with recorder.stage("server", n, repeats=repeats, top_k=top_k):
+            for _ in range(repeats):
+                matches = match_personas(query, top_k, client=client)
+        result = recorder.results[-1]
+        result["bytes"] = client.bytes_received // repeats
+        result["modeled_ms"] = _modeled_ms(
+            result["seconds"], result["bytes"], rtt_ms, bandwidth_mbps
+        )
+        result["matches_client"] = [m["cluster_name"] for m in matches] == [
+            m["cluster_name"] for m in expected
+        ]
+        del client
+
+    return recorder.results
+
+
+def print_transfer(results: list[dict]):
+    print(f"\n{'rows':>11} {'stage':<16} {'bytes':>14} {'modeled ms':>11}")
+    for row in results:
+        print(
+            f"{row['rows']:>11} {row['stage']:<16} {row['bytes']:>14} "
+            f"{row['modeled_ms']:>11.3f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="페르소나 검색 위치별 전송량/지연 벤치마크")
+    parser.add_argument(
+        "--personas", type=int, nargs="+", default=list(DEFAULT_PERSONAS)
+    )
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM, help="임베딩 차원")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rtt-ms", type=float, default=20.0, help="왕복 지연(ms)")
+    parser.add_argument(
+        "--bandwidth-mbps", type=float, default=100.0, help="전송 대역폭(Mbps)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory", choices=MEMORY_MODES)
+    parser.add_argument("--output", type=Path, help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    results = run(
+        personas=args.personas,
+        dim=args.dim,
+        top_k=args.top_k,
+        rtt_ms=args.rtt_ms,
+        bandwidth_mbps=args.bandwidth_mbps,
+        seed=args.seed,
+        memory=args.memory,
+    )
+    print_table(results)
+    print_transfer(results)
+    params = {
+        key: str(value) if isinstance(value, Path) else value
+        for key, value in vars(args).items()
+    }
+    path = write_results("rag_pushdown", results, params, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
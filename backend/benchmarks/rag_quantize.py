@@ -0,0 +1,152 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.harness import (
+    MEMORY_MODES,
+    Recorder,
+    print_table,
+    write_results,
+)
+from benchmarks.rag_ann import clustered_embeddings
+from benchmarks.reference import legacy_rank
+from rag.persona_cache import PersonaMatrix
+from rag.quantization import DEFAULT_OVERSAMPLE
+from rag.retriever import EMBEDDING_COLUMN
+
+# 페르소나 후보 행렬 양자화(float16/int8 + 원래 정밀도 재채점)의 메모리/속도/top-k 일치율
+# 사용법: python -m benchmarks.rag_quantize --personas 10000 50000 --dim 1536
+#
+# 기준은 cosine_similarity 와 같은 결과를 내는 float64 행렬 검색(rank_personas 경로)이고,
+# --legacy-max 이하 크기에서는 예전 cosine_similarity 반복 구현과도 몇 질의를 맞춰 본다.
+# - candidate_mb: 1차 점수 계산에 쓰는 상주 행렬 크기 (양자화면 원래 정밀도 행렬은 memmap)
+# - agreement:    top_k 순서까지 기준과 같은 질의 비율
+# - recall:       top_k 집합이 기준과 겹치는 비율
+
+DEFAULT_PERSONAS = (10_000, 50_000)
+DEFAULT_DIM = 1536
+DEFAULT_QUERIES = 50
+DEFAULT_LEGACY_MAX = 10_000
+KINDS = ("float32", "float16", "int8")
+
+
+def _names(matches: list[dict]) -> list[str]:
+    return [match["cluster_name"] for match in matches]
+
+
+def run(
+    personas=DEFAULT_PERSONAS,
+    dim: int = DEFAULT_DIM,
+    queries: int = DEFAULT_QUERIES,
+    top_k: int = 10,
+    oversample: int = DEFAULT_OVERSAMPLE,
+    legacy_max: int = DEFAULT_LEGACY_MAX,
+    seed: int = 0,
+    memory: str | None = None,
+) -> list[dict]:
+    recorder = Recorder(memory=memory)
+    rng = np.random.default_rng(seed)
+
+    for n in personas:
+        embeddings = clustered_embeddings(rng, n, dim, max(1, n // 50), 1.0)
+        picks = rng.integers(n, size=queries)
+        query_vectors = embeddings[picks] + rng.normal(size=(queries, dim)).astype(
+            np.float32
+        )
+        rows = [
+            {"cluster_name": f"segment_{idx}", EMBEDDING_COLUMN: vector}
+            for idx, vector in enumerate(embeddings)
+        ]
+        del embeddings
+
+        reference = PersonaMatrix.from_rows(rows, EMBEDDING_COLUMN, dtype=np.float64)
+        with recorder.stage("float64", n, repeats=queries, top_k=top_k):
+            expected = [_names(reference.search(q, top_k)) for q in query_vectors]
+        result = recorder.results[-1]
+        result["candidate_mb"] = round(reference.candidate_nbytes / 1024**2, 1)
+        if n <= legacy_max:
+            legacy_rows = [
+                {**row, EMBEDDING_COLUMN: row[EMBEDDING_COLUMN].tolist()}
+                for row in rows
+            ]
+            result["matches_cosine_similarity"] = all(
+                _names(legacy_rank(q.tolist(), legacy_rows, top_k)) == expected[idx]
+                for idx, q in enumerate(query_vectors[:3])
+            )
+            del legacy_rows
+        del reference
+
+        matrix = PersonaMatrix.from_rows(rows, EMBEDDING_COLUMN)
+        del rows
+        for kind in KINDS:
+            candidate = (
+                matrix
+                if kind == "float32"
+                else matrix.quantize(kind, oversample=oversample)
+            )
+            candidate.search(query_vectors[0], top_k)  # memmap 첫 접근 제외
+            with recorder.stage(kind, n, repeats=queries, top_k=top_k):
+                found = [_names(candidate.search(q, top_k)) for q in query_vectors]
+            result = recorder.results[-1]
+            result["candidate_mb"] = round(candidate.candidate_nbytes / 1024**2, 1)
+            result["agreement"] = round(
+                float(np.mean([f == e for f, e in zip(found, expected)])), 4
+            )
+            result["recall"] = round(
+                sum(len(set(f) & set(e)) for f, e in zip(found, expected))
+                / sum(len(e) for e in expected),
+                4,
+            )
+            del candidate
+        del matrix
+
+    return recorder.results
+
+
+def print_agreement(results: list[dict]):
+    print(f"\n{'rows':>11} {'stage':<10} {'MB':>9} {'ms/query':>10} {'agree':>7}")
+    for row in results:
+        print(
+            f"{row['rows']:>11} {row['stage']:<10} {row['candidate_mb']:>9} "
+            f"{row['seconds'] * 1000:>10.3f} {row.get('agreement', ''):>7}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="페르소나 행렬 양자화 벤치마크")
+    parser.add_argument(
+        "--personas", type=int, nargs="+", default=list(DEFAULT_PERSONAS)
+    )
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM, help="임베딩 차원")
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--oversample", type=int, default=DEFAULT_OVERSAMPLE)
+    parser.add_argument("--legacy-max", type=int, default=DEFAULT_LEGACY_MAX)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory", choices=MEMORY_MODES)
+    parser.add_argument("--output", type=Path, help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    results = run(
+        personas=args.personas,
+        dim=args.dim,
+        queries=args.queries,
+        top_k=args.top_k,
+        oversample=args.oversample,
+        legacy_max=args.legacy_max,
+        seed=args.seed,
+        memory=args.memory,
+    )
+    print_table(results)
+    print_agreement(results)
+    params = {
+        key: str(value) if isinstance(value, Path) else value
+        for key, value in vars(args).items()
+    }
+    path = write_results("rag_quantize", results, params, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
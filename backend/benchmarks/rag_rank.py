@@ -0,0 +1,130 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.harness import (
+    MEMORY_MODES,
+    Recorder,
+    print_table,
+    write_results,
+)
+from benchmarks.reference import legacy_rank
+from rag.persona_cache import PersonaMatrix
+from rag.retriever import EMBEDDING_COLUMN, rank_personas
+
+# 페르소나 수에 따른 rank_personas 순위 계산 시간 벤치마크
+# 사용법: python -m benchmarks.rag_rank --personas 7 1000 100000 1000000
+#
+# - legacy:        벡터화 전 구현 (페르소나마다 cosine_similarity + 전체 정렬)
+# - rank_personas: dict 리스트를 받아 행렬로 쌓고 행렬-벡터 곱 + argpartition
+# - cached_search: retriever 캐시가 들고 있는 정규화된 float32 행렬에서 바로 검색
+#                  (retrieve_personas 가 실제로 쓰는 경로)
+# dict 리스트는 파이썬 float 객체라 행렬보다 수십 배 크므로 --list-max 까지만 만든다.
+# 1536 차원 1M 페르소나의 float32 행렬은 약 6GB 이므로 기본 차원은 작게 잡았다.
+
+DEFAULT_PERSONAS = (7, 1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_DIM = 256
+DEFAULT_LIST_MAX = 100_000
+DEFAULT_LEGACY_MAX = 10_000
+
+
+def _repeats(n_personas: int) -> int:
+    # 작은 크기는 한 번이 너무 짧아 여러 번 돌려 평균을 낸다
+    return max(1, min(1000, 1_000_000 // max(n_personas, 1)))
+
+
+def run(
+    personas=DEFAULT_PERSONAS,
+    dim: int = DEFAULT_DIM,
+    top_k: int = 10,
+    list_max: int = DEFAULT_LIST_MAX,
+    legacy_max: int = DEFAULT_LEGACY_MAX,
+    seed: int = 0,
+    memory: str | None = None,
+) -> list[dict]:
+    recorder = Recorder(memory=memory)
+    rng = np.random.default_rng(seed)
+    query = rng.normal(size=dim).tolist()
+
+    for n in personas:
+        embeddings = rng.normal(size=(n, dim)).astype(np.float32)
+        metadata = [{"cluster_name": f"segment_{idx}"} for idx in range(n)]
+        rows = None
+        if n <= list_max:
+            rows = [
+                {**meta, EMBEDDING_COLUMN: vector.tolist()}
+                for meta, vector in zip(metadata, embeddings)
+            ]
+
+        expected = None
+        if rows is not None and n <= legacy_max:
+            repeats = max(1, _repeats(n) // 100)
+            with recorder.stage("legacy", n, repeats=repeats, top_k=top_k):
+                for _ in range(repeats):
+                    expected = legacy_rank(query, rows, top_k)
+
+        if rows is not None:
+            repeats = max(1, _repeats(n) // 10)
+            with recorder.stage("rank_personas", n, repeats=repeats, top_k=top_k):
+                for _ in range(repeats):
+                    ranked = rank_personas(query, rows, top_k=top_k)
+            if expected is not None:
+                recorder.results[-1]["matches_legacy"] = [
+                    m["cluster_name"] for m in ranked
+                ] == [m["cluster_name"] for m in expected]
+            del rows
+
+        matrix = PersonaMatrix.from_rows(
+            {**meta, EMBEDDING_COLUMN: vector}
+            for meta, vector in zip(metadata, embeddings)
+        )
+        del embeddings
+        repeats = _repeats(n)
+        with recorder.stage("cached_search", n, repeats=repeats, top_k=top_k):
+            for _ in range(repeats):
+                matrix.search(query, top_k)
+        del matrix
+
+    return recorder.results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="페르소나 순위 계산 벤치마크")
+    parser.add_argument(
+        "--personas", type=int, nargs="+", default=list(DEFAULT_PERSONAS)
+    )
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM, help="임베딩 차원")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument(
+        "--list-max",
+        type=int,
+        default=DEFAULT_LIST_MAX,
+        help="dict 리스트 입력(legacy, rank_personas)을 만들 최대 페르소나 수",
+    )
+    parser.add_argument("--legacy-max", type=int, default=DEFAULT_LEGACY_MAX)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory", choices=MEMORY_MODES)
+    parser.add_argument("--output", type=Path, help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    results = run(
+        personas=args.personas,
+        dim=args.dim,
+        top_k=args.top_k,
+        list_max=args.list_max,
+        legacy_max=args.legacy_max,
+        seed=args.seed,
+        memory=args.memory,
+    )
+    print_table(results)
+    params = {
+        key: str(value) if isinstance(value, Path) else value
+        for key, value in vars(args).items()
+    }
+    path = write_results("rag_rank", results, params, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+from rag.retriever import EMBEDDING_COLUMN, cosine_similarity
+
+# 벡터화 전 구현을 기준(정답)으로 남겨 둔 모듈
+# 벤치마크(rag_rank, rag_quantize)와 테스트(tests/rag/test_ranking.py)가 함께 쓴다.
+
+
+def legacy_rank(query, personas, top_k):
+    """벡터화 전 rank_personas: 페르소나마다 cosine_similarity 를 계산하고 전체를 정렬한다.
+
+    임베딩이 없는 페르소나는 건너뛰고, 점수가 같으면 입력 순서를 유지한다.
+    """
+    scored = []
+    for persona in personas:
+        embedding = persona.get(EMBEDDING_COLUMN)
+        if not embedding:
+            continue
+        payload = {k: v for k, v in persona.items() if k != EMBEDDING_COLUMN}
+        payload["score"] = cosine_similarity(query, embedding)
+        scored.append(payload)
+    scored.sort(key=lambda item: item["score"], reverse=True)
+    return scored[:top_k]
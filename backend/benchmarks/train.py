@@ -0,0 +1,139 @@
+import argparse
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+
+from benchmarks.harness import (
+    MEMORY_MODES,
+    Recorder,
+    print_table,
+    write_results,
+)
+from pipelines.synthetic.generate import fit_profile, write_csv
+from pipelines.train.train import (
+    DEFAULT_CHUNK_SIZE,
+    FEATURE_COLUMNS,
+    FINAL_K,
+    preprocess,
+    save_artifacts,
+    train_save_model_streaming,
+)
+from serving.models.registry import load_analyzer
+
+# 학습 단계별(load/encode/scale/fit/dump)과 배치 스코어링의 시간·메모리 벤치마크
+# 사용법: python -m benchmarks.train --rows 10000 100000 1000000
+#
+# 행 수마다 합성 데이터(pipelines/synthetic/generate.py)를 만들고, train_save_model 과
+# 같은 순서로 단계를 하나씩 잰다. 결과는 benchmarks/results/train-<커밋>.json
+
+DEFAULT_ROWS = (10_000, 100_000, 1_000_000)
+DEFAULT_SCORE_BATCH = 10_000
+
+
+def _artifact_paths(directory: Path) -> dict[str, Path]:
+    directory.mkdir(parents=True, exist_ok=True)
+    return {
+        "model_path": directory / "model.pkl",
+        "scaler_path": directory / "scaler.pkl",
+        "columns_path": directory / "columns.pkl",
+        "bundle_path": directory / "model.bundle",
+    }
+
+
+def run(
+    rows=DEFAULT_ROWS,
+    seed: int = 0,
+    workdir: Path | None = None,
+    modes=("compiled",),
+    score_batch: int = DEFAULT_SCORE_BATCH,
+    streaming: bool = False,
+    memory: str | None = None,
+) -> list[dict]:
+    profile = fit_profile()
+    recorder = Recorder(memory=memory)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(workdir or tmp)
+        for n_rows in rows:
+            data_path = workdir / f"synthetic-{n_rows}-{seed}.csv"
+            with recorder.stage("generate", n_rows):
+                write_csv(data_path, n_rows, seed, profile)
+
+            with recorder.stage("load", n_rows):
+                df = pd.read_csv(data_path, usecols=FEATURE_COLUMNS)
+            with recorder.stage("encode", n_rows):
+                features, encoder = preprocess(df)
+            with recorder.stage("scale", n_rows):
+                scaler = StandardScaler()
+                scaled = scaler.fit_transform(features)
+            with recorder.stage("fit", n_rows):
+                model = KMeans(n_clusters=FINAL_K, random_state=0, n_init="auto")
+                model.fit(scaled)
+            paths = _artifact_paths(workdir / f"model-{n_rows}")
+            with recorder.stage("dump", n_rows):
+                save_artifacts(model, scaler, encoder, **paths)
+            del features, scaled
+
+            for mode in modes:
+                analyzer = load_analyzer(paths["bundle_path"].parent, mode=mode)
+                with recorder.stage("score", n_rows, mode=mode, batch=score_batch):
+                    for start in range(0, n_rows, score_batch):
+                        analyzer.predict_labels(df.iloc[start : start + score_batch])
+            del df
+
+            if streaming:
+                stream_paths = _artifact_paths(workdir / f"model-{n_rows}-streaming")
+                with recorder.stage("train_stream", n_rows, chunk=DEFAULT_CHUNK_SIZE):
+                    train_save_model_streaming(data_path=data_path, **stream_paths)
+
+            data_path.unlink()
+
+    return recorder.results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="학습/스코어링 단계별 벤치마크")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        default=["compiled"],
+        choices=("sklearn", "compiled", "lookup"),
+        help="스코어링에 쓸 추론 경로",
+    )
+    parser.add_argument("--score-batch", type=int, default=DEFAULT_SCORE_BATCH)
+    parser.add_argument(
+        "--streaming", action="store_true", help="스트리밍 학습 전체 시간도 잰다"
+    )
+    parser.add_argument(
+        "--memory",
+        choices=MEMORY_MODES,
+        help="메모리 측정 방식 (기본: 리눅스는 rss, 그 외 tracemalloc)",
+    )
+    parser.add_argument("--workdir", type=Path, help="합성 데이터/아티팩트 임시 경로")
+    parser.add_argument("--output", type=Path, help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    results = run(
+        rows=args.rows,
+        seed=args.seed,
+        workdir=args.workdir,
+        modes=args.modes,
+        score_batch=args.score_batch,
+        streaming=args.streaming,
+        memory=args.memory,
+    )
+    print_table(results)
+    params = {
+        key: str(value) if isinstance(value, Path) else value
+        for key, value in vars(args).items()
+    }
+    print(f"Results written to {write_results('train', results, params, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,69 @@ class Settings(BaseSettings):
     model_path: Path = base_dir / "model.pkl"
     scaler_path: Path = base_dir / "scaler.pkl"
     columns_path: Path = base_dir / "columns.pkl"
+    # 단일 파일 아티팩트 (serving/models/bundle.py). 없으면 위의 joblib 파일을 읽는다
+    bundle_path: Path = base_dir / "model.bundle"
+    # 추론 경로 선택: "sklearn" | "compiled" | "lookup" (serving/models/analysis.py 참고)
+    # sklearn 은 joblib 피클이 필요하고, compiled/lookup 은 번들을 바로 메모리 매핑한다
+    # lookup 은 단건(카나리)과 배치(POST /api/analysis 의 마이크로 배치) 모두 경계표를 쓴다
+    inference_mode: str = "compiled"
+    # lookup 모드에서 로드 시 경계표를 KMeans.predict 와 격자 비교할지 여부
+    lookup_verify: bool = True
+    # 0 보다 크면 이 주기(초)로 base_dir(및 base_dir/versions/*)를 확인해 새 모델로 교체
+    model_watch_interval: float = 0
+    # POST /api/analysis/ 단건 요청을 묶는 마이크로 배치 (serving/api/batching.py)
+    # 저부하에서는 대기 없이 바로 처리하고, 고부하에서만 최대 이만큼 기다려 묶는다
+    microbatch_max_size: int = 64
+    microbatch_max_wait_ms: float = 2.0
+    # 마이크로 배치 대기열 상한. 넘치면 503 + Retry-After 로 바로 거절한다
+    microbatch_max_pending: int = 1024
+    # 작업 종류별 전용 실행기 (operation/core/executors.py)
+    # CPU 추론: "thread" | "process", RAG: OpenAI/Supabase 왕복 위주라 스레드
+    # 실행 중 workers 개 + 대기 queue_size 개를 넘는 요청은 503 + Retry-After 로 거절한다
+    inference_executor_kind: str = "thread"
+    inference_workers: int = 4
+    inference_queue_size: int = 64
+    rag_workers: int = 16
+    rag_queue_size: int = 64
+    # POST /api/rag/query/batch 한 요청에 담을 수 있는 최대 질의 수
+    rag_batch_max_queries: int = 1000
+    # 페르소나 유사도 검색 위치: "client"(테이블을 받아 프로세스에서 순위 계산)
+    # | "server"(DB 함수 match_personas 가 상위 top_k 만 반환, rag/sql/match_personas.sql)
+    # server 호출이 실패하면 client 로 처리하고 retry_interval 초 동안은 DB 함수를 건너뛴다
+    rag_search_mode: str = "client"
+    rag_server_search_retry_interval: float = 60.0
+    # RAG 페르소나 임베딩 행렬 캐시 유지 시간(초) (rag/persona_cache.py). 0 이면 매번 조회
+    # 같은 프로세스의 rag/store.py upsert 나 POST /admin/rag/invalidate 로 바로 비울 수 있다
+    rag_persona_cache_ttl: float = 300.0
+    # 페르소나 후보 행렬 양자화 (rag/quantization.py): "none" | "float16" | "int8"
+    # 양자화 점수 상위 max(top_k * oversample, 64)개만 원래 정밀도로 다시 점수를 낸다
+    # spill 이면 원래 정밀도 행렬은 임시 파일 memmap 으로 옮겨 워커 상주 메모리를 줄인다
+    rag_quantization: str = "none"
+    rag_quantization_oversample: int = 10
+    rag_quantization_spill: bool = True
+    # 임베딩 제공자 (rag/providers.py): "openai" | "hashing"(네트워크 없는 로컬 CPU 임베딩)
+    # 페르소나 저장과 검색이 같은 제공자를 써야 한다. 차원은 hashing 에만 적용
+    rag_embedding_provider: str = "openai"
+    rag_embedding_dim: int = 1536
+    # 쿼리 임베딩 캐시 (rag/embedding_cache.py): 메모리 LRU 크기와 재시작/워커 간 공유용 SQLite
+    rag_embedding_cache_max_mb: float = 64
+    rag_embedding_cache_disk: bool = True
+    rag_embedding_cache_path: Path = (
+        base_dir.parent / "cache" / "query_embeddings.sqlite"
+    )
+    # 페르소나 근사 최근접 이웃 인덱스 (rag/ann.py): "none"(정확 검색) | "ivf"
+    # 페르소나가 rag_ann_min_personas 개 이상일 때만 쓰고, 그보다 적으면 정확 검색이 더 빠르다
+    # nlist 0 이면 sqrt(페르소나 수), nprobe 를 키울수록 recall 이 오르고 느려진다
+    rag_ann_index: str = "none"
+    rag_ann_min_personas: int = 20000
+    rag_ann_nlist: int = 0
+    rag_ann_nprobe: int = 16
+    rag_ann_index_path: Path = base_dir.parent / "cache" / "persona_ivf.npz"
+    executor_retry_after: int = 1
+    # /api/analysis/stream 에서 한 번에 파싱/예측하는 행 수
+    stream_chunk_size: int = 1000
+    # 스트리밍 업로드를 메모리에 두는 최대 크기, 넘으면 임시 파일로 넘어간다
+    stream_spool_max_bytes: int = 8 * 1024 * 1024
 
 
 setting = Settings()
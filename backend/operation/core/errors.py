@@ -4,10 +4,18 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 
 
 class CustomException(Exception):
-    def __init__(self, error_code: str, message: str, status_code: int):
+    def __init__(
+        self,
+        error_code: str,
+        message: str,
+        status_code: int,
+        headers: dict[str, str] | None = None,
+    ):
         self.error_code = error_code
         self.message = message
         self.status_code = status_code
+        # 응답에 함께 실을 헤더 (예: 과부하 시 Retry-After)
+        self.headers = headers
 
 
 # StarletteHTTPException: FastAPI가 내는 기본 에러 (예: "주소 못 찾음 404")
@@ -20,6 +28,7 @@ def add_exception_handlers(app: FastAPI):
         response = JSONResponse(
             status_code=exc.status_code,
             content={"error_code": exc.error_code, "message": exc.message},
+            headers=exc.headers,
         )
         # http의 응답 헤더에 번호표 찾기 (로깅미들웨어에서 저장한 것)
         # 에러가 나도 번호표는 붙여서 내보낸다. 그 이유는 나중에 프론트엔드에서 에러가 났을 때
@@ -0,0 +1,119 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+from .errors import CustomException
+
+EXECUTOR_KINDS = ("thread", "process")
+
+
+class ExecutorSaturated(CustomException):
+    """실행기 대기열이 가득 찼을 때. 예외 핸들러가 Retry-After 헤더와 함께 응답한다."""
+
+    def __init__(self, name: str, retry_after: int, status_code: int = 503):
+        super().__init__(
+            error_code="SERVER_BUSY",
+            message=f"{name} 작업이 밀려 있습니다. {retry_after}초 후 다시 시도해 주세요.",
+            status_code=status_code,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class BoundedExecutor:
+    """작업 종류별 전용 실행기. 실행 중 + 대기 중 작업 수가 max_workers + max_queue 를 넘으면
+    기다리게 하지 않고 바로 ExecutorSaturated 를 던져, 지연이 끝없이 늘어나는 대신 빠르게 거절한다.
+
+    CPU 추론(kind="process" 가능)과 I/O 위주 RAG 호출이 서로의 슬롯을 잡아먹지 않도록
+    Starlette 기본 스레드풀과 분리해 쓴다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int,
+        kind: str = "thread",
+        retry_after: int = 1,
+        reject_status: int = 503,
+    ):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"kind must be one of {EXECUTOR_KINDS}, got {kind!r}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+        self.reject_status = reject_status
+
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.failed = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        # 프로세스 풀은 실제로 쓸 때 만든다 (import 시점에 워커를 띄우지 않도록)
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.name
+                )
+        return self._executor
+
+    def _acquire(self):
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.rejected += 1
+                raise ExecutorSaturated(
+                    self.name, self.retry_after, status_code=self.reject_status
+                )
+            self._in_flight += 1
+            self.submitted += 1
+
+    # 호출한 쪽이 취소되어도 작업이 실제로 끝날 때 슬롯을 돌려준다
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            if not future.cancelled() and future.exception() is not None:
+                self.failed += 1
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            executor = self._get_executor()
+        self._acquire()
+        try:
+            future = executor.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            in_flight = self._in_flight
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": min(in_flight, self.max_workers),
+                "queue_depth": max(0, in_flight - self.max_workers),
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "failed": self.failed,
+            }
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
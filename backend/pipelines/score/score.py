@@ -0,0 +1,300 @@
+import argparse
+import io
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from typing import get_args
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config.settings import setting
+from serving.api.schemas.customer_schema import CustomerProfile
+from serving.models.analysis import CustomerAnalyzer
+
+# 재학습 후 전체 고객을 HTTP API 없이 다시 분류하는 오프라인 배치 스코어링
+# 사용법: python -m pipelines.score.score --input customers.csv --output scores.parquet
+
+PROFILE_COLUMNS = [
+    "Age",
+    "Purchase Amount (USD)",
+    "Subscription Status",
+    "Frequency of Purchases",
+]
+ID_COLUMN = "Customer ID"
+UNASSIGNED = -1
+
+DEFAULT_CHUNK_SIZE = 200_000
+
+
+def _bound(field: str, name: str):
+    return next(
+        getattr(rule, name)
+        for rule in CustomerProfile.model_fields[field].metadata
+        if hasattr(rule, name)
+    )
+
+
+# API 스키마(CustomerProfile)와 같은 허용 범위와 값
+MIN_AGE, MAX_AGE = _bound("age", "ge"), _bound("age", "le")
+MIN_AMOUNT = _bound("purchase_amount", "ge")
+FREQUENCIES = list(
+    get_args(CustomerProfile.model_fields["frequency_of_purchases"].annotation)
+)
+
+# 워커 프로세스마다 한 번만 로드해 두는 분석기
+_worker_analyzer: CustomerAnalyzer | None = None
+
+
+def _init_worker(model_path: str, scaler_path: str, columns_path: str, mode: str):
+    global _worker_analyzer
+    _worker_analyzer = CustomerAnalyzer(
+        model_path=model_path,
+        scaler_path=scaler_path,
+        columns_path=columns_path,
+        mode=mode,
+        verify_lookup=False,
+    )
+
+
+def _normalize_subscription(value) -> str | None:
+    if isinstance(value, np.bool_):
+        value = bool(value)
+    if not isinstance(value, (str, bool)):
+        return None
+    try:
+        return CustomerProfile.normalize_subscription(value)
+    except ValueError:
+        return None
+
+
+def validate_profiles(
+    chunk: pd.DataFrame,
+) -> tuple[np.ndarray, pd.DataFrame, np.ndarray]:
+    """API 의 CustomerProfile 과 같은 규칙으로 행마다 검사한다.
+
+    (통과 여부, 통과한 행의 정규화된 프로필, 행별 에러 메시지 또는 None) 을 돌려준다.
+    숫자가 아닌 값이나 빈 값도 에러로 남기고, 구독 여부는 API 처럼 "Yes"/"No" 로 맞춘다.
+    """
+    ages = pd.to_numeric(chunk["Age"], errors="coerce")
+    amounts = pd.to_numeric(chunk["Purchase Amount (USD)"], errors="coerce")
+    column = chunk["Subscription Status"]
+    # 값 종류는 몇 개뿐이라 고유값마다 한 번만 정규화한다
+    subscriptions = column.map(
+        {value: _normalize_subscription(value) for value in column.dropna().unique()}
+    )
+    frequencies = chunk["Frequency of Purchases"]
+
+    checks = [
+        (
+            (ages % 1 == 0) & ages.between(MIN_AGE, MAX_AGE),
+            f"Age: must be an integer between {MIN_AGE} and {MAX_AGE}",
+        ),
+        (amounts >= MIN_AMOUNT, f"Purchase Amount (USD): must be >= {MIN_AMOUNT}"),
+        (subscriptions.notna(), 'Subscription Status: must be "Yes" or "No"'),
+        (
+            frequencies.isin(FREQUENCIES),
+            f"Frequency of Purchases: must be one of {', '.join(FREQUENCIES)}",
+        ),
+    ]
+    masks = [mask.to_numpy() for mask, _ in checks]
+    valid = np.logical_and.reduce(masks)
+
+    errors = np.full(len(chunk), None, dtype=object)
+    for row in np.flatnonzero(~valid):
+        errors[row] = "; ".join(
+            message for mask, (_, message) in zip(masks, checks) if not mask[row]
+        )
+
+    profiles = pd.DataFrame(
+        {
+            "Age": ages[valid].astype(int),
+            "Purchase Amount (USD)": amounts[valid].astype(float),
+            "Subscription Status": subscriptions[valid],
+            "Frequency of Purchases": frequencies[valid],
+        }
+    )
+    return valid, profiles, errors
+
+
+# 한 청크를 CustomerAnalyzer 와 같은 전처리로 예측해 (결과 컬럼, 행별 에러) 를 돌려준다
+def score_chunk(chunk: pd.DataFrame) -> tuple[pd.DataFrame, np.ndarray]:
+    analyzer = _worker_analyzer
+    labels = np.full(len(chunk), UNASSIGNED, dtype=np.int32)
+
+    # API 가 거절할 행(빈 값, 범위 밖, 알 수 없는 범주)은 예측하지 않고 UNASSIGNED 로 남긴다
+    valid, profiles, errors = validate_profiles(chunk)
+    if valid.any():
+        labels[valid] = analyzer.predict_labels(profiles)
+
+    names = {label: analyzer.cluster_name(int(label)) for label in np.unique(labels)}
+    result = pd.DataFrame(
+        {
+            "predicted_cluster": labels,
+            "cluster_name": pd.Series(labels).map(names).to_numpy(),
+        }
+    )
+    if ID_COLUMN in chunk:
+        result.insert(0, ID_COLUMN, chunk[ID_COLUMN].to_numpy())
+    return result, errors
+
+
+# 헤더 다음부터 파일을 target_bytes 크기의 줄 경계 구간으로 나눈다
+# (CSV 파싱까지 워커가 나눠 하도록, 부모 프로세스는 오프셋만 계산한다)
+def _byte_ranges(path: Path, target_bytes: int):
+    size = path.stat().st_size
+    with open(path, "rb") as f:
+        header = f.readline()
+        start = f.tell()
+        while start < size:
+            f.seek(start + target_bytes)
+            f.readline()
+            end = min(f.tell(), size)
+            yield header, start, end
+            start = end
+
+
+def score_range(
+    path: Path, header: bytes, start: int, end: int
+) -> tuple[pd.DataFrame, np.ndarray]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        body = f.read(end - start)
+    chunk = pd.read_csv(
+        io.BytesIO(header + body),
+        usecols=lambda column: column in PROFILE_COLUMNS or column == ID_COLUMN,
+    )
+    return score_chunk(chunk)
+
+
+def _estimate_row_bytes(path: Path, sample_rows: int = 1000) -> float:
+    with open(path, "rb") as f:
+        f.readline()
+        lines = [line for _, line in zip(range(sample_rows), f)]
+    return sum(map(len, lines)) / max(len(lines), 1)
+
+
+def score_file(
+    input_path: Path,
+    output_path: Path,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    mode: str = "compiled",
+    rejects_path: Path | None = None,
+) -> dict:
+    """CSV 를 약 chunk_size 행씩 나눠 프로세스 풀에서 파싱/예측하고,
+    입력 순서대로 Parquet 에 이어 쓴다.
+
+    동시에 처리 중인 청크는 workers * 2 개로 제한해 메모리는 청크 크기에만 비례한다.
+    청크는 줄 경계로 자르므로 따옴표 안에 줄바꿈이 있는 CSV 는 지원하지 않는다.
+    검증에 실패한 행은 UNASSIGNED 로 쓰고 개수를 rejected 로 센다. rejects_path 가
+    있으면 (데이터 행 번호, Customer ID, 에러) 를 CSV 로 남긴다.
+    입력에 데이터 행이 없어도 출력 파일은 항상 만든다.
+    """
+    input_path = Path(input_path)
+    worker_args = (
+        str(setting.model_path),
+        str(setting.scaler_path),
+        str(setting.columns_path),
+        mode,
+    )
+    target_bytes = max(1, int(_estimate_row_bytes(input_path) * chunk_size))
+    ranges = _byte_ranges(input_path, target_bytes)
+
+    rows = rejected = 0
+    writer: pq.ParquetWriter | None = None
+    start = time.perf_counter()
+
+    def write(scored: tuple[pd.DataFrame, np.ndarray]):
+        nonlocal rows, rejected, writer
+        result, errors = scored
+        table = pa.Table.from_pandas(result, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(output_path, table.schema)
+        writer.write_table(table)
+
+        bad = np.flatnonzero(pd.notna(errors))
+        if rejects_file is not None:
+            rejects = pd.DataFrame({"row": rows + bad + 1})
+            if ID_COLUMN in result:
+                rejects[ID_COLUMN] = result[ID_COLUMN].to_numpy()[bad]
+            rejects["error"] = errors[bad]
+            rejects.to_csv(rejects_file, index=False, header=rejects_file.tell() == 0)
+        rows += len(result)
+        rejected += len(bad)
+
+    if rejects_path is not None:
+        rejects_context = open(rejects_path, "w", newline="", encoding="utf-8")
+    else:
+        rejects_context = nullcontext()
+
+    with rejects_context as rejects_file:
+        try:
+            if workers <= 1:
+                _init_worker(*worker_args)
+                for header, begin, end in ranges:
+                    write(score_range(input_path, header, begin, end))
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=workers, initializer=_init_worker, initargs=worker_args
+                ) as pool:
+                    pending = deque()
+                    for header, begin, end in ranges:
+                        pending.append(
+                            pool.submit(score_range, input_path, header, begin, end)
+                        )
+                        if len(pending) >= workers * 2:
+                            write(pending.popleft().result())
+                    while pending:
+                        write(pending.popleft().result())
+            if writer is None:
+                # 데이터 행이 없으면 헤더만 있는 빈 청크로 스키마만 담긴 파일을 쓴다
+                with open(input_path, "rb") as f:
+                    write(score_range(input_path, f.readline(), 0, 0))
+        finally:
+            if writer is not None:
+                writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "rejected": rejected,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="오프라인 전체 고객 배치 스코어링")
+    parser.add_argument("--input", type=Path, required=True, help="입력 CSV 경로")
+    parser.add_argument("--output", type=Path, required=True, help="출력 Parquet 경로")
+    parser.add_argument("--workers", type=int, default=1, help="프로세스 수")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument(
+        "--mode", default="compiled", choices=("sklearn", "compiled", "lookup")
+    )
+    parser.add_argument(
+        "--rejects", type=Path, help="검증에 실패한 행(번호, ID, 에러)을 쓸 CSV 경로"
+    )
+    args = parser.parse_args(argv)
+
+    stats = score_file(
+        args.input,
+        args.output,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        mode=args.mode,
+        rejects_path=args.rejects,
+    )
+    print(
+        f"Scored {stats['rows']} rows ({stats['rejected']} rejected) "
+        f"in {stats['seconds']}s ({stats['rows_per_second']} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
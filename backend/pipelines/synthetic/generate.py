@@ -0,0 +1,129 @@
+import argparse
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipelines.train.train import DEFAULT_DATA_PATH, FEATURE_COLUMNS
+
+# 원본 데이터셋(3,900행)과 통계적으로 비슷한 합성 고객 데이터를 원하는 크기로 만든다
+# 사용법: python -m pipelines.synthetic.generate --rows 1000000 --seed 0 --output big.csv
+#
+# - (구독 여부, 구매 빈도) 조합의 결합 분포는 원본 빈도 그대로 뽑는다.
+# - 나이/구매 금액은 같은 조합의 원본 행을 하나 골라(부트스트랩) 작은 정수 잡음을 더하고
+#   원본 범위로 자른다. 그래서 조합별 분포와 나이-금액 관계가 원본과 비슷하게 유지된다.
+# - BLOCK_SIZE 행마다 (seed, 블록 번호)로 난수 생성기를 새로 만들므로, 같은 seed 와
+#   같은 BLOCK_SIZE 면 프로세스와 상관없이 같은 데이터가 나온다.
+#   BLOCK_SIZE 를 바꾸면 블록 경계가 달라져 난수 흐름, 즉 생성되는 데이터도 달라진다.
+
+BLOCK_SIZE = 100_000
+ID_COLUMN = "Customer ID"
+CATEGORY_COLUMNS = ["Subscription Status", "Frequency of Purchases"]
+# 부트스트랩한 값에 더하는 정수 잡음의 최대 크기
+JITTER = {"Age": 2, "Purchase Amount (USD)": 5}
+
+
+@dataclass(frozen=True)
+class SyntheticProfile:
+    """원본 데이터에서 뽑아 둔 생성용 통계."""
+
+    cells: pd.DataFrame  # CATEGORY_COLUMNS 조합 (셀당 한 행)
+    cell_probs: np.ndarray
+    # 셀별 원본 (나이, 구매 금액) 행. 부트스트랩 대상
+    cell_values: list[np.ndarray]
+    bounds: dict[str, tuple[int, int]]
+
+
+def fit_profile(data_path=DEFAULT_DATA_PATH) -> SyntheticProfile:
+    df = pd.read_csv(data_path, usecols=FEATURE_COLUMNS).dropna()
+    numeric = list(JITTER)
+    groups = df.groupby(CATEGORY_COLUMNS, sort=True)
+    cells = pd.DataFrame(list(groups.groups), columns=CATEGORY_COLUMNS)
+    sizes = groups.size().to_numpy()
+    return SyntheticProfile(
+        cells=cells,
+        cell_probs=sizes / sizes.sum(),
+        cell_values=[group[numeric].to_numpy(dtype=np.int64) for _, group in groups],
+        bounds={
+            column: (int(df[column].min()), int(df[column].max()))
+            for column in numeric
+        },
+    )
+
+
+def generate_block(
+    profile: SyntheticProfile, seed: int, block: int, n_rows: int
+) -> pd.DataFrame:
+    rng = np.random.default_rng([seed, block])
+    cell = rng.choice(len(profile.cell_probs), size=n_rows, p=profile.cell_probs)
+
+    values = np.empty((n_rows, len(JITTER)), dtype=np.int64)
+    for idx, seed_rows in enumerate(profile.cell_values):
+        rows = np.flatnonzero(cell == idx)
+        values[rows] = seed_rows[rng.integers(len(seed_rows), size=len(rows))]
+
+    frame = {
+        ID_COLUMN: np.arange(1, n_rows + 1, dtype=np.int64) + block * BLOCK_SIZE,
+    }
+    for pos, (column, jitter) in enumerate(JITTER.items()):
+        low, high = profile.bounds[column]
+        noise = rng.integers(-jitter, jitter + 1, size=n_rows)
+        frame[column] = np.clip(values[:, pos] + noise, low, high)
+    for column in CATEGORY_COLUMNS:
+        frame[column] = profile.cells[column].to_numpy()[cell]
+    return pd.DataFrame(frame, columns=[ID_COLUMN, *FEATURE_COLUMNS])
+
+
+def iter_blocks(n_rows: int, seed: int = 0, profile: SyntheticProfile | None = None):
+    profile = profile or fit_profile()
+    for block, start in enumerate(range(0, n_rows, BLOCK_SIZE)):
+        yield generate_block(profile, seed, block, min(BLOCK_SIZE, n_rows - start))
+
+
+def generate_frame(
+    n_rows: int, seed: int = 0, profile: SyntheticProfile | None = None
+) -> pd.DataFrame:
+    profile = profile or fit_profile()
+    blocks = list(iter_blocks(n_rows, seed, profile))
+    return pd.concat(blocks or [generate_block(profile, seed, 0, 0)], ignore_index=True)
+
+
+def write_csv(
+    output_path, n_rows: int, seed: int = 0, profile: SyntheticProfile | None = None
+) -> dict:
+    """블록 단위로 CSV 에 이어 써서 메모리는 BLOCK_SIZE 에만 비례한다."""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        for block, frame in enumerate(iter_blocks(n_rows, seed, profile)):
+            frame.to_csv(f, index=False, header=block == 0)
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": n_rows,
+        "seconds": round(elapsed, 3),
+        "bytes": output_path.stat().st_size,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="합성 고객 데이터 생성")
+    parser.add_argument("--rows", type=int, required=True, help="생성할 행 수")
+    parser.add_argument("--output", type=Path, required=True, help="출력 CSV 경로")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--source", type=Path, default=DEFAULT_DATA_PATH, help="통계를 뽑을 원본 CSV"
+    )
+    args = parser.parse_args(argv)
+
+    stats = write_csv(args.output, args.rows, args.seed, fit_profile(args.source))
+    print(
+        f"Wrote {stats['rows']} rows ({stats['bytes'] / 1e6:.1f} MB) "
+        f"to {args.output} in {stats['seconds']}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
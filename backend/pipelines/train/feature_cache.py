@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+# 전처리된 피처 행렬 캐시
+#
+# <cache_dir>/<key>.npy          float64 (행, 컬럼) 행렬
+# <cache_dir>/<key>.json         컬럼 목록, 원본 정보, build 가 함께 돌려준 메타데이터
+#
+# key 는 원본 파일 내용의 해시 + 전처리 버전이라, 파일이 바뀌거나 전처리 코드가 바뀌면
+# (버전을 올리면) 자동으로 새로 만든다. 같은 데이터로 다시 학습/스윕할 때는 CSV 파싱 없이 읽는다.
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_digest(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(data_path, preprocess_version: int) -> str:
+    return f"{file_digest(data_path)[:16]}-v{preprocess_version}"
+
+
+def _write_atomic(path: Path, write: Callable):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def load_or_build(
+    data_path,
+    build: Callable[[Path], tuple[pd.DataFrame, dict]],
+    preprocess_version: int,
+    cache_dir,
+) -> tuple[pd.DataFrame, dict, bool]:
+    """캐시에 있으면 읽고, 없으면 build(data_path) -> (피처, 메타데이터) 로 만들어 저장한다.
+
+    반환값은 (피처, 메타데이터, 캐시 적중 여부). 메타데이터는 JSON 으로 직렬화 가능해야 한다.
+    """
+    data_path = Path(data_path)
+    cache_dir = Path(cache_dir)
+    key = cache_key(data_path, preprocess_version)
+    matrix_path = cache_dir / f"{key}.npy"
+    meta_path = cache_dir / f"{key}.json"
+
+    if matrix_path.exists() and meta_path.exists():
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        matrix = np.load(matrix_path)
+        features = pd.DataFrame(matrix, columns=pd.Index(meta["columns"]))
+        return features, meta["extra"], True
+
+    features, extra = build(data_path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    matrix = np.ascontiguousarray(features.to_numpy(dtype=float))
+    # 행렬을 먼저 쓰고 메타데이터를 마지막에 써서, 메타데이터가 있으면 행렬도 완전하다
+    _write_atomic(matrix_path, lambda f: np.save(f, matrix))
+    meta = {
+        "columns": [str(column) for column in features.columns],
+        "source": str(data_path),
+        "preprocess_version": preprocess_version,
+        "rows": len(features),
+        "extra": extra,
+    }
+    _write_atomic(
+        meta_path, lambda f: f.write(json.dumps(meta, ensure_ascii=False).encode())
+    )
+    return features, extra, False
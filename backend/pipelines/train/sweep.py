@@ -0,0 +1,187 @@
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
+
+from serving.models.analysis import CLUSTER_INFO
+from pipelines.train.train import (
+    DEFAULT_DATA_PATH,
+    FINAL_K,
+    base_dir,
+    load_features,
+    save_artifacts,
+    versioned_artifact_paths,
+)
+
+# 데이터가 바뀌었을 때 k 를 다시 고르는 스윕
+# 사용법: python -m pipelines.train.sweep --k-min 2 --k-max 12 --workers 4
+#
+# 후보 k 마다 KMeans 를 프로세스 풀에서 병렬로 학습하고, inertia 와
+# 고정 크기 표본의 silhouette 점수를 계산한다. (silhouette 은 행 수의 제곱에 비례하므로 표본으로)
+
+DEFAULT_SAMPLE_SIZE = 2000
+
+# 워커 프로세스마다 한 번만 받아 두는 스케일된 학습 데이터
+_worker_data: np.ndarray | None = None
+
+
+def _init_worker(data: np.ndarray):
+    global _worker_data
+    _worker_data = data
+
+
+def evaluate_k(k: int, sample_size: int, random_state: int = 0) -> dict:
+    # 워커 여러 개가 동시에 도므로 BLAS/OpenMP 스레드는 워커당 하나로 제한
+    with threadpool_limits(limits=1):
+        start = time.perf_counter()
+        model = KMeans(n_clusters=k, random_state=random_state, n_init="auto")
+        labels = model.fit_predict(_worker_data)
+        silhouette = silhouette_score(
+            _worker_data,
+            labels,
+            sample_size=min(sample_size, len(_worker_data)),
+            random_state=random_state,
+        )
+    return {
+        "k": k,
+        "inertia": float(model.inertia_),
+        "silhouette": float(silhouette),
+        "seconds": round(time.perf_counter() - start, 3),
+        "model": model,
+    }
+
+
+def sweep(
+    data_path=DEFAULT_DATA_PATH,
+    k_values=range(2, 13),
+    workers: int = 4,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    random_state: int = 0,
+    use_cache: bool = True,
+) -> dict:
+    """후보 k 를 병렬로 평가해 silhouette 이 가장 높은 k 와 k 별 결과를 돌려준다."""
+    start = time.perf_counter()
+    features, encoder = load_features(data_path, use_cache=use_cache)
+    scaler = StandardScaler()
+    scaled = scaler.fit_transform(features)
+
+    k_values = list(k_values)
+    with ProcessPoolExecutor(
+        max_workers=max(1, min(workers, len(k_values))),
+        initializer=_init_worker,
+        initargs=(scaled,),
+    ) as pool:
+        futures = [
+            pool.submit(evaluate_k, k, sample_size, random_state) for k in k_values
+        ]
+        results = [future.result() for future in futures]
+
+    best = max(results, key=lambda result: result["silhouette"])
+    return {
+        "best_k": best["k"],
+        "rows": len(scaled),
+        "sample_size": min(sample_size, len(scaled)),
+        "seconds": round(time.perf_counter() - start, 3),
+        "results": results,
+        "best_model": best["model"],
+        "scaler": scaler,
+        "encoder": encoder,
+    }
+
+
+# 기존 군집 이름은 k=7 학습 결과에 붙인 것이라, 다른 k 는 검토 전까지 번호만 붙인다
+def _cluster_info_for(k: int) -> dict:
+    if k == FINAL_K:
+        return CLUSTER_INFO
+    return {
+        label: {
+            "name": f"군집 {label}",
+            "description": "k 스윕으로 새로 학습된 군집입니다. 이름과 설명을 검토해 주세요.",
+        }
+        for label in range(k)
+    }
+
+
+def report(summary: dict) -> dict:
+    return {
+        "best_k": summary["best_k"],
+        "rows": summary["rows"],
+        "sample_size": summary["sample_size"],
+        "seconds": summary["seconds"],
+        "results": [
+            {key: value for key, value in result.items() if key != "model"}
+            for result in summary["results"]
+        ],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="k 선택 스윕 (inertia + 표본 silhouette)")
+    parser.add_argument("--data", type=Path, default=DEFAULT_DATA_PATH)
+    parser.add_argument("--k-min", type=int, default=2)
+    parser.add_argument("--k-max", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4, help="프로세스 수")
+    parser.add_argument("--sample-size", type=int, default=DEFAULT_SAMPLE_SIZE)
+    parser.add_argument("--report", type=Path, help="JSON 리포트 저장 경로")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="전처리 피처 캐시를 쓰지 않음"
+    )
+    parser.add_argument(
+        "--save-best",
+        action="store_true",
+        help="가장 좋은 k 의 모델을 아티팩트로 저장 (--version 과 함께 쓰는 것을 권장)",
+    )
+    parser.add_argument("--version", help="--save-best 시 versions/<version>/ 에 저장")
+    args = parser.parse_args(argv)
+
+    summary = sweep(
+        args.data,
+        k_values=range(args.k_min, args.k_max + 1),
+        workers=args.workers,
+        sample_size=args.sample_size,
+        use_cache=not args.no_cache,
+    )
+    result = report(summary)
+
+    print(f"{'k':>3} {'inertia':>12} {'silhouette':>11} {'seconds':>8}")
+    for row in result["results"]:
+        marker = " *" if row["k"] == result["best_k"] else ""
+        print(
+            f"{row['k']:>3} {row['inertia']:>12.1f} {row['silhouette']:>11.4f} "
+            f"{row['seconds']:>8.3f}{marker}"
+        )
+    print(f"best k = {result['best_k']} ({result['seconds']}s)")
+
+    if args.report:
+        args.report.write_text(json.dumps(result, indent=2), encoding="utf-8")
+
+    if args.save_best:
+        paths = (
+            versioned_artifact_paths(args.version)
+            if args.version
+            else {
+                "model_path": base_dir / "model.pkl",
+                "scaler_path": base_dir / "scaler.pkl",
+                "columns_path": base_dir / "columns.pkl",
+                "bundle_path": base_dir / "model.bundle",
+            }
+        )
+        save_artifacts(
+            summary["best_model"],
+            summary["scaler"],
+            summary["encoder"],
+            cluster_info=_cluster_info_for(summary["best_k"]),
+            **paths,
+        )
+        print(f"Saved k={summary['best_k']} model to {paths['bundle_path'].parent}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,21 @@
+import argparse
+import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 import joblib  # 학습된 모델 같은 파이썬 객체를 파일로 저장하고 불러오는 도구
 from pathlib import Path
 
+from serving.models.analysis import CLUSTER_INFO
+from serving.models.bundle import write_bundle
+from serving.models.encoder import (
+    CATEGORICAL_FEATURES,
+    DROP_FIRST_FEATURES,
+    NUMERIC_FEATURES,
+    FeatureEncoder,
+)
+from pipelines.train.feature_cache import load_or_build
+
 # 데이터 저장 경로
 DEFAULT_DATA_PATH: Path = (
     Path(__file__).resolve().parent.parent / "data" / "shopping_trends.csv"
@@ -12,6 +24,78 @@ DEFAULT_DATA_PATH: Path = (
 # 모델 저장 경로
 base_dir: Path = Path(__file__).resolve().parent.parent / "artifacts" / "model"
 
+FEATURE_COLUMNS = [
+    "Age",
+    "Purchase Amount (USD)",
+    "Subscription Status",
+    "Frequency of Purchases",
+]
+FINAL_K = 7
+
+# 전처리된 피처 캐시 (pipelines/train/feature_cache.py)
+# preprocess 의 결과가 바뀌는 수정을 하면 PREPROCESS_VERSION 을 올린다
+FEATURE_CACHE_DIR: Path = base_dir.parent / "cache"
+PREPROCESS_VERSION = 2
+
+# 스트리밍 학습 기본값: 한 번에 메모리에 올리는 행 수 / partial_fit 한 번의 행 수
+DEFAULT_CHUNK_SIZE = 100_000
+DEFAULT_MINIBATCH_SIZE = 4096
+
+
+# 1. 원본 데이터 전처리 (원-핫 인코딩)
+# 서빙과 같은 FeatureEncoder 를 학습 데이터에 fit 해서 인코딩하고, 인코더는 번들에 함께 저장한다
+def preprocess(
+    df: pd.DataFrame, encoder: FeatureEncoder | None = None
+) -> tuple[pd.DataFrame, FeatureEncoder]:
+    if encoder is None:
+        encoder = FeatureEncoder.fit(df)
+    return encoder.encode_frame(df), encoder
+
+
+def _read_and_preprocess(data_path) -> tuple[pd.DataFrame, dict]:
+    features, encoder = preprocess(pd.read_csv(data_path, usecols=FEATURE_COLUMNS))
+    return features, {"encoder": encoder.to_dict()}
+
+
+# 같은 파일로 다시 학습/스윕할 때는 캐시된 .npy 에서 파싱 없이 읽는다
+def load_features(
+    data_path=DEFAULT_DATA_PATH, use_cache: bool = True
+) -> tuple[pd.DataFrame, FeatureEncoder]:
+    if use_cache:
+        features, meta, _ = load_or_build(
+            data_path, _read_and_preprocess, PREPROCESS_VERSION, FEATURE_CACHE_DIR
+        )
+    else:
+        features, meta = _read_and_preprocess(data_path)
+    return features, FeatureEncoder.from_dict(meta["encoder"])
+
+
+def save_artifacts(
+    model,
+    scaler,
+    encoder: FeatureEncoder,
+    model_path,
+    scaler_path,
+    columns_path,
+    bundle_path,
+    cluster_info=CLUSTER_INFO,
+):
+    original_columns = pd.Index(encoder.columns)
+    joblib.dump(original_columns, columns_path)
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, scaler_path)
+
+    # 서빙용 단일 파일 번들 (joblib 파일은 sklearn 경로/예전 버전 호환용으로 유지)
+    write_bundle(
+        bundle_path,
+        centroids=model.cluster_centers_,
+        scaler_mean=scaler.mean_,
+        scaler_scale=scaler.scale_,
+        columns=original_columns,
+        cluster_info=cluster_info,
+        encoder=encoder.to_dict(),
+    )
+
 
 # 만든 이유  시간이 오래걸리는 머신러닝 모델 학습 과정을  미리 한번 만 실행해서 그 결과를 파일로 저장하자
 def train_save_model(
@@ -19,28 +103,11 @@ def train_save_model(
     model_path=base_dir / "model.pkl",
     scaler_path=base_dir / "scaler.pkl",
     columns_path=base_dir / "columns.pkl",
+    bundle_path=base_dir / "model.bundle",
+    use_cache: bool = True,
 ):
-    df = pd.read_csv(data_path)
-
-    # 1. 원본 데이터 로드 및 전처리
-
-    df_selected = df[
-        [
-            "Age",
-            "Purchase Amount (USD)",
-            "Subscription Status",
-            "Frequency of Purchases",
-        ]
-    ]
-    df_selected = pd.get_dummies(
-        df_selected, columns=["Subscription Status"], drop_first=True
-    )
-    df_selected = pd.get_dummies(df_selected, columns=["Frequency of Purchases"])
-    df_selected_numeric = df_selected.astype(float)
-
-    original_columns = df_selected_numeric.columns
-
-    joblib.dump(original_columns, columns_path)
+    # 1. 원본 데이터 로드 및 전처리 (캐시가 있으면 캐시에서)
+    df_selected_numeric, encoder = load_features(data_path, use_cache=use_cache)
 
     # 2. 데이터 스케일링
     scaler = StandardScaler()
@@ -48,16 +115,142 @@ def train_save_model(
     df_scaled = pd.DataFrame(df_scaled, columns=df_selected_numeric.columns)
 
     # 3. k - 평균 모델 학습
-    final_k = 7
-    model = KMeans(n_clusters=final_k, random_state=0, n_init="auto")
+    model = KMeans(n_clusters=FINAL_K, random_state=0, n_init="auto")
     model.fit(df_scaled)
 
-    # 4. 모델과 스케일러 저장
-    joblib.dump(model, model_path)
-    joblib.dump(scaler, scaler_path)
+    # 4. 모델, 스케일러, 컬럼, 번들 저장
+    save_artifacts(
+        model,
+        scaler,
+        encoder,
+        model_path,
+        scaler_path,
+        columns_path,
+        bundle_path,
+    )
 
     print("Model and scaler saved successfully!")
 
 
+def _read_chunks(data_path, chunk_size: int):
+    return pd.read_csv(data_path, usecols=FEATURE_COLUMNS, chunksize=chunk_size)
+
+
+# 전체 데이터의 범주값으로 인코더를 만든다 (첫 번째 패스)
+# 청크마다 fit 하면 청크에 있는 값만 컬럼이 되고 drop_first 도 청크마다 다른 값을
+# 떨어뜨리므로, 전체 범주 목록으로 만든 인코더 하나로 모든 청크를 인코딩한다
+def _streaming_encoder(data_path, chunk_size: int) -> FeatureEncoder:
+    categories = {feature: set() for feature in CATEGORICAL_FEATURES}
+    for chunk in _read_chunks(data_path, chunk_size):
+        for feature, seen in categories.items():
+            seen.update(chunk[feature].dropna().unique())
+    return FeatureEncoder(
+        NUMERIC_FEATURES,
+        {feature: sorted(values) for feature, values in categories.items()},
+        DROP_FIRST_FEATURES,
+    )
+
+
+def train_save_model_streaming(
+    data_path=DEFAULT_DATA_PATH,
+    model_path=base_dir / "model.pkl",
+    scaler_path=base_dir / "scaler.pkl",
+    columns_path=base_dir / "columns.pkl",
+    bundle_path=base_dir / "model.bundle",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    batch_size: int = DEFAULT_MINIBATCH_SIZE,
+    epochs: int = 3,
+    random_state: int = 0,
+):
+    """메모리에 다 올라가지 않는 CSV 용 학습. 최대 메모리 사용량은 chunk_size 에 비례한다.
+
+    1) 범주값 수집 -> 컬럼 확정, 2) StandardScaler.partial_fit 으로 평균/분산 누적,
+    3) 청크를 섞어 batch_size 씩 MiniBatchKMeans.partial_fit (epochs 번 반복).
+    결과물은 train_save_model 과 같은 아티팩트 파일이다.
+    """
+    rng = np.random.default_rng(random_state)
+
+    encoder = _streaming_encoder(data_path, chunk_size)
+
+    scaler = StandardScaler()
+    for chunk in _read_chunks(data_path, chunk_size):
+        scaler.partial_fit(encoder.encode_frame(chunk))
+
+    model = MiniBatchKMeans(
+        n_clusters=FINAL_K,
+        random_state=random_state,
+        batch_size=batch_size,
+        n_init="auto",
+    )
+    for _ in range(epochs):
+        for chunk in _read_chunks(data_path, chunk_size):
+            scaled = pd.DataFrame(
+                scaler.transform(encoder.encode_frame(chunk)),
+                columns=encoder.columns,
+            )
+            # 파일이 날짜 등으로 정렬되어 있어도 미니배치가 치우치지 않도록 청크 안에서 섞는다
+            scaled = scaled.iloc[rng.permutation(len(scaled))]
+            # 첫 호출은 청크 전체로 중심점을 초기화하고, 이후는 batch_size 씩 갱신
+            if not hasattr(model, "cluster_centers_"):
+                model.partial_fit(scaled)
+                continue
+            for start in range(0, len(scaled), batch_size):
+                model.partial_fit(scaled.iloc[start : start + batch_size])
+
+    save_artifacts(
+        model,
+        scaler,
+        encoder,
+        model_path,
+        scaler_path,
+        columns_path,
+        bundle_path,
+    )
+
+    print("Model and scaler saved successfully! (streaming)")
+
+
+# 서빙 중인 모델을 재시작 없이 바꾸려면 versions/<version>/ 아래에 새 버전을 학습해 둔다
+# (serving/models/registry.py 가 이름순으로 가장 마지막 버전을 활성 모델로 사용)
+def versioned_artifact_paths(version: str) -> dict[str, Path]:
+    version_dir = base_dir / "versions" / version
+    version_dir.mkdir(parents=True, exist_ok=True)
+    return {
+        "model_path": version_dir / "model.pkl",
+        "scaler_path": version_dir / "scaler.pkl",
+        "columns_path": version_dir / "columns.pkl",
+        "bundle_path": version_dir / "model.bundle",
+    }
+
+
 if __name__ == "__main__":
-    train_save_model()
+    parser = argparse.ArgumentParser(description="고객 군집 모델 학습")
+    parser.add_argument(
+        "--version",
+        help="지정하면 artifacts/model/versions/<version>/ 에 저장 (예: 20261018-1)",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="CSV 를 청크로 읽어 MiniBatchKMeans 로 학습 (메모리에 다 안 올라가는 데이터용)",
+    )
+    parser.add_argument("--data", type=Path, default=DEFAULT_DATA_PATH)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_MINIBATCH_SIZE)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument(
+        "--no-cache", action="store_true", help="전처리 피처 캐시를 쓰지 않음"
+    )
+    args = parser.parse_args()
+
+    paths = versioned_artifact_paths(args.version) if args.version else {}
+    if args.streaming:
+        train_save_model_streaming(
+            data_path=args.data,
+            chunk_size=args.chunk_size,
+            batch_size=args.batch_size,
+            epochs=args.epochs,
+            **paths,
+        )
+    else:
+        train_save_model(data_path=args.data, use_cache=not args.no_cache, **paths)
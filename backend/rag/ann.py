@@ -0,0 +1,416 @@
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+import structlog
+from sklearn.cluster import MiniBatchKMeans
+
+from rag.persona_cache import PersonaMatrix
+from rag.ranking import top_k_indices
+
+# 페르소나가 수십만 개일 때 쓰는 근사 최근접 이웃(ANN) 인덱스 (IVF)
+#
+# 정규화된 임베딩을 k-평균으로 nlist 개 목록(셀)에 나눠 두고, 질의는 중심점과 가장 가까운
+# nprobe 개 목록 안에서만 정확한 코사인 점수를 낸다. 비용은 n 대신 약 n * nprobe / nlist.
+# - 인덱스는 페르소나 키(upsert 충돌 키인 cluster_name)로 항목을 관리해 추가/변경/삭제를
+#   목록 단위로 반영하고(재학습 없음), 학습 때보다 REBUILD_GROWTH 배 이상 커지면 다시 학습한다.
+# - 디스크(.npz)에 저장해 재시작 때 학습 없이 읽고, 페르소나 캐시가 새로 읽힐 때마다
+#   바뀐 키만 반영한다 (PersonaIndex.sync).
+# - 공개된(검색이 볼 수 있는) IVFIndex 는 고치지 않는다. 갱신은 사본(copy)에 하고 참조 하나를
+#   바꿔 공개하므로 검색은 락 없이 읽는다.
+# - 학습(k-평균)은 요청 경로를 막지 않도록 백그라운드 스레드에서 하고, 그동안은 이전 인덱스나
+#   정확 검색을 쓴다.
+
+log = structlog.get_logger()
+
+INDEX_FORMAT_VERSION = 1
+TRAIN_SAMPLE_SIZE = 50_000
+MAX_NLIST = 4096
+# 학습 때보다 이 배수 이상 커지면 목록이 한쪽으로 쏠리므로 중심점을 다시 학습한다
+REBUILD_GROWTH = 4.0
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def default_nlist(n: int) -> int:
+    return int(min(MAX_NLIST, max(1, round(np.sqrt(n)))))
+
+
+class IVFIndex:
+    """역파일(IVF) 인덱스. 목록마다 (키 리스트, float32 단위 벡터 행렬)을 들고 있다."""
+
+    def __init__(self, centroids: np.ndarray, trained_size: int):
+        self.centroids = _normalize(centroids)
+        self.dim = self.centroids.shape[1]
+        self.trained_size = trained_size
+        nlist = len(self.centroids)
+        self._keys: list[list[str]] = [[] for _ in range(nlist)]
+        self._vectors: list[np.ndarray] = [
+            np.zeros((0, self.dim), dtype=np.float32) for _ in range(nlist)
+        ]
+        # 키 -> 목록 번호
+        self._where: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def train(
+        cls, vectors: np.ndarray, nlist: int | None = None, random_state: int = 0
+    ) -> "IVFIndex":
+        vectors = _normalize(vectors)
+        nlist = min(nlist or default_nlist(len(vectors)), len(vectors))
+        rng = np.random.default_rng(random_state)
+        sample = vectors
+        if len(vectors) > TRAIN_SAMPLE_SIZE:
+            sample = vectors[rng.choice(len(vectors), TRAIN_SAMPLE_SIZE, replace=False)]
+        kmeans = MiniBatchKMeans(
+            n_clusters=nlist, random_state=random_state, n_init="auto", batch_size=4096
+        )
+        kmeans.fit(sample)
+        return cls(kmeans.cluster_centers_, trained_size=len(vectors))
+
+    @classmethod
+    def build(
+        cls,
+        keys: list[str],
+        vectors: np.ndarray,
+        nlist: int | None = None,
+        random_state: int = 0,
+    ) -> "IVFIndex":
+        index = cls.train(vectors, nlist=nlist, random_state=random_state)
+        index.add(keys, vectors)
+        return index
+
+    def copy(self) -> "IVFIndex":
+        """갱신용 사본. 목록 배열은 바꾸지 않고 새로 만들어 넣으므로 참조만 복사한다."""
+        index = IVFIndex(self.centroids, self.trained_size)
+        index._keys = [list(keys) for keys in self._keys]
+        index._vectors = list(self._vectors)
+        index._where = dict(self._where)
+        return index
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self.centroids.T, axis=1)
+
+    def remove(self, keys: Iterable[str]):
+        by_list: dict[int, set[str]] = {}
+        for key in keys:
+            list_id = self._where.pop(key, None)
+            if list_id is not None:
+                by_list.setdefault(list_id, set()).add(key)
+        for list_id, removed in by_list.items():
+            kept = [
+                pos for pos, key in enumerate(self._keys[list_id]) if key not in removed
+            ]
+            self._keys[list_id] = [self._keys[list_id][pos] for pos in kept]
+            self._vectors[list_id] = self._vectors[list_id][kept]
+
+    def add(self, keys: list[str], vectors: np.ndarray):
+        """키가 이미 있으면 교체한다. 목록마다 한 번만 이어 붙여 배치 갱신 비용을 줄인다."""
+        if not len(keys):
+            return
+        vectors = _normalize(vectors)
+        self.remove(keys)
+        assigned = self._assign(vectors)
+        for list_id in np.unique(assigned):
+            rows = np.flatnonzero(assigned == list_id)
+            self._keys[list_id].extend(keys[row] for row in rows)
+            self._vectors[list_id] = np.concatenate(
+                [self._vectors[list_id], vectors[rows]]
+            )
+            for row in rows:
+                self._where[keys[row]] = int(list_id)
+
+    def vectors_for(self, keys: list[str]) -> np.ndarray:
+        """저장된 (정규화된) 벡터. 없는 키는 NaN 행."""
+        positions = {
+            list_id: {key: pos for pos, key in enumerate(self._keys[list_id])}
+            for list_id in {self._where[key] for key in keys if key in self._where}
+        }
+        result = np.full((len(keys), self.dim), np.nan, dtype=np.float32)
+        for row, key in enumerate(keys):
+            list_id = self._where.get(key)
+            if list_id is not None:
+                result[row] = self._vectors[list_id][positions[list_id][key]]
+        return result
+
+    def search(
+        self, query_embedding: Iterable[float], top_k: int, nprobe: int = 8
+    ) -> list[tuple[str, float]]:
+        query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+        if not np.any(query) or not len(self):
+            return []
+        probe = top_k_indices(self.centroids @ query, nprobe)
+        keys: list[str] = []
+        scores = []
+        for list_id in probe:
+            if self._keys[list_id]:
+                keys.extend(self._keys[list_id])
+                scores.append(self._vectors[list_id] @ query)
+        if not scores:
+            return []
+        scores = np.concatenate(scores)
+        return [(keys[idx], float(scores[idx])) for idx in top_k_indices(scores, top_k)]
+
+    def needs_rebuild(self) -> bool:
+        return len(self) > REBUILD_GROWTH * max(self.trained_size, self.nlist)
+
+    def nbytes(self) -> int:
+        return self.centroids.nbytes + sum(vectors.nbytes for vectors in self._vectors)
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        list_ids = np.concatenate(
+            [
+                np.full(len(keys), idx, dtype=np.int32)
+                for idx, keys in enumerate(self._keys)
+            ]
+        )
+        keys = [key for keys in self._keys for key in keys]
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                version=np.int32(INDEX_FORMAT_VERSION),
+                centroids=self.centroids,
+                trained_size=np.int64(self.trained_size),
+                list_ids=list_ids,
+                keys=np.array(keys, dtype=str),
+                vectors=np.concatenate(self._vectors),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "IVFIndex":
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != INDEX_FORMAT_VERSION:
+                raise ValueError(
+                    f"Unsupported ANN index format: {int(data['version'])}"
+                )
+            index = cls(data["centroids"], trained_size=int(data["trained_size"]))
+            list_ids = data["list_ids"]
+            keys = data["keys"].tolist()
+            vectors = data["vectors"]
+        # 저장할 때 목록 순서로 이어 붙였으므로 목록마다 연속 구간이다
+        bounds = np.searchsorted(list_ids, np.arange(index.nlist + 1))
+        for list_id in range(index.nlist):
+            start, stop = bounds[list_id], bounds[list_id + 1]
+            index._keys[list_id] = keys[start:stop]
+            index._vectors[list_id] = vectors[start:stop]
+            for key in index._keys[list_id]:
+                index._where[key] = list_id
+        return index
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """matrix 에 맞춘 인덱스와 키 -> matrix 행 번호. 공개된 뒤에는 바뀌지 않는다."""
+
+    matrix: PersonaMatrix
+    index: IVFIndex
+    key_rows: dict[str, int]
+
+
+def _live(matrix: PersonaMatrix, key_column: str) -> tuple[list[str], np.ndarray]:
+    keys = [str(meta[key_column]) for meta in matrix.metadata]
+    usable = ~matrix.zero_rows
+    return [key for key, ok in zip(keys, usable) if ok], matrix.embeddings[usable]
+
+
+class PersonaIndex:
+    """페르소나 캐시(PersonaMatrix)와 디스크의 IVF 인덱스를 맞춰 두고 검색한다.
+
+    sync() 는 행렬이 바뀌었을 때(캐시가 새로 읽혔을 때)만 키 단위로 차이를 사본에 반영해
+    새 IndexSnapshot 을 공개하고, 바뀐 것이 있으면 디스크에 저장한다.
+    인덱스가 없거나 다시 학습해야 하면 background 일 때 스레드에서 학습하고, 끝날 때까지는
+    이전 인덱스(없으면 None -> 호출한 쪽이 정확 검색)를 쓴다.
+    """
+
+    def __init__(
+        self,
+        path: Path | None,
+        key_column: str = "cluster_name",
+        nlist: int | None = None,
+        background: bool = True,
+    ):
+        self.path = Path(path) if path else None
+        self.key_column = key_column
+        self.nlist = nlist
+        self.background = background
+        # 마지막으로 공개한 인덱스 (upsert 도 여기에 반영한다)
+        self.index: IVFIndex | None = None
+        self.rebuilds = 0
+        self.updates = 0
+        self._snapshot: IndexSnapshot | None = None
+        # sync 에 들어온 가장 최근 행렬 (백그라운드 학습이 끝나면 여기에 맞춘다)
+        self._latest: PersonaMatrix | None = None
+        self._builder: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _load(self, dim: int) -> IVFIndex | None:
+        if self.index is not None or self.path is None or not self.path.exists():
+            return self.index
+        try:
+            index = IVFIndex.load(self.path)
+        except (OSError, ValueError, KeyError) as exc:
+            log.warning("ann_index_load_failed", path=str(self.path), error=str(exc))
+            return None
+        return index if index.dim == dim else None
+
+    def _reconcile(
+        self, index: IVFIndex, matrix: PersonaMatrix
+    ) -> tuple[IVFIndex, bool]:
+        """matrix 와 다른 키만 사본에 반영한다. 바뀐 것이 없으면 index 를 그대로 돌려준다."""
+        live_keys, live_vectors = _live(matrix, self.key_column)
+        live = set(live_keys)
+        removed = [key for key in index._where if key not in live]
+        stored = index.vectors_for(live_keys)
+        # 새 키(NaN 행)이거나 벡터가 바뀐 행만 다시 넣는다
+        dirty = ~np.all(np.abs(stored - live_vectors) <= 1e-6, axis=1)
+        rows = np.flatnonzero(dirty)
+        if not removed and not len(rows):
+            return index, False
+        updated = index.copy()
+        updated.remove(removed)
+        updated.add([live_keys[row] for row in rows], live_vectors[rows])
+        return updated, True
+
+    def _publish(
+        self, index: IVFIndex, matrix: PersonaMatrix, changed: bool
+    ) -> IndexSnapshot:
+        # 락 안에서 부른다. 검색은 이전 스냅샷을 계속 쓸 수 있다
+        self.index = index
+        if changed and self.path is not None:
+            index.save(self.path)
+        keys = [str(meta[self.key_column]) for meta in matrix.metadata]
+        key_rows = {key: row for row, key in enumerate(keys)}
+        snapshot = IndexSnapshot(matrix, index, key_rows)
+        self._snapshot = snapshot
+        return snapshot
+
+    def _build(self, matrix: PersonaMatrix) -> IVFIndex:
+        live_keys, live_vectors = _live(matrix, self.key_column)
+        return IVFIndex.build(live_keys, live_vectors, nlist=self.nlist)
+
+    def _start_build(self, matrix: PersonaMatrix):
+        if self._builder is not None and self._builder.is_alive():
+            return
+        self._builder = threading.Thread(
+            target=self._build_in_background,
+            args=(matrix,),
+            name="ann-index-build",
+            daemon=True,
+        )
+        self._builder.start()
+
+    def _build_in_background(self, matrix: PersonaMatrix):
+        try:
+            index = self._build(matrix)
+        except Exception as exc:
+            log.warning("ann_index_build_failed", error=str(exc))
+            return
+        with self._lock:
+            # 학습하는 동안 캐시가 새로 읽혔으면 그 행렬과의 차이까지 반영해 공개한다
+            latest = self._latest or matrix
+            if latest is not matrix:
+                index, _ = self._reconcile(index, latest)
+            self.rebuilds += 1
+            self._publish(index, latest, changed=True)
+        log.info("ann_index_built", size=len(index), nlist=index.nlist)
+
+    def wait(self, timeout: float | None = None):
+        """진행 중인 백그라운드 학습을 기다린다 (테스트, 오프라인 작업용)."""
+        builder = self._builder
+        if builder is not None:
+            builder.join(timeout)
+
+    def sync(self, matrix: PersonaMatrix) -> IndexSnapshot | None:
+        """matrix 에 맞춘 스냅샷. 아직 쓸 인덱스가 없으면 None."""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.matrix is matrix:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.matrix is matrix:
+                return snapshot
+            # 다른 스레드가 이미 더 새 행렬에 맞췄으면 이전 행렬로 되돌리지 않는다
+            if snapshot is not None and matrix.loaded_at < snapshot.matrix.loaded_at:
+                return None
+            self._latest = matrix
+
+            index = self._load(matrix.embeddings.shape[1])
+            if index is None:
+                if self.background:
+                    self._start_build(matrix)
+                    return None
+                self.rebuilds += 1
+                return self._publish(self._build(matrix), matrix, changed=True)
+
+            index, changed = self._reconcile(index, matrix)
+            if changed:
+                self.updates += 1
+            if index.needs_rebuild():
+                if not self.background:
+                    self.rebuilds += 1
+                    return self._publish(self._build(matrix), matrix, changed=True)
+                self._start_build(matrix)
+            return self._publish(index, matrix, changed)
+
+    def upsert(self, rows: list[dict[str, Any]], embedding_column: str = "embedding"):
+        """rag/store.py 의 upsert 직후 같은 행을 인덱스에 바로 반영하고 저장한다."""
+        matrix = PersonaMatrix.from_rows(rows, embedding_column)
+        if not len(matrix):
+            return
+        with self._lock:
+            index = self.index or self._load(matrix.embeddings.shape[1])
+            if index is None:
+                # 전체 페르소나를 모르므로 새로 만들지는 않는다 (다음 sync 때 만든다)
+                return
+            keys, vectors = _live(matrix, self.key_column)
+            updated = index.copy()
+            updated.add(keys, vectors)
+            self.index = updated
+            # 다음 sync 가 새 인덱스에서 다시 맞춘다 (진행 중인 검색은 이전 스냅샷을 쓴다)
+            self._snapshot = None
+            if self.path is not None:
+                updated.save(self.path)
+
+    def search(
+        self, matrix: PersonaMatrix, query_embedding, top_k: int, nprobe: int
+    ) -> list[dict[str, Any]] | None:
+        """인덱스가 아직 없으면(학습 중) None. 호출한 쪽이 정확 검색을 한다."""
+        snapshot = self.sync(matrix)
+        if snapshot is None:
+            return None
+        key_rows = snapshot.key_rows
+        return [
+            {**snapshot.matrix.metadata[key_rows[key]], "score": score}
+            for key, score in snapshot.index.search(query_embedding, top_k, nprobe)
+            if key in key_rows
+        ]
+
+    def stats(self) -> dict[str, Any]:
+        index = self.index
+        builder = self._builder
+        return {
+            "size": len(index) if index is not None else None,
+            "nlist": index.nlist if index is not None else None,
+            "bytes": index.nbytes() if index is not None else None,
+            "rebuilds": self.rebuilds,
+            "updates": self.updates,
+            "building": builder is not None and builder.is_alive(),
+            "path": str(self.path) if self.path else None,
+        }
@@ -0,0 +1,183 @@
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+import structlog
+
+# 쿼리 임베딩 2단 캐시
+#
+# 키는 (임베딩 모델 이름, 정규화한 텍스트의 sha256). 프로필은 종류가 많지 않아
+# build_query_text 가 만드는 텍스트가 계속 반복되므로 대부분의 조회가 네트워크 없이 끝난다.
+# - 1단: 프로세스 메모리의 LRU. 벡터 바이트 합이 max_bytes 를 넘으면 오래된 것부터 뺀다.
+# - 2단: SQLite 파일 (WAL). 재시작 후에도 남고, 같은 파일을 여러 워커 프로세스가 함께 쓴다.
+# 벡터는 float32 로 보관하고, 처음 임베딩한 요청도 캐시에 넣은 값을 돌려줘 항상 같은 값을 쓴다.
+
+log = structlog.get_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_embeddings (
+    model TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (model, text_hash)
+)
+"""
+
+
+def normalize_text(text: str) -> str:
+    # 유니코드 정규화 + 공백 정리 (줄바꿈/연속 공백 차이는 같은 질의로 본다)
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def text_key(model: str, text: str) -> tuple[str, str]:
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return model, digest
+
+
+class EmbeddingCache:
+    """메모리 LRU + (선택) SQLite 디스크 캐시. 디스크 오류는 경고만 남기고 미스로 처리한다."""
+
+    def __init__(self, path: Path | None = None, max_bytes: int = 64 * 1024 * 1024):
+        self.path = Path(path) if path else None
+        self.max_bytes = max_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_errors = 0
+        self._entries: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # sqlite3 연결은 스레드 사이에 공유하지 않는다 (rag 실행기 스레드마다 하나)
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, key: tuple[str, str], vector: np.ndarray):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = vector
+            self._bytes += vector.nbytes
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def _read_disk(self, key: tuple[str, str]) -> np.ndarray | None:
+        try:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT dim, vector FROM query_embeddings"
+                    " WHERE model = ? AND text_hash = ?",
+                    key,
+                )
+                .fetchone()
+            )
+        except sqlite3.Error as exc:
+            self.disk_errors += 1
+            log.warning("query_embedding_cache_read_failed", error=str(exc))
+            return None
+        if row is None:
+            return None
+        dim, blob = row
+        vector = np.frombuffer(blob, dtype=np.float32)
+        return vector if len(vector) == dim else None
+
+    def _write_disk(self, key: tuple[str, str], vector: np.ndarray):
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO query_embeddings"
+                    " (model, text_hash, dim, vector, created_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (*key, len(vector), vector.tobytes(), time.time()),
+                )
+        except sqlite3.Error as exc:
+            self.disk_errors += 1
+            log.warning("query_embedding_cache_write_failed", error=str(exc))
+
+    def get(self, model: str, text: str) -> np.ndarray | None:
+        vector = self.get_memory(model, text)
+        if vector is None:
+            vector = self.get_disk(model, text)
+        return vector
+
+    # 비동기 경로(retriever.aembed_query)는 메모리 단만 이벤트 루프에서 보고,
+    # SQLite 를 읽고 쓰는 get_disk / write_disk 는 스레드에서 부른다
+    def get_memory(self, model: str, text: str) -> np.ndarray | None:
+        key = text_key(model, text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+            return vector
+
+    def get_disk(self, model: str, text: str) -> np.ndarray | None:
+        key = text_key(model, text)
+        vector = self._read_disk(key) if self.path else None
+        if vector is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self._remember(key, vector)
+        return vector
+
+    def remember(self, model: str, text: str, values: Iterable[float]) -> np.ndarray:
+        """메모리 단에만 넣고, 캐시에 들어간(float32, 읽기 전용) 벡터를 돌려준다."""
+        vector = np.array(values, dtype=np.float32)
+        vector.flags.writeable = False
+        self._remember(text_key(model, text), vector)
+        return vector
+
+    def write_disk(self, model: str, text: str, vector: np.ndarray):
+        if self.path:
+            self._write_disk(text_key(model, text), vector)
+
+    def put(self, model: str, text: str, values: Iterable[float]) -> np.ndarray:
+        """벡터를 두 단에 모두 넣고, 캐시에 들어간(float32, 읽기 전용) 벡터를 돌려준다."""
+        vector = self.remember(model, text, values)
+        self.write_disk(model, text, vector)
+        return vector
+
+    def clear_memory(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "disk": str(self.path) if self.path else None,
+            "disk_errors": self.disk_errors,
+        }
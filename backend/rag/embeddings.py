@@ -1,6 +1,7 @@
-from langchain_openai import OpenAIEmbeddings
 from langchain_core.documents import Document
 
+from rag.providers import configured_embedding_provider
+
 
 json_data = {
     0: {
@@ -34,8 +35,8 @@ json_data = {
 }
 
 
-# docs : 페르소나 하나하나를 담은 Document  객체 리스트
-def run_embedding_task():
+# docs : 페르소나 하나하나를 담은 Document  객체 리스트 (임베딩 전)
+def build_persona_documents():
     docs = []
 
     for key, profile in json_data.items():
@@ -48,9 +49,15 @@ def run_embedding_task():
         docs.append(
             Document(page_content=content, metadata={"segment_id": key, **profile})
         )
+    return docs
+
+
+def run_embedding_task():
+    docs = build_persona_documents()
 
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-    vectors = embeddings.embed_documents([doc.page_content for doc in docs])
+    # 검색과 같은 임베딩 제공자(RAG_EMBEDDING_PROVIDER)로 임베딩해야 유사도가 의미 있다
+    provider = configured_embedding_provider()
+    vectors = provider.embed_documents([doc.page_content for doc in docs])
 
     return docs, vectors
 
@@ -0,0 +1,310 @@
+import asyncio
+import dataclasses
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, Sequence
+
+import numpy as np
+
+from rag.quantization import DEFAULT_OVERSAMPLE, QuantizedMatrix, spill_to_disk
+from rag.ranking import top_k_indices
+
+# 페르소나 임베딩 행렬의 프로세스 내 캐시
+#
+# Supabase 에서 받은 페르소나 행을 한 번만 float32 (n, dim) 행렬로 쌓고 행마다 L2 정규화해 둔다.
+# 그러면 질의 하나는 "쿼리 임베딩 1회 + 행렬-벡터 곱 1회"로 끝난다.
+# ttl 초가 지나거나 invalidate() 가 불리면(rag/store.py 의 upsert 후) 다음 조회 때 다시 읽는다.
+# 비동기 경로(aget)는 async_loader 로 행을 받고, 행렬을 쌓는 CPU 작업만 스레드에서 한다.
+
+# search_many 가 한 번에 만드는 (쿼리 수, 페르소나 수) 점수 행렬의 최대 원소 수 (float32 64MB)
+MAX_BATCH_SCORES = 16 * 1024 * 1024
+
+
+def _parse_embedding(value) -> Iterable[float]:
+    # pgvector 컬럼은 "[0.1,0.2,...]" 문자열로 오고, 배열/JSON 컬럼은 리스트로 온다
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+@dataclass(frozen=True)
+class PersonaMatrix:
+    """정규화된 임베딩 행렬과 같은 순서의 페르소나 메타데이터 (임베딩 컬럼 제외)."""
+
+    embeddings: np.ndarray  # (n, dim), 행마다 단위 벡터 (길이 0 인 행은 0 벡터)
+    metadata: list[dict[str, Any]]
+    # 길이 0 인 임베딩 행. cosine_similarity 와 같이 점수를 -1 로 둔다
+    zero_rows: np.ndarray
+    loaded_at: float
+    # 있으면 search 가 양자화 행렬로 후보를 고르고 embeddings 로 다시 점수를 낸다
+    quantized: QuantizedMatrix | None = None
+
+    def __len__(self) -> int:
+        return len(self.metadata)
+
+    @property
+    def candidate_nbytes(self) -> int:
+        """1차 점수 계산에 쓰는(메모리에 상주하는) 행렬 크기."""
+        if self.quantized is not None:
+            return self.quantized.nbytes
+        return self.embeddings.nbytes
+
+    def quantize(
+        self, kind: str, oversample: int = DEFAULT_OVERSAMPLE, spill: bool = True
+    ) -> "PersonaMatrix":
+        """kind("float16" | "int8") 로 양자화한 후보 행렬을 붙인 사본. "none" 이면 그대로.
+
+        spill 이면 원래 정밀도 행렬은 임시 파일 memmap 으로 옮겨 후보 행만 읽는다.
+        """
+        if kind == "none" or not len(self):
+            return self
+        quantized = QuantizedMatrix.from_embeddings(self.embeddings, kind, oversample)
+        embeddings = spill_to_disk(self.embeddings) if spill else self.embeddings
+        return dataclasses.replace(self, embeddings=embeddings, quantized=quantized)
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[dict[str, Any]],
+        embedding_column: str = "embedding",
+        dtype=np.float32,
+    ) -> "PersonaMatrix":
+        vectors = []
+        metadata = []
+        for row in rows:
+            embedding = row.get(embedding_column)
+            # 임베딩이 없는 행은 rank_personas 와 같이 후보에서 뺀다
+            if embedding is None or len(embedding) == 0:
+                continue
+            vectors.append(_parse_embedding(embedding))
+            metadata.append(
+                {key: value for key, value in row.items() if key != embedding_column}
+            )
+
+        if not vectors:
+            embeddings = np.zeros((0, 0), dtype=dtype)
+        else:
+            # 행마다 배열을 만들어 쌓는 것보다 한 번에 변환하는 편이 빠르다
+            try:
+                embeddings = np.array(vectors, dtype=dtype)
+            except ValueError:
+                embeddings = None
+            if embeddings is None or embeddings.ndim != 2:
+                raise ValueError("Persona embeddings have different dimensions.")
+
+        norms = np.linalg.norm(embeddings, axis=1)
+        zero_rows = norms == 0
+        embeddings[~zero_rows] /= norms[~zero_rows, None]
+        return cls(embeddings, metadata, zero_rows, time.monotonic())
+
+    def scores(self, query_embedding: Iterable[float]) -> np.ndarray:
+        """모든 페르소나와의 코사인 유사도 (n,). 쿼리도 여기서 한 번만 정규화한다."""
+        query = np.asarray(query_embedding, dtype=self.embeddings.dtype)
+        norm = np.linalg.norm(query)
+        if norm == 0 or len(self) == 0:
+            return np.full(len(self), -1.0, dtype=self.embeddings.dtype)
+        scores = self.embeddings @ (query / norm)
+        scores[self.zero_rows] = -1.0
+        return scores
+
+    def _unit_query(self, query_embedding: Iterable[float]) -> np.ndarray | None:
+        query = np.asarray(query_embedding, dtype=self.embeddings.dtype)
+        norm = np.linalg.norm(query)
+        return None if norm == 0 else query / norm
+
+    def search(
+        self, query_embedding: Iterable[float], top_k: int
+    ) -> list[dict[str, Any]]:
+        query = self._unit_query(query_embedding) if self.quantized else None
+        if query is None:
+            return self._matches(self.scores(query_embedding), top_k)
+        return self._rescore(self.quantized.scores(query[None, :])[0], query, top_k)
+
+    def _rescore(
+        self, approx: np.ndarray, query: np.ndarray, top_k: int
+    ) -> list[dict[str, Any]]:
+        """양자화 점수 상위 후보만 원래 정밀도로 다시 계산해 top_k 를 고른다."""
+        approx[self.zero_rows] = -1.0
+        # 인덱스 순으로 읽어야 memmap 을 앞에서부터 읽고, 동점 순서도 정확 검색과 같다
+        candidates = np.sort(top_k_indices(approx, self.quantized.candidates(top_k)))
+        scores = self.embeddings[candidates] @ query
+        scores[self.zero_rows[candidates]] = -1.0
+        return [
+            {**self.metadata[candidates[idx]], "score": float(scores[idx])}
+            for idx in top_k_indices(scores, top_k)
+        ]
+
+    def _matches(self, scores: np.ndarray, top_k: int) -> list[dict[str, Any]]:
+        return [
+            {**self.metadata[idx], "score": float(scores[idx])}
+            for idx in top_k_indices(scores, top_k)
+        ]
+
+    def scores_many(self, query_embeddings: np.ndarray) -> np.ndarray:
+        """쿼리 (m, dim) 와 모든 페르소나의 코사인 유사도 (m, n). 행렬-행렬 곱 한 번."""
+        queries = np.asarray(query_embeddings, dtype=self.embeddings.dtype)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        scores = (queries / np.where(norms == 0, 1.0, norms)) @ self.embeddings.T
+        scores[:, self.zero_rows] = -1.0
+        scores[norms[:, 0] == 0] = -1.0
+        return scores
+
+    def search_many(
+        self,
+        query_embeddings: np.ndarray,
+        top_ks: Sequence[int],
+        max_scores: int = MAX_BATCH_SCORES,
+    ) -> list[list[dict[str, Any]]]:
+        """쿼리마다 search 와 같은 결과. 점수 행렬이 max_scores 를 넘지 않게 나눠 곱한다."""
+        chunk = max(1, max_scores // max(len(self), 1))
+        results: list[list[dict[str, Any]]] = []
+        for start in range(0, len(query_embeddings), chunk):
+            queries = query_embeddings[start : start + chunk]
+            top_k_chunk = top_ks[start : start + chunk]
+            if self.quantized is None:
+                for row, top_k in zip(self.scores_many(queries), top_k_chunk):
+                    results.append(self._matches(row, top_k))
+                continue
+            units = [self._unit_query(query) for query in queries]
+            zero = np.zeros(self.embeddings.shape[1], dtype=self.embeddings.dtype)
+            approx = self.quantized.scores(
+                np.stack([zero if unit is None else unit for unit in units])
+            )
+            for row, unit, query, top_k in zip(approx, units, queries, top_k_chunk):
+                if unit is None:
+                    results.append(self.search(query, top_k))
+                else:
+                    results.append(self._rescore(row, unit, top_k))
+        return results
+
+
+class PersonaCache:
+    """loader() 가 돌려주는 페르소나 행을 PersonaMatrix 로 만들어 ttl 초 동안 재사용한다.
+
+    여러 스레드(rag 실행기)가 동시에 만료된 캐시를 보더라도 loader 는 한 번만 불린다.
+    aget() 도 같은 이벤트 루프의 코루틴끼리는 async_loader 를 한 번만 부른다.
+    ttl 이 0 이하면 캐시하지 않고 매번 읽는다.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], list[dict[str, Any]]],
+        ttl: float,
+        embedding_column: str = "embedding",
+        quantization: str = "none",
+        oversample: int = DEFAULT_OVERSAMPLE,
+        spill: bool = True,
+        async_loader: Callable[[], Awaitable[list[dict[str, Any]]]] | None = None,
+    ):
+        self.loader = loader
+        self.async_loader = async_loader
+        self.ttl = ttl
+        self.embedding_column = embedding_column
+        self.quantization = quantization
+        self.oversample = oversample
+        self.spill = spill
+        self.hits = 0
+        self.loads = 0
+        self.invalidations = 0
+        self._matrix: PersonaMatrix | None = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        # aget() 이 진행 중인 로드 (같은 루프의 다른 코루틴은 이것을 기다린다)
+        self._pending: asyncio.Task | None = None
+
+    def _fresh(self, matrix: PersonaMatrix | None) -> bool:
+        return matrix is not None and time.monotonic() - matrix.loaded_at < self.ttl
+
+    def _build(self, rows: list[dict[str, Any]]) -> PersonaMatrix:
+        matrix = PersonaMatrix.from_rows(rows, self.embedding_column)
+        return matrix.quantize(self.quantization, self.oversample, self.spill)
+
+    def _load(self) -> PersonaMatrix:
+        return self._build(self.loader())
+
+    def get(self) -> PersonaMatrix:
+        if self.ttl <= 0:
+            self.loads += 1
+            return self._load()
+
+        matrix = self._matrix
+        if self._fresh(matrix):
+            self.hits += 1
+            return matrix
+
+        with self._lock:
+            # 락을 기다리는 동안 다른 스레드가 이미 다시 읽었을 수 있다
+            matrix = self._matrix
+            if self._fresh(matrix):
+                self.hits += 1
+                return matrix
+            generation = self._generation
+            matrix = self._load()
+            self.loads += 1
+            # 읽는 도중 invalidate() 가 불렸으면 이번 결과는 돌려주기만 하고 보관하지 않는다
+            if generation == self._generation:
+                self._matrix = matrix
+            return matrix
+
+    async def _aload(self) -> PersonaMatrix:
+        rows = await self.async_loader()
+        return await asyncio.to_thread(self._build, rows)
+
+    async def _aload_and_keep(self) -> PersonaMatrix:
+        generation = self._generation
+        matrix = await self._aload()
+        self.loads += 1
+        if generation == self._generation:
+            self._matrix = matrix
+        return matrix
+
+    async def aget(self) -> PersonaMatrix:
+        """get() 의 비동기 버전. 행을 기다리는 동안 스레드를 잡지 않는다.
+
+        async_loader 가 없으면 get() 을 스레드에서 부른다.
+        """
+        if self.async_loader is None:
+            return await asyncio.to_thread(self.get)
+        if self.ttl <= 0:
+            self.loads += 1
+            return await self._aload()
+
+        matrix = self._matrix
+        if self._fresh(matrix):
+            self.hits += 1
+            return matrix
+
+        loop = asyncio.get_running_loop()
+        pending = self._pending
+        if pending is None or pending.done() or pending.get_loop() is not loop:
+            pending = loop.create_task(self._aload_and_keep())
+            self._pending = pending
+        else:
+            self.hits += 1
+        # 기다리던 요청 하나가 취소돼도 다른 요청이 함께 기다리는 로드는 계속한다
+        return await asyncio.shield(pending)
+
+    def invalidate(self):
+        self._generation += 1
+        self._matrix = None
+        self._pending = None
+        self.invalidations += 1
+
+    def stats(self) -> dict[str, Any]:
+        matrix = self._matrix
+        return {
+            "ttl_seconds": self.ttl,
+            "personas": len(matrix) if matrix is not None else None,
+            "quantization": self.quantization,
+            "candidate_bytes": matrix.candidate_nbytes if matrix is not None else None,
+            "age_seconds": (
+                round(time.monotonic() - matrix.loaded_at, 3)
+                if matrix is not None
+                else None
+            ),
+            "hits": self.hits,
+            "loads": self.loads,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,149 @@
+import hashlib
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import Protocol
+
+import numpy as np
+
+from config.settings import setting
+
+# 임베딩 제공자
+#
+# 검색(rag/retriever.py)과 페르소나 저장(rag/embeddings.py, rag/store.py)이 같은 제공자를 쓰도록
+# 설정(RAG_EMBEDDING_PROVIDER)으로 하나를 고른다.
+# - "openai":  OpenAI text-embedding-3-small (네트워크 필요)
+# - "hashing": 단어 + 글자 n-gram 을 해시해 고정 차원 벡터로 만드는 로컬 CPU 임베딩.
+#              네트워크 없이 결정적으로 동작해 오프라인 개발, 테스트, 벤치마크에 쓴다.
+# 제공자를 바꾸면 페르소나도 같은 제공자로 다시 임베딩해 저장해야 한다.
+
+EMBEDDING_PROVIDERS = ("openai", "hashing")
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
+# personas.embedding 컬럼(vector(1536))과 맞춘 기본 차원
+DEFAULT_DIM = 1536
+
+TOKEN_PATTERN = re.compile(r"\w+")
+CHAR_NGRAMS = (2, 3)
+
+
+class EmbeddingProvider(Protocol):
+    # 캐시 키와 저장된 임베딩의 출처 표시에 쓰는 이름 (모델/차원이 다르면 달라야 한다)
+    name: str
+    # 쿼리 임베딩 캐시(rag/embedding_cache.py)를 거칠지. 로컬 계산이 캐시 조회보다 싸면 False
+    cacheable: bool
+
+    def embed_query(self, text: str) -> list[float]: ...
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]: ...
+
+    # 비동기 검색(retriever.aretrieve_personas)용. 네트워크 제공자는 스레드 없이 기다린다
+    async def aembed_query(self, text: str) -> list[float]: ...
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]: ...
+
+
+class OpenAIProvider:
+    def __init__(self, model: str = OPENAI_EMBEDDING_MODEL):
+        # 로컬 제공자만 쓸 때는 langchain_openai 없이도 돌도록 여기서 불러온다
+        from langchain_openai import OpenAIEmbeddings
+
+        self.name = model
+        self.cacheable = True
+        self._client = OpenAIEmbeddings(model=model)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._client.embed_query(text)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._client.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await self._client.aembed_query(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self._client.aembed_documents(texts)
+
+
+def _hash_feature(feature: str) -> int:
+    # 파이썬 hash() 는 프로세스마다 달라지므로 고정된 해시를 쓴다
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+# 단어 하나의 피처(단어 자체 + 글자 n-gram) 해시. 질의 텍스트는 같은 단어가 반복되므로 캐시한다
+@lru_cache(maxsize=65536)
+def _word_features(word: str) -> tuple[int, ...]:
+    features = [_hash_feature(f"w:{word}")]
+    # 한국어는 조사/어미가 붙어 단어가 잘 일치하지 않으므로 글자 n-gram 도 쓴다
+    padded = f"<{word}>"
+    for n in CHAR_NGRAMS:
+        for start in range(len(padded) - n + 1):
+            features.append(_hash_feature(f"c{n}:{padded[start : start + n]}"))
+    return tuple(features)
+
+
+def _features(text: str) -> Counter:
+    features = Counter()
+    for word in TOKEN_PATTERN.findall(unicodedata.normalize("NFC", text).lower()):
+        features.update(_word_features(word))
+    return features
+
+
+class HashingProvider:
+    """피처 해싱 임베딩. 같은 텍스트는 프로세스/머신과 상관없이 같은 벡터가 된다.
+
+    피처마다 해시로 차원과 부호(+/-)를 정하고 1 + log(빈도) 를 더한 뒤 L2 정규화한다.
+    """
+
+    def __init__(self, dim: int = DEFAULT_DIM):
+        if dim <= 0:
+            raise ValueError(f"Embedding dimension must be positive, got {dim}")
+        self.dim = dim
+        self.name = f"hashing-v1-{dim}"
+        self.cacheable = False
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float64)
+        features = _features(text)
+        if features:
+            hashes = np.fromiter(features.keys(), dtype=np.uint64, count=len(features))
+            counts = np.fromiter(
+                features.values(), dtype=np.float64, count=len(features)
+            )
+            signs = np.where(hashes >> np.uint64(63), 1.0, -1.0)
+            index = (hashes % np.uint64(self.dim)).astype(np.intp)
+            np.add.at(vector, index, signs * (1.0 + np.log(counts)))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text).tolist() for text in texts]
+
+    # 로컬 계산이라 기다릴 I/O 가 없다 (질의 하나에 수십 마이크로초)
+    async def aembed_query(self, text: str) -> list[float]:
+        return self.embed_query(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_documents(texts)
+
+
+# 제공자는 클라이언트/연결을 재사용하도록 (이름, 차원)마다 하나만 만든다
+@lru_cache(maxsize=None)
+def get_embedding_provider(name: str, dim: int = DEFAULT_DIM) -> EmbeddingProvider:
+    if name == "openai":
+        return OpenAIProvider()
+    if name == "hashing":
+        return HashingProvider(dim)
+    raise ValueError(
+        f"Unknown embedding provider: {name} (expected one of {EMBEDDING_PROVIDERS})"
+    )
+
+
+def configured_embedding_provider() -> EmbeddingProvider:
+    return get_embedding_provider(
+        setting.rag_embedding_provider, setting.rag_embedding_dim
+    )
@@ -0,0 +1,100 @@
+import mmap
+import tempfile
+from dataclasses import dataclass
+
+import numpy as np
+
+# 페르소나 후보 행렬의 양자화 표현
+#
+# 1536 차원 페르소나 하나가 float64 로 12KB, float32 로 6KB 이므로 페르소나가 많아지면
+# 워커마다 들고 있는 행렬이 메모리와 점수 계산 시간(메모리 대역폭)을 차지한다.
+# - float16: 차원마다 2바이트 (float32 의 1/2)
+# - int8:    차원마다 1바이트 + 벡터마다 float32 scale 하나 (약 1/4). 값 = code * scale
+# 1차로 양자화된 벡터로 점수를 내 상위 후보만 고르고, 후보는 원래 정밀도로 다시 점수를 낸다
+# (PersonaMatrix.search). NumPy 에는 float16/int8 BLAS 가 없으므로 행 블록을 float32 로
+# 풀어 행렬-벡터 곱을 한다. 블록은 CPU 캐시에 들어가는 크기라 추가 메모리는 거의 없다.
+# 그래서 int8 은 float32 와 비슷한 속도로 메모리만 1/4 이 되고, float16 은 float32 변환이
+# 느려 점수 계산이 몇 배 느리다 (python -m benchmarks.rag_quantize).
+
+QUANTIZATION_KINDS = ("none", "float16", "int8")
+# 한 번에 float32 로 풀어 곱하는 블록 크기 (바이트). 작으면 파이썬 반복 비용이, 크면 캐시 미스가 늘어난다
+BLOCK_BYTES = 1024 * 1024
+# 다시 점수를 낼 후보 수 = max(top_k * oversample, MIN_CANDIDATES)
+DEFAULT_OVERSAMPLE = 10
+MIN_CANDIDATES = 64
+
+
+@dataclass(frozen=True)
+class QuantizedMatrix:
+    codes: np.ndarray  # (n, dim) float16 또는 int8
+    scales: np.ndarray | None  # int8 일 때 (n,) float32
+    oversample: int = DEFAULT_OVERSAMPLE
+
+    @property
+    def kind(self) -> str:
+        return "int8" if self.scales is not None else "float16"
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (0 if self.scales is None else self.scales.nbytes)
+
+    @classmethod
+    def from_embeddings(
+        cls, embeddings: np.ndarray, kind: str, oversample: int = DEFAULT_OVERSAMPLE
+    ) -> "QuantizedMatrix":
+        if kind == "float16":
+            return cls(embeddings.astype(np.float16), None, oversample)
+        if kind != "int8":
+            raise ValueError(
+                f"Unknown quantization: {kind} (expected one of {QUANTIZATION_KINDS})"
+            )
+        # 벡터마다 최대 절댓값을 127 에 맞춘다 (길이 0 인 행은 scale 0)
+        scales = (np.abs(embeddings).max(axis=1) / 127.0).astype(np.float32)
+        safe = np.where(scales == 0, 1.0, scales)
+        codes = np.empty(embeddings.shape, dtype=np.int8)
+        for start, stop in _blocks(len(embeddings), embeddings.shape[1]):
+            codes[start:stop] = np.rint(
+                embeddings[start:stop] / safe[start:stop, None]
+            )
+        return cls(codes, scales, oversample)
+
+    def candidates(self, top_k: int) -> int:
+        return max(top_k * self.oversample, MIN_CANDIDATES)
+
+    def scores(self, queries: np.ndarray) -> np.ndarray:
+        """정규화된 쿼리 (m, dim) 와의 근사 점수 (m, n) float32."""
+        queries = np.asarray(queries, dtype=np.float32)
+        n, dim = self.codes.shape
+        scores = np.empty((len(queries), n), dtype=np.float32)
+        for start, stop in _blocks(n, dim):
+            block = self.codes[start:stop].astype(np.float32)
+            scores[:, start:stop] = queries @ block.T
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+
+def _blocks(n: int, dim: int):
+    rows = max(1, BLOCK_BYTES // (4 * max(dim, 1)))
+    for start in range(0, n, rows):
+        yield start, min(start + rows, n)
+
+
+def spill_to_disk(embeddings: np.ndarray) -> np.ndarray:
+    """행렬을 이름 없는 임시 파일에 쓰고 읽기 전용 memmap 으로 돌려준다.
+
+    다시 점수를 낼 후보 행만 페이지 단위로 읽히므로 상주 메모리는 양자화 행렬 크기 정도가 된다.
+    (임시 디렉터리가 tmpfs 면 메모리에 남으니 TMPDIR 을 디스크로 둔다)
+    """
+    embeddings = np.ascontiguousarray(embeddings)
+    if embeddings.size == 0:
+        return embeddings
+    with tempfile.TemporaryFile() as f:
+        f.write(memoryview(embeddings).cast("B"))
+        f.flush()
+        # 매핑은 파일을 닫아도(삭제돼도) 유지된다
+        spilled = np.memmap(f, dtype=embeddings.dtype, mode="r", shape=embeddings.shape)
+    # 후보 행은 흩어져 있으므로 미리 읽기(readahead)로 이웃 페이지까지 올리지 않게 한다
+    if hasattr(mmap, "MADV_RANDOM"):
+        spilled._mmap.madvise(mmap.MADV_RANDOM)
+    return spilled
@@ -0,0 +1,23 @@
+import numpy as np
+
+# 점수 배열에서 상위 top_k 를 고르는 공용 함수
+#
+# 전체 정렬(O(n log n)) 대신 argpartition(O(n))으로 top_k 후보만 고른 뒤 그 안에서만 정렬한다.
+# 경계값과 같은 점수(동점)는 모두 후보에 넣고 (점수 내림차순, 인덱스 오름차순)으로 정렬하므로
+# 결과는 예전 rank_personas 의 안정 정렬(sort(reverse=True))과 같다.
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """scores 가 큰 순서로 최대 top_k 개의 인덱스. 동점은 인덱스가 작은 쪽이 먼저다."""
+    n = len(scores)
+    k = min(top_k, n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+    if k < n:
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order[:k]]
+
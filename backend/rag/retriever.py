@@ -1,17 +1,28 @@
 from __future__ import annotations
 
-from typing import Any, Iterable, Sequence, cast
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Iterable, Sequence, cast
 
 import numpy as np
-from langchain_openai import OpenAIEmbeddings
+import structlog
 
-from services.supabase_client import get_supabase_client
+from config.settings import setting
+from rag.ann import PersonaIndex
+from rag.embedding_cache import EmbeddingCache
+from rag.persona_cache import PersonaCache, PersonaMatrix
+from rag.providers import configured_embedding_provider
+from services.supabase_client import get_async_supabase_client, get_supabase_client
+
+log = structlog.get_logger()
 
 TABLE_NAME = "personas"
 EMBEDDING_COLUMN = "embedding"
-EMBEDDING_MODEL = "text-embedding-3-small"
 DEFAULT_MATCH_COUNT = 1
-DEFAULT_SELECT_COLUMNS = ("title", "description", "cluster_name", EMBEDDING_COLUMN)
+MATCH_FUNCTION = "match_personas"
+SEARCH_MODES = ("client", "server")
+KEY_COLUMN = "cluster_name"
+DEFAULT_SELECT_COLUMNS = ("title", "description", KEY_COLUMN, EMBEDDING_COLUMN)
 ORDERED_PROFILE_KEYS = (
     "Age",
     "Purchase Amount (USD)",
@@ -48,25 +59,197 @@ def build_query_text(
     return query_text
 
 
-def embed_query(text: str) -> list[float]:
+# 같은 프로필 텍스트가 반복되므로 (모델, 정규화 텍스트) 로 메모리 LRU + SQLite 캐시를 둔다
+query_embedding_cache = EmbeddingCache(
+    path=setting.rag_embedding_cache_path if setting.rag_embedding_cache_disk else None,
+    max_bytes=int(setting.rag_embedding_cache_max_mb * 1024 * 1024),
+)
+
+
+# 임베딩 제공자(rag/providers.py)는 설정으로 고르고, 클라이언트는 프로세스에서 하나만 만든다
+def embed_query(text: str) -> np.ndarray:
     if not text:
         raise ValueError("Query text is empty.")
-    embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL)
-    return embeddings.embed_query(text)
+    provider = configured_embedding_provider()
+    if not provider.cacheable:
+        return np.asarray(provider.embed_query(text), dtype=np.float32)
+    cached = query_embedding_cache.get(provider.name, text)
+    if cached is not None:
+        return cached
+    vector = provider.embed_query(text)
+    return query_embedding_cache.put(provider.name, text, vector)
+
+
+# embed_query 의 비동기 버전. 메모리 LRU 만 이벤트 루프에서 보고, SQLite 읽기/쓰기는
+# (여러 워커가 파일을 함께 써 잠금을 기다릴 수 있으므로) 스레드에서, 제공자 호출(OpenAI 왕복)은
+# 스레드 없이 기다린다
+async def aembed_query(text: str) -> np.ndarray:
+    if not text:
+        raise ValueError("Query text is empty.")
+    provider = configured_embedding_provider()
+    if not provider.cacheable:
+        return np.asarray(await provider.aembed_query(text), dtype=np.float32)
+    cache = query_embedding_cache
+    cached = cache.get_memory(provider.name, text)
+    if cached is None:
+        if cache.path:
+            cached = await asyncio.to_thread(cache.get_disk, provider.name, text)
+        else:
+            cached = cache.get_disk(provider.name, text)
+    if cached is not None:
+        return cached
+    vector = cache.remember(provider.name, text, await provider.aembed_query(text))
+    if cache.path:
+        await asyncio.to_thread(cache.write_disk, provider.name, text, vector)
+    return vector
+
+
+# 여러 질의를 한 번에 임베딩한다. 캐시에 없는 텍스트만 중복 없이 모아 embed_documents 한 번
+def embed_queries(texts: Sequence[str]) -> np.ndarray:
+    if not texts or not all(texts):
+        raise ValueError("Query text is empty.")
+    provider = configured_embedding_provider()
+    if not provider.cacheable:
+        return np.asarray(provider.embed_documents(list(texts)), dtype=np.float32)
+
+    vectors: dict[str, np.ndarray] = {}
+    for text in texts:
+        if text not in vectors:
+            cached = query_embedding_cache.get(provider.name, text)
+            if cached is not None:
+                vectors[text] = cached
+    missing = [text for text in dict.fromkeys(texts) if text not in vectors]
+    if missing:
+        for text, vector in zip(missing, provider.embed_documents(missing)):
+            vectors[text] = query_embedding_cache.put(provider.name, text, vector)
+    return np.stack([vectors[text] for text in texts])
 
 
 # supabase select 결과를 dict 리스트로 가정하기 (타입체커용)
 # supabase 에서 페르소나 데이터를 지정한 컬럼으로 조회해 리스트로 반환
 def fetch_personas(
     select_columns: Sequence[str] = DEFAULT_SELECT_COLUMNS,
+    client=None,
 ) -> list[dict[str, Any]]:
-    supabase = get_supabase_client()
+    supabase = client or get_supabase_client()
     columns = ",".join(select_columns)
     result = supabase.table(TABLE_NAME).select(columns).execute()
     data = result.data or []
     return cast(list[dict[str, Any]], data)
 
 
+# fetch_personas 의 비동기 버전 (supabase AsyncClient)
+async def afetch_personas(
+    select_columns: Sequence[str] = DEFAULT_SELECT_COLUMNS,
+    client=None,
+) -> list[dict[str, Any]]:
+    supabase = client or await get_async_supabase_client()
+    columns = ",".join(select_columns)
+    result = await supabase.table(TABLE_NAME).select(columns).execute()
+    data = result.data or []
+    return cast(list[dict[str, Any]], data)
+
+
+def _match_params(query_embedding: Iterable[float], top_k: int) -> dict[str, Any]:
+    return {
+        "query_embedding": [float(value) for value in query_embedding],
+        "match_count": top_k,
+    }
+
+
+def _match_rows(data: list[dict[str, Any]] | None) -> list[dict[str, Any]]:
+    return [
+        {
+            **{key: value for key, value in row.items() if key != "similarity"},
+            "score": float(row["similarity"]),
+        }
+        for row in cast(list[dict[str, Any]], data or [])
+    ]
+
+
+# DB 함수(rag/sql/match_personas.sql)로 상위 top_k 개의 메타데이터와 점수만 받는다
+# 전송량이 테이블 크기와 상관없이 top_k 행으로 고정된다
+def match_personas(
+    query_embedding: Iterable[float], top_k: int, client=None
+) -> list[dict[str, Any]]:
+    supabase = client or get_supabase_client()
+    params = _match_params(query_embedding, top_k)
+    result = supabase.rpc(MATCH_FUNCTION, params).execute()
+    return _match_rows(result.data)
+
+
+# match_personas 의 비동기 버전
+async def amatch_personas(
+    query_embedding: Iterable[float], top_k: int, client=None
+) -> list[dict[str, Any]]:
+    supabase = client or await get_async_supabase_client()
+    params = _match_params(query_embedding, top_k)
+    result = await supabase.rpc(MATCH_FUNCTION, params).execute()
+    return _match_rows(result.data)
+
+
+# 조회마다 테이블 전체를 받지 않도록 정규화된 임베딩 행렬을 ttl 동안 재사용한다
+# (fetch_personas / afetch_personas 를 바꿔 끼울 수 있게 호출 시점에 이름으로 찾는다)
+persona_cache = PersonaCache(
+    lambda: fetch_personas(),
+    async_loader=lambda: afetch_personas(),
+    ttl=setting.rag_persona_cache_ttl,
+    embedding_column=EMBEDDING_COLUMN,
+    quantization=setting.rag_quantization,
+    oversample=setting.rag_quantization_oversample,
+    spill=setting.rag_quantization_spill,
+)
+
+
+# 페르소나가 많을 때 쓰는 IVF 인덱스. 캐시가 새로 읽히면 바뀐 페르소나만 반영하고 디스크에 남긴다
+# (처음 학습과 재학습은 백그라운드 스레드에서 하고, 그동안은 정확 검색)
+persona_index = PersonaIndex(
+    setting.rag_ann_index_path,
+    key_column=KEY_COLUMN,
+    nlist=setting.rag_ann_nlist or None,
+)
+
+
+# 페르소나를 upsert 한 뒤 호출해 다음 조회가 새 데이터를 읽게 한다
+def invalidate_persona_cache():
+    persona_cache.invalidate()
+
+
+def _use_ann_index(personas: PersonaMatrix) -> bool:
+    if setting.rag_ann_index not in ("none", "ivf"):
+        raise ValueError(f"Unknown ANN index: {setting.rag_ann_index}")
+    return (
+        setting.rag_ann_index == "ivf"
+        and len(personas) >= setting.rag_ann_min_personas
+    )
+
+
+# 설정(RAG_ANN_INDEX)이 켜져 있고 페르소나가 충분히 많으면 IVF, 아니면 정확 검색
+def search_personas(
+    personas: PersonaMatrix, query_embedding: Iterable[float], top_k: int
+) -> list[dict[str, Any]]:
+    if _use_ann_index(personas):
+        matches = persona_index.search(
+            personas, query_embedding, top_k, setting.rag_ann_nprobe
+        )
+        # 인덱스를 학습하는 동안(None)은 정확 검색
+        if matches is not None:
+            return matches
+    return personas.search(query_embedding, top_k)
+
+
+# 여러 질의를 한 번에 검색한다. 정확 검색은 행렬-행렬 곱 한 번 + 행마다 top_k
+def search_personas_batch(
+    personas: PersonaMatrix, query_embeddings: np.ndarray, top_ks: Sequence[int]
+) -> list[list[dict[str, Any]]]:
+    if not _use_ann_index(personas) or persona_index.sync(personas) is None:
+        return personas.search_many(query_embeddings, top_ks)
+    return [
+        search_personas(personas, query, top_k)
+        for query, top_k in zip(query_embeddings, top_ks)
+    ]
+
+
 def _to_vector(values: Iterable[float]) -> np.ndarray:
     return np.asarray(list(values), dtype=float)
 
@@ -97,28 +280,67 @@ def cosine_similarity(
 
 
 # 쿼리 임베딩과 페르소나 리스트를 코사인 유사도로 점수를 내서  top_k를 반환한다.
+# 후보를 한 행렬로 쌓아 행렬-벡터 곱 한 번으로 점수를 내고 argpartition 으로 top_k 만 고른다.
+# (결과와 동점 순서는 cosine_similarity 를 하나씩 부르던 예전 구현과 같도록 float64 로 계산)
 def rank_personas(
     query_embedding: Iterable[float],
     personas: Iterable[dict[str, Any]],
     top_k: int = DEFAULT_MATCH_COUNT,
 ) -> list[dict[str, Any]]:
-    scored: list[dict[str, Any]] = []
-    for persona in personas:
-        embedding = persona.get(EMBEDDING_COLUMN)
-        if not embedding:
-            continue
-        score = cosine_similarity(query_embedding, embedding)
-        payload = {
-            key: value for key, value in persona.items() if key != EMBEDDING_COLUMN
-        }
-        payload["score"] = score
-        scored.append(payload)
+    matrix = PersonaMatrix.from_rows(personas, EMBEDDING_COLUMN, dtype=np.float64)
+    return matrix.search(query_embedding, top_k)
+
+
+# DB 함수 호출이 실패한 뒤 이 시각(monotonic)까지는 바로 클라이언트 측 순위 계산을 쓴다
+_server_search_disabled_until = 0.0
 
-    scored.sort(key=lambda item: item["score"], reverse=True)
-    return scored[:top_k]
+
+def _server_search_enabled() -> bool:
+    if setting.rag_search_mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown RAG search mode: {setting.rag_search_mode}")
+    return (
+        setting.rag_search_mode == "server"
+        and time.monotonic() >= _server_search_disabled_until
+    )
+
+
+# 함수가 아직 배포되지 않았거나 DB 오류가 나면 None (호출한 쪽이 클라이언트 측으로 처리)
+def _server_search(
+    query_embedding: Iterable[float], top_k: int
+) -> list[dict[str, Any]] | None:
+    try:
+        return match_personas(query_embedding, top_k)
+    except Exception as exc:
+        _disable_server_search(exc)
+        return None
+
+
+async def _aserver_search(
+    query_embedding: Iterable[float], top_k: int
+) -> list[dict[str, Any]] | None:
+    try:
+        return await amatch_personas(query_embedding, top_k)
+    except Exception as exc:
+        _disable_server_search(exc)
+        return None
+
+
+def _disable_server_search(exc: Exception):
+    global _server_search_disabled_until
+    _server_search_disabled_until = (
+        time.monotonic() + setting.rag_server_search_retry_interval
+    )
+    log.warning(
+        "rag_server_search_failed",
+        function=MATCH_FUNCTION,
+        error=str(exc),
+        retry_in=setting.rag_server_search_retry_interval,
+    )
 
 
 # 사용자 입력을 검색용 텍스트로 구성해 임베딩한 뒤,  supabase의 페르소나 임베딩과 유사도 비교해 가장높은  top_k를 반환한다.
+# 페르소나 임베딩은 persona_cache 에 정규화된 행렬로 들고 있으므로 조회는 행렬-벡터 곱 한 번이다.
+# (페르소나가 많고 RAG_ANN_INDEX=ivf 이면 가까운 목록만 보는 근사 검색)
 def retrieve_personas(
     profile: dict[str, Any] | None = None,
     persona_name: str | None = None,
@@ -134,10 +356,79 @@ def retrieve_personas(
         )
 
     query_embedding = embed_query(query_text)
-    personas = fetch_personas()
-    if not personas:
+    if _server_search_enabled():
+        matches = _server_search(query_embedding, top_k)
+        if matches is not None:
+            return matches
+    personas = persona_cache.get()
+    if not len(personas):
         return []
-    return rank_personas(query_embedding, personas, top_k=top_k)
+    return search_personas(personas, query_embedding, top_k)
+
+
+# retrieve_personas 의 비동기 버전 (/api/rag/query).
+# 쿼리 임베딩과 페르소나 조회는 서로 기다릴 필요가 없으므로 동시에 보낸다. 캐시가 비었을 때의
+# 지연이 두 왕복의 합이 아니라 긴 쪽 하나가 되고, 응답을 기다리는 동안 스레드를 잡지 않는다.
+# 행렬 곱(검색)만 CPU 작업이라 run(fn, *args) 으로 넘긴다 (라우터는 rag 실행기, 기본은 스레드).
+async def aretrieve_personas(
+    profile: dict[str, Any] | None = None,
+    persona_name: str | None = None,
+    persona_description: str | None = None,
+    query_text: str | None = None,
+    top_k: int = DEFAULT_MATCH_COUNT,
+    run: Callable[..., Awaitable[Any]] | None = None,
+) -> list[dict[str, Any]]:
+    if query_text is None:
+        query_text = build_query_text(
+            profile=profile,
+            persona_name=persona_name,
+            persona_description=persona_description,
+        )
+    run = run or asyncio.to_thread
+
+    if _server_search_enabled():
+        # DB 함수는 임베딩이 있어야 부를 수 있고, 실패했을 때만 페르소나를 읽는다
+        query_embedding = await aembed_query(query_text)
+        matches = await _aserver_search(query_embedding, top_k)
+        if matches is not None:
+            return matches
+        personas = await persona_cache.aget()
+    else:
+        query_embedding, personas = await asyncio.gather(
+            aembed_query(query_text), persona_cache.aget()
+        )
+    if not len(personas):
+        return []
+    return await run(search_personas, personas, query_embedding, top_k)
+
+
+# retrieve_personas 의 배치 버전. queries 는 retrieve_personas 인자 dict 의 리스트이고,
+# 질의 수와 상관없이 임베딩 호출 1회(캐시 미스만), 페르소나 조회 1회, 행렬 곱 1회로 끝난다.
+# (RAG_SEARCH_MODE=server 여도 질의마다 DB 함수를 부르면 왕복이 N 번이 되므로 여기서 계산한다)
+def retrieve_personas_batch(
+    queries: Sequence[dict[str, Any]],
+) -> list[list[dict[str, Any]]]:
+    if not queries:
+        return []
+    texts = [
+        (
+            query["query_text"]
+            if query.get("query_text") is not None
+            else build_query_text(
+                profile=query.get("profile"),
+                persona_name=query.get("persona_name"),
+                persona_description=query.get("persona_description"),
+            )
+        )
+        for query in queries
+    ]
+    top_ks = [query.get("top_k", DEFAULT_MATCH_COUNT) for query in queries]
+
+    query_embeddings = embed_queries(texts)
+    personas = persona_cache.get()
+    if not len(personas):
+        return [[] for _ in queries]
+    return search_personas_batch(personas, query_embeddings, top_ks)
 
 
 # 위의 함수 결과 (리스트)를 간단하게 top 1로 요약해주는 편의함수
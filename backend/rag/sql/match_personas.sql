@@ -0,0 +1,32 @@
+-- 페르소나 유사도 검색을 DB 안에서 처리하는 함수 (RAG_SEARCH_MODE=server, rag/retriever.py)
+-- 테이블 전체(임베딩 포함)를 받는 대신 상위 match_count 개의 메타데이터와 점수만 돌려준다.
+-- Supabase SQL 편집기나 psql 로 한 번 실행한다. 차원은 personas.embedding 컬럼과 맞춘다.
+
+create extension if not exists vector;
+
+create or replace function match_personas(
+  query_embedding vector(1536),
+  match_count int default 1
+)
+returns table (
+  title text,
+  description text,
+  cluster_name text,
+  similarity float
+)
+language sql stable
+as $$
+  select
+    p.title,
+    p.description,
+    p.cluster_name,
+    1 - (p.embedding <=> query_embedding) as similarity
+  from personas p
+  where p.embedding is not null
+  order by p.embedding <=> query_embedding
+  limit match_count;
+$$;
+
+-- 페르소나가 수만 개 이상이면 근사 인덱스로 정렬 비용을 줄인다 (pgvector 0.5+)
+create index if not exists personas_embedding_hnsw
+  on personas using hnsw (embedding vector_cosine_ops);
@@ -0,0 +1,5 @@
+-- 페르소나 임베딩 증분 동기화(python -m rag.store)에 필요한 컬럼
+-- content_hash: sha256(임베딩 모델 이름 + 페르소나 문서), 같으면 다시 임베딩하지 않는다
+
+alter table personas add column if not exists content_hash text;
+alter table personas add column if not exists embedding_model text;
@@ -1,10 +1,47 @@
+import argparse
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import structlog
+
+from config.settings import setting
+from rag.embeddings import build_persona_documents
+from rag.providers import EmbeddingProvider, configured_embedding_provider
+from rag.retriever import invalidate_persona_cache, persona_index
 from services.supabase_client import get_supabase_client
-from rag.embeddings import run_embedding_task
+
+# 페르소나 임베딩 동기화 파이프라인
+# 사용법: python -m rag.store [--dry-run] [--force]
+#
+# 모듈을 import 해도 아무 호출도 하지 않는다. 실행하면
+# 1. 페르소나 문서를 만들고 (임베딩 모델 이름 + 문서 내용)의 sha256 을 content_hash 로 계산
+# 2. DB 에 저장된 content_hash 만 조회해 (임베딩 제외) 새 페르소나/바뀐 페르소나를 고른다
+# 3. 고른 것만 batch_size 개씩, 최대 workers 개 동시에 임베딩 (실패한 배치는 지수 백오프로 재시도)
+# 4. chunk_size 행씩 upsert 한다
+# --dry-run 은 2 까지만 하고 무엇이 바뀔지 보고한다.
+# 모델을 바꾸면 해시가 달라져 전부 다시 임베딩한다.
+# 테이블에 content_hash, embedding_model 컬럼이 필요하다 (rag/sql/persona_content_hash.sql).
+
+log = structlog.get_logger()
 
 TABLE_NAME = "personas"
 EMBEDDING_COLUMN = "embedding"
+KEY_COLUMN = "cluster_name"
+HASH_COLUMN = "content_hash"
+MODEL_COLUMN = "embedding_model"
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+DEFAULT_CHUNK_SIZE = 500
 
-docs, vectors = run_embedding_task()
+
+def content_hash(model: str, content: str) -> str:
+    return hashlib.sha256(f"{model}\n{content}".encode("utf-8")).hexdigest()
 
 
 def map_doc_to_persona_row(doc):
@@ -26,28 +63,201 @@ def check_vector_dim(vectors, expected_dim):
         )
 
 
-# 임베딩 벡터를 컬럼에 포함해 DB에 저장할수있는 row(payload)를 만들기 위해 작성했다.
-def build_persona_payloads(docs, vectors):
-    if len(docs) != len(vectors):
-        raise ValueError("Docs and vectors length mismatch.")
-    payloads = []
-    for doc, vector in zip(docs, vectors):
-        row = map_doc_to_persona_row(doc)
-        row[EMBEDDING_COLUMN] = vector
-        payloads.append(row)
-    return payloads
+# DB 에 저장된 페르소나별 content_hash (임베딩은 받지 않는다)
+def fetch_stored_hashes(client=None) -> dict[str, str | None]:
+    supabase = client or get_supabase_client()
+    result = (
+        supabase.table(TABLE_NAME).select(f"{KEY_COLUMN},{HASH_COLUMN}").execute()
+    )
+    return {row[KEY_COLUMN]: row.get(HASH_COLUMN) for row in result.data or []}
+
+
+def plan_sync(
+    rows: list[dict[str, Any]], stored: dict[str, str | None], force: bool = False
+) -> dict[str, list[str]]:
+    plan: dict[str, list[str]] = {"new": [], "changed": [], "unchanged": []}
+    for row in rows:
+        key = row[KEY_COLUMN]
+        if key not in stored:
+            plan["new"].append(key)
+        elif force or stored[key] != row[HASH_COLUMN]:
+            plan["changed"].append(key)
+        else:
+            plan["unchanged"].append(key)
+    # 문서에는 없고 DB 에만 있는 페르소나. 지우지 않고 알리기만 한다
+    keys = {row[KEY_COLUMN] for row in rows}
+    plan["stale"] = sorted(key for key in stored if key not in keys)
+    return plan
+
+
+def _embed_batch(
+    provider: EmbeddingProvider, texts: list[str], retries: int, backoff: float
+) -> list[list[float]]:
+    for attempt in range(retries + 1):
+        try:
+            vectors = provider.embed_documents(texts)
+            if len(vectors) != len(texts):
+                raise ValueError("Embedding count does not match input count.")
+            return vectors
+        except Exception as exc:
+            if attempt == retries:
+                raise
+            delay = backoff * 2**attempt
+            log.warning(
+                "persona_embedding_retry",
+                attempt=attempt + 1,
+                batch=len(texts),
+                delay=delay,
+                error=str(exc),
+            )
+            time.sleep(delay)
+
+
+# texts 를 batch_size 개씩 나눠 최대 workers 개 배치를 동시에 임베딩한다 (입력 순서 유지)
+def embed_in_batches(
+    provider: EmbeddingProvider,
+    texts: list[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = DEFAULT_WORKERS,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+) -> list[list[float]]:
+    batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+    if not batches:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as pool:
+        results = pool.map(
+            lambda batch: _embed_batch(provider, batch, retries, backoff), batches
+        )
+        return [vector for vectors in results for vector in vectors]
 
 
 # payloads를 Supabase에 upsert(있으면 업데이트, 없으면 삽입)하기 위한 함수
-def upsert_personas(payloads, on_conflict="cluster_name"):
-    supabase = get_supabase_client()
-    return (
-        supabase.table(TABLE_NAME).upsert(payloads, on_conflict=on_conflict).execute()
+# 한 요청이 너무 커지지 않게 chunk_size 행씩 보낸다.
+# upsert 후에는 같은 프로세스의 retriever 캐시를 비워 다음 조회가 새 임베딩을 읽게 하고,
+# 디스크의 ANN 인덱스(rag/ann.py)가 있으면 같은 행을 바로 반영해 저장한다
+def upsert_personas(
+    payloads,
+    on_conflict=KEY_COLUMN,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    client=None,
+):
+    supabase = client or get_supabase_client()
+    results = []
+    for start in range(0, len(payloads), chunk_size):
+        chunk = payloads[start : start + chunk_size]
+        results.append(
+            supabase.table(TABLE_NAME).upsert(chunk, on_conflict=on_conflict).execute()
+        )
+    invalidate_persona_cache()
+    persona_index.upsert(payloads, EMBEDDING_COLUMN)
+    return results
+
+
+def sync_personas(
+    docs=None,
+    dry_run: bool = False,
+    force: bool = False,
+    expected_dim: int | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = DEFAULT_WORKERS,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    provider: EmbeddingProvider | None = None,
+    client=None,
+) -> dict[str, Any]:
+    """새 페르소나/바뀐 페르소나만 임베딩해 upsert 하고 무엇을 했는지 돌려준다."""
+    start = time.perf_counter()
+    docs = build_persona_documents() if docs is None else docs
+    provider = provider or configured_embedding_provider()
+    client = client or get_supabase_client()
+
+    rows = []
+    for doc in docs:
+        row = map_doc_to_persona_row(doc)
+        row[HASH_COLUMN] = content_hash(provider.name, doc.page_content)
+        row[MODEL_COLUMN] = provider.name
+        rows.append(row)
+    plan = plan_sync(rows, fetch_stored_hashes(client), force=force)
+    report = {
+        "model": provider.name,
+        "dry_run": dry_run,
+        **{name: len(keys) for name, keys in plan.items()},
+        "embedded": 0,
+        "upserted": 0,
+    }
+
+    targets = set(plan["new"]) | set(plan["changed"])
+    if not dry_run and targets:
+        pending = [
+            (row, doc) for row, doc in zip(rows, docs) if row[KEY_COLUMN] in targets
+        ]
+        vectors = embed_in_batches(
+            provider,
+            [doc.page_content for _, doc in pending],
+            batch_size=batch_size,
+            workers=workers,
+            retries=retries,
+            backoff=backoff,
+        )
+        if expected_dim is not None:
+            check_vector_dim(vectors, expected_dim)
+        payloads = [
+            {**row, EMBEDDING_COLUMN: vector}
+            for (row, _), vector in zip(pending, vectors)
+        ]
+        upsert_personas(payloads, chunk_size=chunk_size, client=client)
+        report["embedded"] = len(vectors)
+        report["upserted"] = len(payloads)
+
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    log.info("persona_sync_finished", **report)
+    # 새로 들어가거나 바뀌는 페르소나 키 (unchanged 는 많을 수 있어 개수만)
+    report["keys"] = {
+        name: keys for name, keys in plan.items() if name != "unchanged"
+    }
+    return report
+
+
+# 임베딩 차원을 검증한뒤 새로 바뀐 페르소나만 임베딩해 supabase에 upsert 하는 실행함수
+def store_personas(expected_dim, on_conflict=KEY_COLUMN):
+    if on_conflict != KEY_COLUMN:
+        raise ValueError(f"Personas are synced by {KEY_COLUMN}, got {on_conflict}.")
+    return sync_personas(expected_dim=expected_dim)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="페르소나 임베딩 증분 동기화")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="바뀔 페르소나만 보고하고 끝낸다"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="해시가 같아도 모두 다시 임베딩한다"
+    )
+    parser.add_argument(
+        "--expected-dim",
+        type=int,
+        default=setting.rag_embedding_dim,
+        help="임베딩 차원 검증 값 (personas.embedding 컬럼)",
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    report = sync_personas(
+        dry_run=args.dry_run,
+        force=args.force,
+        expected_dim=args.expected_dim,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        retries=args.retries,
+        chunk_size=args.chunk_size,
     )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
 
 
-# 임베딩 차원을 검증한뒤 페르소나 payloads를 만들어 supabase에 upsert 하는 실행함수
-def store_personas(expected_dim, on_conflict="cluster_name"):
-    check_vector_dim(vectors, expected_dim)
-    payloads = build_persona_payloads(docs, vectors)
-    upsert_personas(payloads, on_conflict=on_conflict)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+# Supabase 클라이언트의 로컬 대역 (테스트, 벤치마크용)
+#
+# rag 가 쓰는 부분만 흉내 낸다: table(...).select(...).execute(),
+# table(...).upsert(rows, on_conflict=...).execute(),
+# rpc("match_personas", ...).execute().
+# 응답은 PostgREST 처럼 JSON 으로 직렬화했다가 다시 읽고(pgvector 컬럼은 "[...]" 문자열),
+# 주고받은 바이트 수를 세어 전송량을 비교할 수 있게 한다.
+# match_personas 는 rag/sql/match_personas.sql 과 같은 결과(코사인 유사도 상위 N개)를 낸다.
+# AsyncLocalSupabaseClient 는 같은 테이블을 supabase AsyncClient 처럼(await execute()) 쓰고,
+# latency 초만큼 기다려 네트워크 왕복을 흉내 낸다.
+
+
+# match_personas 가 돌려주는 컬럼 (similarity 제외)
+MATCH_COLUMNS = ("title", "description", "cluster_name")
+
+
+class LocalSupabaseError(Exception):
+    pass
+
+
+@dataclass
+class LocalResponse:
+    data: list[dict[str, Any]]
+
+
+def _format_vector(value: list[float]) -> str:
+    # pgvector 의 텍스트 표현 (float4 라 유효숫자 7자리 정도)
+    return "[" + ",".join(f"{v:.7g}" for v in np.asarray(value).tolist()) + "]"
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class _LocalRequest:
+    def __init__(self, client: "LocalSupabaseClient", table: str):
+        self._client = client
+        self._table = table
+        self._columns: list[str] | None = None
+        self._upsert: tuple[list[dict[str, Any]], str] | None = None
+
+    def select(self, columns: str = "*") -> "_LocalRequest":
+        self._columns = None if columns == "*" else columns.split(",")
+        return self
+
+    def upsert(
+        self, rows: list[dict[str, Any]], on_conflict: str = "id"
+    ) -> "_LocalRequest":
+        self._upsert = (rows, on_conflict)
+        return self
+
+    def execute(self) -> LocalResponse:
+        if self._upsert is not None:
+            rows, on_conflict = self._upsert
+            return self._client._upsert(self._table, rows, on_conflict)
+        return self._client._select(self._table, self._columns)
+
+
+class _LocalRpc:
+    def __init__(self, client: "LocalSupabaseClient", name: str, params: dict):
+        self._client = client
+        self._name = name
+        self._params = params
+
+    def execute(self) -> LocalResponse:
+        return self._client._rpc(self._name, self._params)
+
+
+class LocalSupabaseClient:
+    """메모리에 테이블을 두는 Supabase 대역. rpc_functions 에 없는 함수는 오류를 낸다."""
+
+    def __init__(self, rpc_functions: tuple[str, ...] = ("match_personas",)):
+        self.rpc_functions = rpc_functions
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self._tables: dict[str, dict[Any, dict[str, Any]]] = {}
+        # 응답용으로 미리 직렬화한 행 (벡터 -> 문자열 변환은 upsert 때 한 번만)
+        self._encoded: dict[str, dict[Any, dict[str, Any]]] = {}
+        # match_personas 용 정규화 행렬 (upsert 때 비운다)
+        self._matrix: tuple[np.ndarray, list[dict[str, Any]]] | None = None
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> _LocalRequest:
+        return _LocalRequest(self, name)
+
+    def rpc(self, name: str, params: dict[str, Any] | None = None) -> _LocalRpc:
+        return _LocalRpc(self, name, params or {})
+
+    def reset_counters(self):
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def _transfer(self, request: Any, data: list[dict[str, Any]]) -> LocalResponse:
+        body = json.dumps(data, ensure_ascii=False)
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += len(
+                json.dumps(request, ensure_ascii=False, default=_to_json).encode()
+            )
+            self.bytes_received += len(body.encode())
+        return LocalResponse(json.loads(body))
+
+    def _upsert(
+        self, table: str, rows: list[dict[str, Any]], on_conflict: str
+    ) -> LocalResponse:
+        stored = self._tables.setdefault(table, {})
+        encoded = self._encoded.setdefault(table, {})
+        for row in rows:
+            key = row[on_conflict]
+            stored[key] = {**stored.get(key, {}), **row}
+            encoded[key] = self._encode(stored[key])
+        self._matrix = None
+        return self._transfer(rows, [encoded[row[on_conflict]] for row in rows])
+
+    def _encode(self, row: dict[str, Any]) -> dict[str, Any]:
+        return {
+            key: (
+                _format_vector(value)
+                if isinstance(value, (list, np.ndarray))
+                else value
+            )
+            for key, value in row.items()
+        }
+
+    def _select(self, table: str, columns: list[str] | None) -> LocalResponse:
+        rows = self._encoded.get(table, {}).values()
+        if columns is not None:
+            rows = ({column: row.get(column) for column in columns} for row in rows)
+        return self._transfer(columns, list(rows))
+
+    def _persona_matrix(self) -> tuple[np.ndarray, list[dict[str, Any]]]:
+        if self._matrix is None:
+            rows = [
+                row
+                for row in self._tables.get("personas", {}).values()
+                if row.get("embedding") is not None
+            ]
+            embeddings = np.array([row["embedding"] for row in rows], dtype=np.float32)
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            metadata = [
+                {key: row.get(key) for key in MATCH_COLUMNS} for row in rows
+            ]
+            self._matrix = (embeddings / np.where(norms == 0, 1.0, norms), metadata)
+        return self._matrix
+
+    def _rpc(self, name: str, params: dict[str, Any]) -> LocalResponse:
+        if name not in self.rpc_functions:
+            raise LocalSupabaseError(f"Could not find the function public.{name}")
+        embeddings, metadata = self._persona_matrix()
+        query = np.asarray(params["query_embedding"], dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if not len(metadata) or norm == 0:
+            return self._transfer(params, [])
+        similarity = embeddings @ (query / norm)
+        count = min(int(params.get("match_count", 1)), len(metadata))
+        top = np.argsort(-similarity, kind="stable")[:count]
+        data = [
+            {**metadata[idx], "similarity": float(similarity[idx])} for idx in top
+        ]
+        return self._transfer(params, data)
+
+
+class _AsyncLocalRequest:
+    def __init__(self, request: _LocalRequest | _LocalRpc, latency: float):
+        self._request = request
+        self._latency = latency
+
+    def select(self, columns: str = "*") -> "_AsyncLocalRequest":
+        self._request.select(columns)
+        return self
+
+    def upsert(
+        self, rows: list[dict[str, Any]], on_conflict: str = "id"
+    ) -> "_AsyncLocalRequest":
+        self._request.upsert(rows, on_conflict=on_conflict)
+        return self
+
+    async def execute(self) -> LocalResponse:
+        if self._latency > 0:
+            await asyncio.sleep(self._latency)
+        return self._request.execute()
+
+
+class AsyncLocalSupabaseClient:
+    """LocalSupabaseClient 의 테이블/함수를 비동기 인터페이스로 쓴다 (전송량은 원래 대역에 센다)."""
+
+    def __init__(self, client: LocalSupabaseClient, latency: float = 0.0):
+        self.client = client
+        self.latency = latency
+
+    def table(self, name: str) -> _AsyncLocalRequest:
+        return _AsyncLocalRequest(self.client.table(name), self.latency)
+
+    def rpc(
+        self, name: str, params: dict[str, Any] | None = None
+    ) -> _AsyncLocalRequest:
+        return _AsyncLocalRequest(self.client.rpc(name, params), self.latency)
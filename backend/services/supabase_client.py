@@ -1,5 +1,7 @@
+import asyncio
 import os
-from supabase import create_client, Client
+import weakref
+from supabase import AsyncClient, Client, create_async_client, create_client
 from typing import Optional
 
 
@@ -14,3 +16,46 @@ def get_supabase_client() -> Client:
         )
 
     return create_client(url, key)
+
+
+
+# 비동기 검색(rag/retriever.py 의 afetch_personas)용. 요청을 기다리는 동안 스레드를 잡지 않는다.
+# httpx 연결 풀은 만든 이벤트 루프에 묶이므로 루프마다 하나를 만들어 재사용하고
+# (매 요청마다 새 연결/TLS 핸드셰이크를 하지 않도록), 앱 종료 때 close_async_supabase_client 로 닫는다
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def get_async_supabase_client() -> AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is not None:
+        return client
+
+    url: Optional[str] = os.getenv("SUPABASE_URL")
+    key: Optional[str] = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+    if url is None or key is None:
+        raise EnvironmentError(
+            "SUPABASE_URL 혹은 SUPABASE_SERVICE_ROLE_KEY 가 설정되어 있지 않습니다."
+        )
+
+    created = await create_async_client(url, key)
+    # 만드는 동안 같은 루프의 다른 요청이 먼저 넣었으면 그것을 쓰고 방금 만든 것은 닫는다
+    client = _async_clients.setdefault(loop, created)
+    if client is not created:
+        await _close(created)
+    return client
+
+
+async def close_async_supabase_client():
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await _close(client)
+
+
+async def _close(client: AsyncClient):
+    # table()/rpc() 가 쓰는 postgrest 와 auth 의 httpx 연결 풀
+    await client.postgrest.aclose()
+    await client.auth.close()
@@ -68,3 +68,25 @@ def optional_verify_supabase_token(authorization: str | None = Header(None)):
 
     except JWTError:
         raise credentials_exception
+
+
+def is_admin_payload(payload: dict) -> bool:
+    # 서버용 service_role 키, 또는 app_metadata.role 이 admin 인 사용자만 관리자로 본다
+    # (app_metadata 는 서버에서만 바꿀 수 있다. user_metadata 는 사용자가 바꿀 수 있어 보지 않는다)
+    app_metadata = payload.get("app_metadata") or {}
+    return payload.get("role") == "service_role" or app_metadata.get("role") == "admin"
+
+
+def verify_admin_token(payload: dict = Depends(optional_verify_supabase_token)):
+    """/admin/* 용: 로그인한 일반 사용자 토큰은 403.
+
+    DISABLE_AUTH=1 (로컬 개발/테스트) 이면 optional_verify_supabase_token 처럼 생략한다.
+    """
+    if os.getenv("DISABLE_AUTH") == "1":
+        return payload
+    if not is_admin_payload(payload):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges are required.",
+        )
+    return payload
@@ -0,0 +1,189 @@
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from operation.core.executors import ExecutorSaturated
+
+# 동시에 들어온 단건 요청들을 모아 한 번의 벡터 연산으로 예측하는 마이크로 배치 스케줄러
+#
+# - 대기 중인 배치가 없으면 첫 요청이 바로 처리를 시작한다. 같은 이벤트 루프 틱에 들어온
+#   요청과, 앞 배치가 실행기에서 도는 동안 쌓인 요청이 다음 배치로 묶인다.
+# - 최근 배치 크기(EWMA)가 1 에 가까우면(저부하) 대기 창을 0 으로 두어 지연을 더하지 않고,
+#   배치가 커지면(고부하) max_wait 까지 기다리거나 max_batch_size 가 차면 바로 보낸다.
+
+WINDOW_ON_THRESHOLD = 1.5
+EWMA_ALPHA = 0.2
+METRIC_SAMPLES = 2048
+
+
+def _percentile(samples, q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class BatchMetrics:
+    """배치 크기와 큐 대기 시간. 최근 METRIC_SAMPLES 개로 분위수를 계산한다."""
+
+    def __init__(self):
+        self.batches = 0
+        self.items = 0
+        self.failed_batches = 0
+        self.max_batch_size = 0
+        self._sizes: deque[int] = deque(maxlen=METRIC_SAMPLES)
+        self._waits: deque[float] = deque(maxlen=METRIC_SAMPLES)
+
+    def record(self, batch_size: int, waits: list[float]):
+        self.batches += 1
+        self.items += batch_size
+        self.max_batch_size = max(self.max_batch_size, batch_size)
+        self._sizes.append(batch_size)
+        self._waits.extend(waits)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "failed_batches": self.failed_batches,
+            "batch_size": {
+                "mean": round(self.items / self.batches, 3) if self.batches else 0.0,
+                "p50": _percentile(self._sizes, 0.5),
+                "p99": _percentile(self._sizes, 0.99),
+                "max": self.max_batch_size,
+            },
+            "queue_wait_ms": {
+                "p50": round(_percentile(self._waits, 0.5) * 1000, 3),
+                "p99": round(_percentile(self._waits, 0.99) * 1000, 3),
+            },
+        }
+
+
+class MicroBatcher:
+    """submit() 으로 받은 항목을 묶어 await score_batch(list) -> list 를 호출한다.
+
+    score_batch 는 입력과 같은 순서·길이의 결과 리스트를 돌려줘야 하며, 실제 연산은
+    보통 전용 실행기(operation/core/executors.py)에 넘긴다.
+    배치 전체가 실패하면 항목별로 다시 호출해, 잘못된 입력 하나가 같은 배치의
+    다른 요청까지 실패시키지 않게 한다. 실행기 포화(ExecutorSaturated)는 재시도하지 않는다.
+    대기 중인 항목이 max_pending 을 넘으면 submit() 이 바로 ExecutorSaturated 를 던진다.
+    """
+
+    def __init__(
+        self,
+        score_batch: Callable[[list], Awaitable[list]],
+        max_batch_size: int = 64,
+        max_wait: float = 0.002,
+        max_pending: int = 1024,
+        name: str = "batcher",
+        retry_after: int = 1,
+    ):
+        self.score_batch = score_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait)
+        self.max_pending = max(1, max_pending)
+        self.name = name
+        self.retry_after = retry_after
+        self.rejected = 0
+        self.metrics = BatchMetrics()
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pending: list[tuple[Any, asyncio.Future, float]] = []
+        self._flusher: asyncio.Task | None = None
+        self._full: asyncio.Event | None = None
+        self._avg_batch_size = 1.0
+
+    @property
+    def window(self) -> float:
+        if self._avg_batch_size < WINDOW_ON_THRESHOLD:
+            return 0.0
+        return self.max_wait
+
+    def _bind(self, loop: asyncio.AbstractEventLoop):
+        # 대기열과 퓨처는 이벤트 루프에 묶여 있다. 루프가 바뀌면(테스트 클라이언트 등) 새로 만든다
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending = []
+            self._flusher = None
+            self._full = asyncio.Event()
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        self._bind(loop)
+        if len(self._pending) >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorSaturated(self.name, self.retry_after)
+
+        future = loop.create_future()
+        self._pending.append((item, future, loop.time()))
+        if self._flusher is None:
+            self._flusher = loop.create_task(self._flush())
+        elif len(self._pending) >= self.max_batch_size:
+            self._full.set()
+        return await future
+
+    async def _flush(self):
+        try:
+            while self._pending:
+                window = self.window
+                if window > 0 and len(self._pending) < self.max_batch_size:
+                    self._full.clear()
+                    try:
+                        await asyncio.wait_for(self._full.wait(), window)
+                    except asyncio.TimeoutError:
+                        pass
+                batch = self._pending[: self.max_batch_size]
+                del self._pending[: self.max_batch_size]
+                await self._run(batch)
+        finally:
+            self._flusher = None
+
+    async def _run(self, batch: list[tuple[Any, asyncio.Future, float]]):
+        now = self._loop.time()
+        self.metrics.record(len(batch), [now - enqueued for _, _, enqueued in batch])
+        self._avg_batch_size += EWMA_ALPHA * (len(batch) - self._avg_batch_size)
+
+        items = [item for item, _, _ in batch]
+        try:
+            outcomes = [(True, result) for result in await self._score(items)]
+        except ExecutorSaturated as exc:
+            outcomes = [(False, exc)] * len(items)
+        except Exception as exc:
+            self.metrics.failed_batches += 1
+            if len(items) == 1:
+                outcomes = [(False, exc)]
+            else:
+                outcomes = await self._score_each(items)
+
+        for (_, future, _), (ok, value) in zip(batch, outcomes):
+            # 연결이 끊겨 취소된 요청은 건너뛴다
+            if future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    async def _score(self, items: list) -> list:
+        results = await self.score_batch(items)
+        if len(results) != len(items):
+            raise ValueError(f"expected {len(items)} results, got {len(results)}")
+        return results
+
+    async def _score_each(self, items: list) -> list[tuple[bool, Any]]:
+        outcomes = []
+        for item in items:
+            try:
+                outcomes.append((True, (await self._score([item]))[0]))
+            except Exception as exc:
+                outcomes.append((False, exc))
+        return outcomes
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.metrics.snapshot(),
+            "queue_depth": len(self._pending),
+            "rejected": self.rejected,
+            "window_ms": round(self.window * 1000, 3),
+            "max_batch_size": self.max_batch_size,
+        }
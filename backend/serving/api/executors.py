@@ -0,0 +1,20 @@
+from config.settings import setting
+from operation.core.executors import BoundedExecutor
+
+# 라우터들이 공유하는 전용 실행기. Starlette 기본 스레드풀과 분리되어 있어
+# 느린 RAG 호출이 몰려도 CPU 추론 슬롯을 빼앗지 않는다
+inference_executor = BoundedExecutor(
+    "inference",
+    max_workers=setting.inference_workers,
+    max_queue=setting.inference_queue_size,
+    kind=setting.inference_executor_kind,
+    retry_after=setting.executor_retry_after,
+)
+rag_executor = BoundedExecutor(
+    "rag",
+    max_workers=setting.rag_workers,
+    max_queue=setting.rag_queue_size,
+    retry_after=setting.executor_retry_after,
+)
+
+EXECUTORS = (inference_executor, rag_executor)
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from operation.core.middleware import setup_cors, logging_middleware
@@ -8,12 +10,20 @@ from operation.core.logging_config import setup_logging
 load_dotenv(".env.local")
 
 from .routes import customers_router, analysis_router, monitoring_router, rag_router
+from services.supabase_client import close_async_supabase_client
 
 # 로깅 설정 실행
 setup_logging()
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # RAG 비동기 경로가 재사용하던 Supabase 연결 풀을 닫는다
+    await close_async_supabase_client()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # 라우터 등록
 app.include_router(analysis_router.router, prefix="/api/analysis")
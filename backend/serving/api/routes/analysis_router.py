@@ -1,29 +1,124 @@
 from ..schemas.customer_schema import CustomerProfile
 from pydantic import BaseModel
-from typing import List
+from typing import List, Literal, Optional
 from ..auth import optional_verify_supabase_token
-from fastapi import Depends, APIRouter
+from ..batching import MicroBatcher
+from ..executors import inference_executor
+from ..streaming import (
+    OUTPUT_MEDIA_TYPES,
+    detect_input_format,
+    spool_upload,
+    stream_scores,
+)
+from fastapi import Depends, APIRouter, Request, Response
+from fastapi.responses import StreamingResponse
 from operation.core.errors import CustomException
-from ...models.analysis import CustomerAnalyzer
+from ...models.registry import ModelRegistry, load_analyzer
 from config.settings import setting
 
 
 router = APIRouter()
 
+MODEL_VERSION_HEADER = "X-Model-Version"
+# include_distances=true 일 때만 응답에 실리는 필드
+DISTANCE_FIELDS = ("distances", "confidence", "margin")
+
 
 # analysis.py 학습시 사용했던 전처리와 모델을 재사용
-analyzer = CustomerAnalyzer(
-    model_path=str(setting.model_path),
-    scaler_path=str(setting.scaler_path),
-    columns_path=str(setting.columns_path),
+# 활성 모델은 registry 가 들고 있고, 재학습된 버전은 재시작 없이 교체된다
+registry = ModelRegistry(
+    artifacts_dir=setting.base_dir,
+    mode=setting.inference_mode,
+    verify_lookup=setting.lookup_verify,
+)
+registry.start_watcher(setting.model_watch_interval)
+
+
+# 여러 프로필을 한 번의 predict_many 로 예측한다.
+# 한 번의 호출은 같은 모델로 처리되고, 결과마다 그 모델 버전을 함께 돌려준다
+def _score_profiles(
+    profiles: list[dict], include_distances: bool = False
+) -> list[tuple[dict, str]]:
+    analyzer = registry.analyzer
+    preds = analyzer.predict_many(profiles, include_distances=include_distances)
+    return [(pred, analyzer.model_version) for pred in preds]
+
+
+# INFERENCE_EXECUTOR_KIND=process 일 때 워커 프로세스에서 실행된다.
+# 워커는 부모가 넘겨준 디렉터리/버전의 모델을 한 번 로드해 두고, 버전이 바뀌면 다시 로드한다
+_worker_analyzer = None
+
+
+def _score_profiles_in_worker(
+    directory: str,
+    model_version: str,
+    profiles: list[dict],
+    include_distances: bool = False,
+) -> list[tuple[dict, str]]:
+    global _worker_analyzer
+    if _worker_analyzer is None or _worker_analyzer.model_version != model_version:
+        _worker_analyzer = load_analyzer(
+            directory, setting.inference_mode, verify_lookup=False
+        )
+    preds = _worker_analyzer.predict_many(
+        profiles, include_distances=include_distances
+    )
+    return [(pred, _worker_analyzer.model_version) for pred in preds]
+
+
+async def score_profiles(
+    profiles: list[dict], include_distances: bool = False
+) -> list[tuple[dict, str]]:
+    if inference_executor.kind == "process":
+        return await inference_executor.run(
+            _score_profiles_in_worker,
+            str(registry.directory),
+            registry.version,
+            profiles,
+            include_distances,
+        )
+    return await inference_executor.run(_score_profiles, profiles, include_distances)
+
+
+# 단건 요청은 (프로필, 거리 포함 여부) 로 묶인다.
+# 배치 안에 거리를 원하는 요청이 하나라도 있으면 같은 연산에서 함께 계산하고, 원하지 않은 요청에서는 뺀다
+async def _score_batched(items: list[tuple[dict, bool]]) -> list[tuple[dict, str]]:
+    include_distances = any(flag for _, flag in items)
+    scored = await score_profiles([profile for profile, _ in items], include_distances)
+    if not include_distances or all(flag for _, flag in items):
+        return scored
+    return [
+        (pred if flag else _without_distances(pred), version)
+        for (_, flag), (pred, version) in zip(items, scored)
+    ]
+
+
+def _without_distances(pred: dict) -> dict:
+    return {key: value for key, value in pred.items() if key not in DISTANCE_FIELDS}
+
+
+batcher = MicroBatcher(
+    _score_batched,
+    max_batch_size=setting.microbatch_max_size,
+    max_wait=setting.microbatch_max_wait_ms / 1000,
+    max_pending=setting.microbatch_max_pending,
+    name="analysis",
+    retry_after=setting.executor_retry_after,
 )
 
 
 # 다시 반환할 결과 타입 정의
+# distances/confidence/margin 은 include_distances=true 일 때만 채워진다
 class AnalysisResult(BaseModel):
     predicted_cluster: int
     cluster_name: str
     cluster_description: str
+    # 스케일된 공간에서 군집 번호 순서대로 각 중심점까지의 거리
+    distances: Optional[List[float]] = None
+    # 가장 가까운 군집의 소프트 할당 확률 (0~1)
+    confidence: Optional[float] = None
+    # 가장 가까운 두 중심점 거리의 상대 차이 (0 이면 경계 위)
+    margin: Optional[float] = None
 
 
 # 여러 고객 정보의 리스트 클래스
@@ -32,16 +127,30 @@ class BatchRequest(BaseModel):
 
 
 # 단일 고객 사용자의 정보를 입력받아 한건의 예측결과를 리턴
-@router.post("/", response_model=AnalysisResult, tags=["analysis"])
-def analysis_customer(
-    profile: CustomerProfile, _payload: dict = Depends(optional_verify_supabase_token)
+# 동시에 들어온 요청들은 batcher 가 묶어 한 번에 예측한다
+# include_distances=true 면 모든 중심점까지의 거리와 confidence/margin 을 함께 반환
+@router.post(
+    "/",
+    response_model=AnalysisResult,
+    response_model_exclude_none=True,
+    tags=["analysis"],
+)
+async def analysis_customer(
+    profile: CustomerProfile,
+    response: Response,
+    include_distances: bool = False,
+    _payload: dict = Depends(optional_verify_supabase_token),
 ):
     try:
         # dict 로 변환하기
         customer_data = profile.model_dump(by_alias=True)
-        result = analyzer.predict_new_customer(customer_data)
-        return AnalysisResult(**result)
+        result, model_version = await batcher.submit(
+            (customer_data, include_distances)
+        )
 
+    # 과부하(503 + Retry-After)는 그대로 내보낸다
+    except CustomException:
+        raise
     except Exception as e:
         raise CustomException(
             status_code=500,
@@ -49,29 +158,74 @@ def analysis_customer(
             message=f"분석 중 오류가 발생했습니다: {str(e)}",
         )
 
+    response.headers[MODEL_VERSION_HEADER] = model_version
+    return AnalysisResult(**result)
 
-# 여러명의 고객 정보를 한꺼번에 받고, 각 프로필을 반복처리
-@router.post("/batch", response_model=List[AnalysisResult], tags=["analysis"])
-def analysis_batch(
-    request: BatchRequest, _payload: dict = Depends(optional_verify_supabase_token)
+
+# 여러명의 고객 정보를 한꺼번에 받고, 한 번의 벡터 연산으로 모두 예측
+@router.post(
+    "/batch",
+    response_model=List[AnalysisResult],
+    response_model_exclude_none=True,
+    tags=["analysis"],
+)
+async def analysis_batch(
+    request: BatchRequest,
+    response: Response,
+    include_distances: bool = False,
+    _payload: dict = Depends(optional_verify_supabase_token),
 ):
     try:
-        results: List[AnalysisResult] = []
-
         if not request.profiles:
-            return results
+            response.headers[MODEL_VERSION_HEADER] = registry.version
+            return []
 
-        for profile in request.profiles:
-            customer_data = profile.model_dump(by_alias=True)
-            pred = analyzer.predict_new_customer(customer_data)
-
-            results.append(AnalysisResult(**pred))
-
-        return results
+        customer_data = [
+            profile.model_dump(by_alias=True) for profile in request.profiles
+        ]
+        scored = await score_profiles(customer_data, include_distances)
 
+    except CustomException:
+        raise
     except Exception as e:
         raise CustomException(
             status_code=500,
             error_code="BATCH_ANALYSIS_FAILED",
             message=f"배치 분석 중 오류가 발생했습니다:{str(e)}",
         )
+
+    response.headers[MODEL_VERSION_HEADER] = scored[0][1]
+    return [AnalysisResult(**pred) for pred, _ in scored]
+
+
+# CSV(shopping_trends.csv 레이아웃) / NDJSON 업로드를 청크 단위로 읽고 예측해 바로 흘려 보낸다
+# 업로드는 일정 크기를 넘으면 디스크로 넘기므로 수백만 행 파일도 메모리 사용량이 일정하다
+@router.post("/stream", tags=["analysis"])
+async def analysis_stream(
+    request: Request,
+    output: Literal["ndjson", "csv"] = "ndjson",
+    _payload: dict = Depends(optional_verify_supabase_token),
+):
+    input_format = detect_input_format(request.headers.get("content-type"))
+    if input_format is None:
+        raise CustomException(
+            status_code=415,
+            error_code="UNSUPPORTED_MEDIA_TYPE",
+            message="Content-Type 은 text/csv 또는 application/x-ndjson 이어야 합니다.",
+        )
+
+    # 본문은 응답 시작 전에 받아 둔다 (streaming.spool_upload 참고)
+    upload = await spool_upload(request.stream(), setting.stream_spool_max_bytes)
+    analyzer = registry.analyzer
+
+    return StreamingResponse(
+        stream_scores(
+            upload,
+            analyzer,
+            input_format=input_format,
+            output_format=output,
+            chunk_size=setting.stream_chunk_size,
+        ),
+        media_type=OUTPUT_MEDIA_TYPES[output],
+        headers={MODEL_VERSION_HEADER: analyzer.model_version},
+    )
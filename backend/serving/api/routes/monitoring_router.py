@@ -1,7 +1,16 @@
-from fastapi import status, HTTPException
-from .analysis_router import analyzer
+from fastapi import status, HTTPException, Depends
+from .analysis_router import batcher, registry
 import os
 from fastapi import APIRouter
+from operation.core.errors import CustomException
+from ..auth import verify_admin_token
+from ..executors import EXECUTORS
+from rag.retriever import (
+    invalidate_persona_cache,
+    persona_cache,
+    persona_index,
+    query_embedding_cache,
+)
 
 
 router = APIRouter()
@@ -11,11 +20,7 @@ router = APIRouter()
 # 이 프로세스를 재 시작해야하나 ? 판단
 @router.get("/healthz", status_code=status.HTTP_200_OK)
 def health_check():
-    components = {
-        "model": analyzer.model is not None,
-        "scaler": analyzer.scaler is not None,
-        "columns": analyzer.original_columns is not None,
-    }
+    components = registry.analyzer.components()
 
     if all(components.values()):
         return {"status": "ok", "details": "All components are healthy."}
@@ -40,15 +45,18 @@ def health_check():
 # 지금 트래픽을 보내도 문제  없나?
 @router.get("/readyz", status_code=status.HTTP_200_OK)
 def readiness_check():
+    analyzer = registry.analyzer
     components = {
-        "model": analyzer.model is not None,
-        "scaler": analyzer.scaler is not None,
-        "columns": analyzer.original_columns is not None,
+        **analyzer.components(),
         "supabase_secret": os.getenv("SUPABASE_JWT_SECRET") is not None,
     }
 
     if all(components.values()):
-        return {"status": "ready", "details": components}
+        return {
+            "status": "ready",
+            "details": components,
+            "model_version": analyzer.model_version,
+        }
 
     unhealthy = []
     for name, is_ready in components.items():
@@ -59,3 +67,43 @@ def readiness_check():
         status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
         detail={"status": "not_ready", "unhealthy_compoents": unhealthy},
     )
+
+
+# 마이크로 배치 지표(배치 크기, 큐 대기 시간 분위수, 현재 대기 창)와
+# 전용 실행기별 실행 중/대기 중 작업 수, 거절 건수, RAG 페르소나/쿼리 임베딩 캐시 적중 횟수,
+# 페르소나 ANN 인덱스 크기/재학습 횟수
+@router.get("/metrics", status_code=status.HTTP_200_OK)
+def metrics():
+    return {
+        "model_version": registry.version,
+        "analysis_batcher": batcher.stats(),
+        "executors": {executor.name: executor.stats() for executor in EXECUTORS},
+        "rag_persona_cache": persona_cache.stats(),
+        "rag_query_embedding_cache": query_embedding_cache.stats(),
+        "rag_ann_index": persona_index.stats(),
+    }
+
+
+# 재학습된 모델을 재시작 없이 반영
+# 최신 버전 디렉터리를 로드/검증한 뒤 교체하고, 실패하면 기존 모델이 계속 서빙된다
+# 아티팩트 로드와 카나리 검증을 돌리므로 관리자 토큰만 허용한다
+@router.post("/admin/reload", tags=["admin"])
+def reload_model(_payload: dict = Depends(verify_admin_token)):
+    try:
+        return registry.reload()
+    except Exception as e:
+        raise CustomException(
+            status_code=500,
+            error_code="MODEL_RELOAD_FAILED",
+            message=(
+                f"모델 교체에 실패했습니다 (기존 모델 {registry.version} 유지): {str(e)}"
+            ),
+        )
+
+
+# 다른 프로세스(python -m rag.store 등)에서 페르소나를 갱신한 뒤 ttl 을 기다리지 않고 반영
+# 부를 때마다 다음 조회가 테이블 전체를 다시 받으므로 관리자 토큰만 허용한다
+@router.post("/admin/rag/invalidate", tags=["admin"])
+def invalidate_rag_cache(_payload: dict = Depends(verify_admin_token)):
+    invalidate_persona_cache()
+    return persona_cache.stats()
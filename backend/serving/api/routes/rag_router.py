@@ -1,31 +1,89 @@
 from fastapi import APIRouter, Depends
 
+from config.settings import setting
 from operation.core.errors import CustomException
 from ..auth import optional_verify_supabase_token
-from ..schemas.rag_schema import RagMatch, RagQuery, RagResponse
-from rag.retriever import retrieve_personas
+from ..executors import rag_executor
+from ..schemas.rag_schema import (
+    RagBatchRequest,
+    RagBatchResponse,
+    RagMatch,
+    RagQuery,
+    RagResponse,
+)
+from rag.retriever import aretrieve_personas, retrieve_personas_batch
 
 
 router = APIRouter()
 
 
+# OpenAI/Supabase 왕복은 이벤트 루프에서 동시에 기다리고(스레드를 잡지 않음),
+# 행렬 곱 검색만 추론과 분리된 rag 실행기에서 돌린다
 @router.post("/query", response_model=RagResponse, tags=["rag"])
-def query_rag(
+async def query_rag(
     request: RagQuery, _payload: dict = Depends(optional_verify_supabase_token)
 ):
     try:
         profile = request.profile.model_dump(by_alias=True) if request.profile else None
-        matches = retrieve_personas(
+        matches = await aretrieve_personas(
             profile=profile,
             persona_name=request.persona_name,
             persona_description=request.persona_description,
             query_text=request.query_text,
             top_k=request.top_k,
+            run=rag_executor.run,
         )
         return RagResponse(matches=[RagMatch(**match) for match in matches])
+    except CustomException:
+        raise
     except Exception as exc:
         raise CustomException(
             status_code=500,
             error_code="RAG_QUERY_FAILED",
             message=f"RAG 조회 중 오류가 발생했습니다: {str(exc)}",
         )
+
+
+# 캠페인 도구처럼 고객마다 /query 를 부르는 대신 한 번에 보낸다
+# 질의 수와 상관없이 임베딩 호출 1회, 페르소나 조회 1회, 행렬-행렬 곱 1회
+@router.post("/query/batch", response_model=RagBatchResponse, tags=["rag"])
+async def query_rag_batch(
+    request: RagBatchRequest, _payload: dict = Depends(optional_verify_supabase_token)
+):
+    if len(request.queries) > setting.rag_batch_max_queries:
+        raise CustomException(
+            status_code=413,
+            error_code="RAG_BATCH_TOO_LARGE",
+            message=(
+                f"한 번에 최대 {setting.rag_batch_max_queries}개의 질의만 보낼 수 있습니다 "
+                f"(요청: {len(request.queries)}개)."
+            ),
+        )
+    try:
+        queries = [
+            {
+                "profile": (
+                    query.profile.model_dump(by_alias=True) if query.profile else None
+                ),
+                "persona_name": query.persona_name,
+                "persona_description": query.persona_description,
+                "query_text": query.query_text,
+                "top_k": query.top_k,
+            }
+            for query in request.queries
+        ]
+        results = await rag_executor.run(retrieve_personas_batch, queries)
+        return RagBatchResponse(
+            results=[
+                RagResponse(matches=[RagMatch(**match) for match in matches])
+                for matches in results
+            ]
+        )
+    except CustomException:
+        raise
+    except Exception as exc:
+        raise CustomException(
+            status_code=500,
+            error_code="RAG_BATCH_QUERY_FAILED",
+            message=f"RAG 배치 조회 중 오류가 발생했습니다: {str(exc)}",
+        )
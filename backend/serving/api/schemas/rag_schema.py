@@ -49,3 +49,12 @@ class RagMatch(BaseModel):
 
 class RagResponse(BaseModel):
     matches: list[RagMatch]
+
+
+# 여러 고객의 질의를 한 번에 받는 배치 요청 (결과는 같은 순서)
+class RagBatchRequest(BaseModel):
+    queries: list[RagQuery]
+
+
+class RagBatchResponse(BaseModel):
+    results: list[RagResponse]
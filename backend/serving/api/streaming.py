@@ -0,0 +1,204 @@
+import csv
+import io
+import json
+from tempfile import SpooledTemporaryFile
+from typing import IO, Any, AsyncIterator, Iterator
+
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from .schemas.customer_schema import CustomerProfile
+
+# 업로드 파일은 shopping_trends.csv 레이아웃을 따른다. 이 중 분석에 쓰는 컬럼만 읽는다.
+PROFILE_COLUMNS = (
+    "Age",
+    "Purchase Amount (USD)",
+    "Subscription Status",
+    "Frequency of Purchases",
+)
+RESULT_COLUMNS = (
+    "line",
+    "predicted_cluster",
+    "cluster_name",
+    "cluster_description",
+    "error",
+)
+
+INPUT_MEDIA_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+OUTPUT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+Row = tuple[int, dict[str, Any] | None, str | None]
+
+
+def detect_input_format(content_type: str | None) -> str | None:
+    if not content_type:
+        return None
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return INPUT_MEDIA_TYPES.get(media_type)
+
+
+# 응답을 시작하기 전에 업로드 본문을 끝까지 받아 둔다.
+# StreamingResponse 는 응답 중에 연결 끊김 감지를 위해 receive() 를 따로 호출하므로,
+# 응답 제너레이터 안에서 request.stream() 을 읽으면 두 쪽이 본문 메시지를 나눠 가져 멈춘다.
+# max_memory 를 넘는 업로드는 디스크로 넘어가 메모리 사용량은 일정하다.
+async def spool_upload(
+    byte_stream: AsyncIterator[bytes], max_memory: int
+) -> SpooledTemporaryFile:
+    spool = SpooledTemporaryFile(max_size=max_memory, mode="w+b")
+    async for chunk in byte_stream:
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+# 한 줄을 검증된 프로필 dict 로 바꾼다. 실패 시 ValueError (메시지는 그대로 응답에 실린다)
+def _parse_row(raw: dict[str, Any]) -> dict[str, Any]:
+    try:
+        profile = CustomerProfile.model_validate(
+            {column: raw.get(column) for column in PROFILE_COLUMNS}
+        )
+    except ValidationError as exc:
+        raise ValueError(_format_validation_error(exc)) from None
+    return profile.model_dump(by_alias=True)
+
+
+def _validated(line_no: int, raw: dict[str, Any]) -> Row:
+    try:
+        return line_no, _parse_row(raw), None
+    except ValueError as exc:
+        return line_no, None, str(exc)
+
+
+def _iter_csv_rows(text: IO[str]) -> Iterator[Row]:
+    # 하나의 csv.reader 로 읽어야 따옴표 안의 줄바꿈도 한 필드로 처리된다
+    reader = csv.reader(text)
+    header: list[str] | None = None
+    start_line = 1
+
+    for values in reader:
+        line_no, start_line = start_line, reader.line_num + 1
+        if not any(value.strip() for value in values):
+            continue
+
+        if header is None:
+            header = values
+            missing = [col for col in PROFILE_COLUMNS if col not in header]
+            if missing:
+                yield line_no, None, f"missing columns: {', '.join(missing)}"
+                return
+            continue
+
+        if len(values) != len(header):
+            yield line_no, None, f"expected {len(header)} fields, got {len(values)}"
+            continue
+        yield _validated(line_no, dict(zip(header, values)))
+
+
+def _iter_ndjson_rows(text: IO[str]) -> Iterator[Row]:
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            raw = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_no, None, f"invalid JSON: {exc.msg}"
+            continue
+        if not isinstance(raw, dict):
+            yield line_no, None, "each line must be a JSON object"
+            continue
+        yield _validated(line_no, raw)
+
+
+def iter_rows(upload: IO[bytes], input_format: str) -> Iterator[Row]:
+    """(줄 번호, 프로필 또는 None, 에러 메시지 또는 None) 을 순서대로 만든다."""
+    text = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+    if input_format == "csv":
+        return _iter_csv_rows(text)
+    return _iter_ndjson_rows(text)
+
+
+def _encode_results(results: list[dict[str, Any]], output_format: str) -> str:
+    if output_format == "ndjson":
+        return "".join(
+            json.dumps(result, ensure_ascii=False) + "\n" for result in results
+        )
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=RESULT_COLUMNS, lineterminator="\n")
+    writer.writerows(results)
+    return buffer.getvalue()
+
+
+def _score_chunk(analyzer, chunk: list[Row]) -> list[dict[str, Any]]:
+    profiles = [profile for _, profile, _ in chunk if profile is not None]
+    try:
+        preds = iter(analyzer.predict_many(profiles))
+    except Exception as exc:
+        # 예측이 실패해도 업로드 전체를 끊지 않고 해당 청크의 행마다 에러로 남긴다
+        scoring_error = f"scoring failed: {exc}"
+        return [
+            {"line": line_no, "error": error or scoring_error}
+            for line_no, _, error in chunk
+        ]
+
+    results = []
+    for line_no, profile, error in chunk:
+        if profile is None:
+            results.append({"line": line_no, "error": error})
+        else:
+            results.append({"line": line_no, **next(preds)})
+    return results
+
+
+# 다음 chunk_size 행을 파싱/검증/예측/직렬화까지 한 번에 처리한다 (스레드풀에서 실행)
+def _next_chunk(
+    rows: Iterator[Row], analyzer, output_format: str, chunk_size: int
+) -> str | None:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            break
+    if not chunk:
+        return None
+    return _encode_results(_score_chunk(analyzer, chunk), output_format)
+
+
+async def stream_scores(
+    upload: IO[bytes],
+    analyzer,
+    input_format: str,
+    output_format: str,
+    chunk_size: int,
+) -> AsyncIterator[str]:
+    """업로드를 chunk_size 행씩 파싱/예측해 결과를 만들어지는 대로 흘려 보낸다.
+
+    CSV 파싱, Pydantic 검증, 예측은 청크 단위로 스레드풀에서 돌아 이벤트 루프를 막지 않는다.
+    잘못된 행은 전체 업로드를 실패시키지 않고 해당 줄 번호와 에러 메시지로 응답에 포함된다.
+    """
+    try:
+        if output_format == "csv":
+            yield ",".join(RESULT_COLUMNS) + "\n"
+
+        rows = iter_rows(upload, input_format)
+        while True:
+            encoded = await run_in_threadpool(
+                _next_chunk, rows, analyzer, output_format, chunk_size
+            )
+            if encoded is None:
+                break
+            yield encoded
+    finally:
+        upload.close()
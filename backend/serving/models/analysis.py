@@ -1,74 +1,296 @@
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 import joblib
 
+from .bundle import content_version, load_bundle, read_header
+from .encoder import FeatureEncoder
+from .lookup import ClusterLookupTable, verify_lookup_table
+
+# sklearn: pandas + StandardScaler + KMeans.predict (기준 경로)
+# compiled: 로드 시점에 scaler 를 중심점에 접어 넣은 NumPy 전용 경로
+# lookup: 셀별 구매 금액 경계표를 미리 계산해 두고 bisect 로 찾는 경로
+INFERENCE_MODES = ("sklearn", "compiled", "lookup")
+
+# 군집 번호별 이름/설명 (번들에 메타데이터가 없을 때 기본값)
+CLUSTER_INFO = {
+    0: {
+        "name": "알뜰 실속형 쇼핑객",
+        "description": "비교적 적은 금액을 사용하지만, 꾸준히 방문하여 필요한 것을 구매하는 실속파입니다.",
+    },
+    1: {
+        "name": "충성도 높은 VIP 고객",
+        "description": "높은 구매액과 정기 구독을 바탕으로 저희 서비스를 가장 활발하게 이용하는 VIP 고객입니다.",
+    },
+    2: {
+        "name": "유행에 민감한 잠재 고객",
+        "description": "젊은 연령층으로, 높은 구매액을 기록하는 트렌드에 민감한 고객입니다. 정기 구독 시 VIP가 될 확률이 높습니다.",
+    },
+    3: {
+        "name": "안정적인 구독자",
+        "description": "정기 구독 서비스를 꾸준히 이용하며 안정적인 소비 패턴을 보이는 신뢰도 높은 고객입니다.",
+    },
+    4: {
+        "name": "평균적인 일반 고객",
+        "description": "가장 일반적인 소비 패턴을 보이는 고객으로, 다양한 상품에 관심을 보일 가능성이 있습니다.",
+    },
+    5: {
+        "name": "시즌별 큰 손",
+        "description": "자주 방문하지는 않지만, 한 번 구매할 때 큰 금액을 사용하는 경향이 있는 중요한 고객입니다.",
+    },
+    6: {
+        "name": "자주 방문하는 단골손님",
+        "description": "구매 금액은 크지 않지만, 매우 자주 방문하여 서비스에 대한 높은 충성도를 보여주는 소중한 고객입니다.",
+    },
+}
+UNKNOWN_CLUSTER = {
+    "name": "분류되지 않음",
+    "description": "데이터를 기반으로 한 유형을 특정하기 어렵습니다.",
+}
+
+# lookup 모드 로드 시 검증에 쓰는 구매 금액 격자
+LOOKUP_VERIFY_AMOUNTS = np.arange(0.0, 501.0, 2.5)
+
+
+def distance_details(
+    squared: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """squared_distances 결과 (n, k) 에서 (거리, confidence, margin) 을 벡터 연산으로 만든다.
+
+    - distances: 스케일된 공간에서 각 중심점까지의 유클리드 거리
+    - confidence: 중심점마다 분산 1 인 등방 가우시안을 둔 소프트 할당
+      softmax(-d^2 / 2) 중 가장 가까운 군집의 값 (0~1)
+    - margin: (d2 - d1) / d2, 가장 가까운 두 중심점 거리의 상대 차이. 0 이면 경계 위
+    """
+    distances = np.sqrt(squared)
+
+    logits = -0.5 * squared
+    logits -= logits.max(axis=1, keepdims=True)
+    weights = np.exp(logits)
+    confidence = weights.max(axis=1) / weights.sum(axis=1)
+
+    if squared.shape[1] < 2:
+        return distances, confidence, np.ones(len(squared))
+    nearest = np.partition(distances, 1, axis=1)
+    d1, d2 = nearest[:, 0], nearest[:, 1]
+    margin = np.divide(d2 - d1, d2, out=np.zeros_like(d2), where=d2 > 0)
+    return distances, confidence, margin
+
+
+class CompiledKMeans:
+    """StandardScaler + KMeans.predict 를 NumPy 연산 몇 개로 줄인 추론 엔진.
+
+    (x - mean) / scale - c == x * inv_scale - (c + mean * inv_scale) 이므로
+    로드 시점에 scaler 의 mean/scale 을 중심점 쪽으로 미리 접어 둔다.
+    인코딩은 학습과 같은 FeatureEncoder 로 한다.
+    """
+
+    def __init__(self, centroids, mean, scale, encoder: FeatureEncoder):
+        self.encoder = encoder
+        self.columns = encoder.columns
+        # lookup 표가 쓰는 피처별 {값: 컬럼 인덱스}, {수치형 피처: 컬럼 인덱스}
+        self.category_index = encoder.category_index
+        self.numeric_index = encoder.numeric_index
+        self.inv_scale = 1.0 / np.asarray(scale, dtype=float)
+        self.centroids = np.asarray(centroids, dtype=float) + (
+            np.asarray(mean, dtype=float) * self.inv_scale
+        )
+        self.centroid_sq_norms = np.einsum("ij,ij->i", self.centroids, self.centroids)
+
+    @classmethod
+    def from_sklearn(cls, model, scaler, encoder: FeatureEncoder) -> "CompiledKMeans":
+        return cls(model.cluster_centers_, scaler.mean_, scaler.scale_, encoder)
+
+    def encode(self, profiles) -> np.ndarray:
+        return self.encoder.encode(profiles)
+
+    # ||x - c||^2 = ||x||^2 - 2 x·c + ||c||^2, 행렬곱 한 번으로 모든 중심점과의 거리 계산
+    # (KMeans.predict 도 같은 방식으로 라벨을 정한다)
+    def squared_distances(self, encoded: np.ndarray) -> np.ndarray:
+        scaled = encoded * self.inv_scale
+        distances = self.centroid_sq_norms - 2.0 * (scaled @ self.centroids.T)
+        distances += np.einsum("ij,ij->i", scaled, scaled)[:, None]
+        return np.maximum(distances, 0.0, out=distances)
+
+    # lookup 표도 squared_distances 로 만들어지므로 같은 식을 써서
+    # 거리 차이가 아주 작은 경계에서도 두 경로가 어긋나지 않게 한다
+    def predict(self, profiles) -> np.ndarray:
+        if len(profiles) == 0:
+            return np.empty(0, dtype=int)
+        return self.squared_distances(self.encode(profiles)).argmin(axis=1)
+
+    def predict_one(self, profile: dict) -> int:
+        return int(self.predict([profile])[0])
+
+    # 라벨과 모든 중심점까지의 제곱 거리를 같은 연산 한 번으로 (transform 을 따로 부르지 않음)
+    def assign(self, profiles) -> tuple[np.ndarray, np.ndarray]:
+        if len(profiles) == 0:
+            return np.empty(0, dtype=int), np.empty((0, len(self.centroids)))
+        squared = self.squared_distances(self.encode(profiles))
+        return squared.argmin(axis=1), squared
+
+
+# 번들/헤더에 저장된 인코더가 있으면 그대로, 없으면(예전 아티팩트) 컬럼 목록에서 복원
+def _load_encoder(spec: dict | None, columns) -> FeatureEncoder:
+    columns = [str(column) for column in columns]
+    if spec is None:
+        return FeatureEncoder.from_columns(columns)
+    encoder = FeatureEncoder.from_dict(spec)
+    if encoder.columns != columns:
+        raise ValueError("Stored feature encoder does not match the model columns.")
+    return encoder
+
 
 class CustomerAnalyzer:
-    def __init__(self, model_path: str, scaler_path: str, columns_path: str):
-
-        self.model = joblib.load(model_path)
-        self.scaler = joblib.load(scaler_path)
-        self.original_columns = joblib.load(columns_path)
-
-        self.cluster_info = {
-            0: {
-                "name": "알뜰 실속형 쇼핑객",
-                "description": "비교적 적은 금액을 사용하지만, 꾸준히 방문하여 필요한 것을 구매하는 실속파입니다.",
-            },
-            1: {
-                "name": "충성도 높은 VIP 고객",
-                "description": "높은 구매액과 정기 구독을 바탕으로 저희 서비스를 가장 활발하게 이용하는 VIP 고객입니다.",
-            },
-            2: {
-                "name": "유행에 민감한 잠재 고객",
-                "description": "젊은 연령층으로, 높은 구매액을 기록하는 트렌드에 민감한 고객입니다. 정기 구독 시 VIP가 될 확률이 높습니다.",
-            },
-            3: {
-                "name": "안정적인 구독자",
-                "description": "정기 구독 서비스를 꾸준히 이용하며 안정적인 소비 패턴을 보이는 신뢰도 높은 고객입니다.",
-            },
-            4: {
-                "name": "평균적인 일반 고객",
-                "description": "가장 일반적인 소비 패턴을 보이는 고객으로, 다양한 상품에 관심을 보일 가능성이 있습니다.",
-            },
-            5: {
-                "name": "시즌별 큰 손",
-                "description": "자주 방문하지는 않지만, 한 번 구매할 때 큰 금액을 사용하는 경향이 있는 중요한 고객입니다.",
-            },
-            6: {
-                "name": "자주 방문하는 단골손님",
-                "description": "구매 금액은 크지 않지만, 매우 자주 방문하여 서비스에 대한 높은 충성도를 보여주는 소중한 고객입니다.",
-            },
+    def __init__(
+        self,
+        model_path: str,
+        scaler_path: str,
+        columns_path: str,
+        mode: str = "sklearn",
+        verify_lookup: bool = True,
+        bundle_path: str | None = None,
+    ):
+        if mode not in INFERENCE_MODES:
+            raise ValueError(
+                f"Unknown inference mode: {mode} (expected one of {INFERENCE_MODES})"
+            )
+        self.mode = mode
+        self.model = None
+        self.scaler = None
+        self.bundle = None
+
+        # sklearn 경로는 피클된 객체가 필요하고, 그 외 경로는 번들이 있으면 번들을 쓴다
+        # (번들이 없는 예전 아티팩트는 joblib 로 읽는다)
+        if mode != "sklearn" and bundle_path and Path(bundle_path).exists():
+            self.bundle = load_bundle(bundle_path)
+            self.original_columns = list(self.bundle.columns)
+            self.encoder = _load_encoder(self.bundle.encoder, self.original_columns)
+            self.engine = CompiledKMeans(
+                self.bundle.centroids,
+                self.bundle.scaler_mean,
+                self.bundle.scaler_scale,
+                self.encoder,
+            )
+            self.model_version = self.bundle.model_version
+            self.cluster_info = self.bundle.cluster_info or dict(CLUSTER_INFO)
+        else:
+            self.model = joblib.load(model_path)
+            self.scaler = joblib.load(scaler_path)
+            self.original_columns = joblib.load(columns_path)
+            # 인코더는 같은 디렉터리의 번들 헤더에 저장되어 있다 (없으면 컬럼 목록에서 복원)
+            spec = None
+            if bundle_path and Path(bundle_path).exists():
+                spec = read_header(bundle_path).get("encoder")
+            self.encoder = _load_encoder(spec, self.original_columns)
+            self.engine = CompiledKMeans.from_sklearn(
+                self.model, self.scaler, self.encoder
+            )
+            self.model_version = content_version(
+                {
+                    "centroids": self.model.cluster_centers_,
+                    "scaler_mean": self.scaler.mean_,
+                    "scaler_scale": self.scaler.scale_,
+                },
+                self.engine.columns,
+            )
+            self.cluster_info = dict(CLUSTER_INFO)
+
+        self.lookup = None
+        if mode == "lookup":
+            self.lookup = ClusterLookupTable(self.engine)
+            if verify_lookup:
+                self._verify_lookup()
+
+    # 헬스체크용: 예측에 필요한 구성요소가 메모리에 올라와 있는지
+    def components(self) -> dict[str, bool]:
+        return {
+            "model": self.model is not None or self.bundle is not None,
+            "scaler": self.scaler is not None or self.bundle is not None,
+            "columns": self.original_columns is not None
+            and len(self.original_columns) > 0,
         }
 
-    def predict_new_customer(self, new_data: dict):
+    def predict_new_customer(self, new_data: dict, include_distances: bool = False):
+        if include_distances:
+            return self.predict_many([new_data], include_distances=True)[0]
+        if self.mode == "compiled":
+            return self._build_result(self.engine.predict_one(new_data))
+        if self.mode == "lookup":
+            return self._build_result(self.lookup.predict_one(new_data))
 
-        new_df = pd.DataFrame([new_data])
-        new_df_processed = pd.get_dummies(new_df, columns=["Subscription Status"])
-        new_df_processed = pd.get_dummies(
-            new_df_processed, columns=["Frequency of Purchases"]
-        )
+        return self._build_result(int(self._predict_labels_sklearn([new_data])[0]))
 
-        for col in self.original_columns:
-            if col not in new_df_processed.columns:
-                new_df_processed[col] = 0
-        # 강제 정렬
-        new_df_processed = new_df_processed[self.original_columns]
+    # 여러 프로필을 학습과 같은 인코더로 한 번에 인코딩 => (n, 컬럼수) DataFrame
+    def _encode_many(self, profiles: list[dict] | pd.DataFrame) -> pd.DataFrame:
+        return self.encoder.encode_frame(profiles)
 
-        new_df_scaled = self.scaler.transform(new_df_processed)
+    # 배치 전체를 scaler.transform / model.predict 한 번씩으로 처리해 라벨 배열을 반환
+    def predict_labels(self, profiles: list[dict] | pd.DataFrame) -> np.ndarray:
+        if len(profiles) == 0:
+            return np.empty(0, dtype=int)
+        # lookup 모드는 경계표를 배열 연산으로 찾는다 (POST /api/analysis 의 배치 경로)
+        if self.mode == "lookup":
+            return self.lookup.predict_many(profiles)
+        if self.mode == "compiled":
+            return self.engine.predict(profiles)
+        return self._predict_labels_sklearn(profiles)
 
-        # 학습때 컬럼이름이 붙어있지만 예측할때는 없는 배열로 주기때문에  결과에는 영향없다.
-        new_df_scaled = pd.DataFrame(new_df_scaled, columns=self.original_columns)
+    def _predict_labels_sklearn(self, profiles) -> np.ndarray:
+        encoded = self._encode_many(profiles)
+        scaled = self.scaler.transform(encoded)
+        scaled = pd.DataFrame(scaled, columns=self.original_columns)
+        return self.model.predict(scaled)
 
-        predicted_cluster = self.model.predict(new_df_scaled)
-        label = int(predicted_cluster[0])
-        # 키 값  기본값 설정
-        cluster_details = self.cluster_info.get(
-            label,
+    # predict_new_customer 의 배치 버전: 결과는 단건 경로와 동일하고 순서는 입력 순서를 따른다.
+    # include_distances 면 라벨을 정한 거리 행렬에서 distances/confidence/margin 도 함께 낸다
+    # (모든 모드에서 compiled 엔진 한 번으로 계산, KMeans 와 라벨 동일성은 테스트로 확인)
+    def predict_many(
+        self, profiles: list[dict] | pd.DataFrame, include_distances: bool = False
+    ) -> list[dict]:
+        if not include_distances:
+            labels = self.predict_labels(profiles)
+            return [self._build_result(int(label)) for label in labels]
+
+        labels, squared = self.engine.assign(profiles)
+        distances, confidence, margin = distance_details(squared)
+        return [
             {
-                "name": "분류되지 않음",
-                "description": "데이터를 기반으로 한 유형을 특정하기 어렵습니다.",
-            },
-        )
+                **self._build_result(label),
+                "distances": row,
+                "confidence": conf,
+                "margin": gap,
+            }
+            for label, row, conf, gap in zip(
+                labels.tolist(),
+                distances.tolist(),
+                confidence.tolist(),
+                margin.tolist(),
+            )
+        ]
+
+    # 경계표가 피클된 scaler + KMeans 와 같은 답을 내는지 격자 전체에서 확인
+    # 번들만 로드한 경우 sklearn 객체가 없으므로 (KMeans 와 동일성이 테스트된) compiled 경로와 비교
+    def _verify_lookup(self):
+        if self.model is not None:
+            reference = self._predict_labels_sklearn
+        else:
+            reference = self.engine.predict
+        mismatches = verify_lookup_table(self.lookup, reference, LOOKUP_VERIFY_AMOUNTS)
+        if mismatches:
+            raise RuntimeError(
+                "Lookup table disagrees with KMeans.predict on "
+                f"{mismatches} grid points."
+            )
+
+    # 군집 번호 -> 이름 (배치 스코어링처럼 결과 dict 전체가 필요 없는 곳에서 쓴다)
+    def cluster_name(self, label: int) -> str:
+        return self.cluster_info.get(label, UNKNOWN_CLUSTER)["name"]
+
+    def _build_result(self, label: int) -> dict:
+        # 키 값  기본값 설정
+        cluster_details = self.cluster_info.get(label, UNKNOWN_CLUSTER)
         return {
             "predicted_cluster": label,
             "cluster_name": cluster_details["name"],
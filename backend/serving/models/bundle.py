@@ -0,0 +1,193 @@
+import argparse
+import hashlib
+import json
+import os
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from .encoder import FeatureEncoder
+
+# 모델 아티팩트 단일 파일 포맷 (model.bundle)
+#
+# [MAGIC 8바이트][헤더 길이 uint64 LE][JSON 헤더][패딩][배열 1][패딩][배열 2]...
+#
+# - JSON 헤더: 포맷/모델 버전, 컬럼 목록, 피처 인코더, 군집 메타데이터, 배열별 dtype/shape/offset
+# - 배열은 ALIGNMENT 바이트 경계에 원시 바이트로 저장하고, 읽을 때 np.memmap 으로 연다.
+#   unpickle 이 없어 로드가 즉시 끝나고, 같은 파일을 여는 워커들은 OS 페이지 캐시를 공유한다.
+
+MAGIC = b"CABUNDLE"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+ARRAY_NAMES = ("centroids", "scaler_mean", "scaler_scale")
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    path: Path
+    format_version: int
+    model_version: str
+    created_at: str
+    columns: list[str]
+    cluster_info: dict[int, dict[str, str]]
+    centroids: np.ndarray
+    scaler_mean: np.ndarray
+    scaler_scale: np.ndarray
+    extra: dict
+    # serving/models/encoder.py 의 FeatureEncoder.to_dict() (예전 번들에는 없음)
+    encoder: dict | None = None
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+# 배열과 컬럼 내용으로 결정되는 모델 버전 (같은 모델이면 같은 값)
+def content_version(arrays: dict[str, np.ndarray], columns: list[str]) -> str:
+    digest = hashlib.sha256()
+    for name in ARRAY_NAMES:
+        digest.update(np.ascontiguousarray(arrays[name], dtype="<f8").tobytes())
+    digest.update(json.dumps(columns).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def write_bundle(
+    path,
+    centroids,
+    scaler_mean,
+    scaler_scale,
+    columns,
+    cluster_info: dict | None = None,
+    model_version: str | None = None,
+    extra: dict | None = None,
+    encoder: dict | None = None,
+) -> Path:
+    """학습 결과를 단일 번들 파일로 쓴다. 임시 파일에 쓴 뒤 os.replace 로 교체해 원자적이다."""
+    path = Path(path)
+    columns = [str(col) for col in columns]
+    arrays = {
+        "centroids": np.ascontiguousarray(centroids, dtype="<f8"),
+        "scaler_mean": np.ascontiguousarray(scaler_mean, dtype="<f8"),
+        "scaler_scale": np.ascontiguousarray(scaler_scale, dtype="<f8"),
+    }
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "model_version": model_version or content_version(arrays, columns),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "columns": columns,
+        # JSON 키는 문자열이라 읽을 때 int 로 되돌린다
+        "cluster_info": {str(k): v for k, v in (cluster_info or {}).items()},
+        "extra": extra or {},
+        "encoder": encoder,
+        "arrays": {},
+    }
+
+    # 헤더 길이가 배열 offset 에 영향을 주므로, offset 자리수가 안정될 때까지 다시 계산
+    header_bytes = b""
+    for _ in range(3):
+        offset = _align(len(MAGIC) + 8 + len(header_bytes))
+        for name, array in arrays.items():
+            header["arrays"][name] = {
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "offset": offset,
+            }
+            offset = _align(offset + array.nbytes)
+        header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.write(b"\0" * (header["arrays"][name]["offset"] - f.tell()))
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_header(path) -> dict:
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a model bundle.")
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported bundle format version: {header.get('format_version')}"
+        )
+    return header
+
+
+def load_bundle(path) -> ModelBundle:
+    path = Path(path)
+    header = read_header(path)
+
+    arrays = {}
+    for name in ARRAY_NAMES:
+        spec = header["arrays"][name]
+        arrays[name] = np.memmap(
+            path,
+            dtype=np.dtype(spec["dtype"]),
+            mode="r",
+            offset=spec["offset"],
+            shape=tuple(spec["shape"]),
+        )
+
+    if arrays["centroids"].shape[1] != len(header["columns"]):
+        raise ValueError("Bundle centroids do not match the column list.")
+
+    return ModelBundle(
+        path=path,
+        format_version=header["format_version"],
+        model_version=header["model_version"],
+        created_at=header["created_at"],
+        columns=header["columns"],
+        cluster_info={int(k): v for k, v in header["cluster_info"].items()},
+        extra=header.get("extra", {}),
+        encoder=header.get("encoder"),
+        **arrays,
+    )
+
+
+# 기존 joblib 아티팩트(model/scaler/columns.pkl)를 번들로 변환
+def bundle_from_joblib(
+    model_path, scaler_path, columns_path, bundle_path, cluster_info=None
+) -> Path:
+    model = joblib.load(model_path)
+    scaler = joblib.load(scaler_path)
+    columns = list(joblib.load(columns_path))
+    # 예전 아티팩트에는 인코더가 없으므로 컬럼 목록에서 복원해 함께 저장
+    return write_bundle(
+        bundle_path,
+        centroids=model.cluster_centers_,
+        scaler_mean=scaler.mean_,
+        scaler_scale=scaler.scale_,
+        columns=columns,
+        cluster_info=cluster_info,
+        encoder=FeatureEncoder.from_columns(columns).to_dict(),
+    )
+
+
+if __name__ == "__main__":
+    from config.settings import setting
+    from serving.models.analysis import CLUSTER_INFO
+
+    parser = argparse.ArgumentParser(description="joblib 아티팩트를 model.bundle 로 변환")
+    parser.add_argument("--output", type=Path, default=setting.bundle_path)
+    args = parser.parse_args()
+
+    out = bundle_from_joblib(
+        setting.model_path,
+        setting.scaler_path,
+        setting.columns_path,
+        args.output,
+        cluster_info=CLUSTER_INFO,
+    )
+    print(f"Bundle written to {out} (version {load_bundle(out).model_version})")
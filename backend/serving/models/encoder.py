@@ -0,0 +1,144 @@
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+# 학습과 서빙이 함께 쓰는 피처 인코더
+#
+# 학습 때 본 범주값 목록으로 (범주형 피처, 값) -> 고정 컬럼 인덱스 표를 만들어 두고,
+# DataFrame 은 pandas 인덱스 해시 조회로, dict 리스트는 표 조회로 한 번에 원-핫 행렬을 만든다.
+# 학습(pipelines/train/train.py)에서 fit 한 인코더를 번들 헤더에 함께 저장하므로
+# 서빙은 학습과 똑같은 컬럼/순서/drop_first 규칙으로 인코딩한다.
+
+NUMERIC_FEATURES = ("Age", "Purchase Amount (USD)")
+CATEGORICAL_FEATURES = ("Subscription Status", "Frequency of Purchases")
+# 학습 시 첫 번째(정렬 기준) 범주를 떨어뜨리는 피처 (예전 get_dummies(drop_first=True))
+DROP_FIRST_FEATURES = ("Subscription Status",)
+
+
+def _column_values(profiles, key: str) -> np.ndarray:
+    if isinstance(profiles, pd.DataFrame):
+        return profiles[key].to_numpy()
+    return np.asarray([profile[key] for profile in profiles], dtype=object)
+
+
+class FeatureEncoder:
+    """수치형 피처는 그대로, 범주형 피처는 원-핫으로 (n, len(columns)) 행렬을 만든다.
+
+    학습에 없던 값과 drop_first 로 빠진 값은 해당 피처의 원-핫이 모두 0 이다.
+    """
+
+    def __init__(
+        self,
+        numeric: list[str],
+        categories: dict[str, list[str]],
+        drop_first: list[str] = (),
+    ):
+        self.numeric = list(numeric)
+        self.categories = {
+            feature: list(values) for feature, values in categories.items()
+        }
+        self.drop_first = [feature for feature in drop_first if feature in categories]
+
+        self.columns: list[str] = list(self.numeric)
+        self.numeric_index = {feature: idx for idx, feature in enumerate(self.numeric)}
+        # 피처별 {값: 컬럼 인덱스}
+        self.category_index: dict[str, dict[str, int]] = {}
+        # 피처별 범주값 인덱스(값 -> 범주 코드)와 범주 코드 -> 컬럼 인덱스.
+        # 마지막 칸은 코드 -1(학습에 없던 값) 용
+        self._category_codes: dict[str, pd.Index] = {}
+        self._code_columns: dict[str, np.ndarray] = {}
+
+        for feature, values in self.categories.items():
+            kept = values[1:] if feature in self.drop_first else values
+            table = {}
+            for value in kept:
+                table[value] = len(self.columns)
+                self.columns.append(f"{feature}_{value}")
+            self.category_index[feature] = table
+            self._category_codes[feature] = pd.Index(values)
+            self._code_columns[feature] = np.asarray(
+                [table.get(value, -1) for value in values] + [-1], dtype=np.intp
+            )
+
+    @classmethod
+    def fit(
+        cls,
+        df: pd.DataFrame,
+        numeric=NUMERIC_FEATURES,
+        categorical=CATEGORICAL_FEATURES,
+        drop_first=DROP_FIRST_FEATURES,
+    ) -> "FeatureEncoder":
+        # pd.get_dummies 와 같은 정렬 순서로 컬럼을 만든다
+        categories = {
+            feature: sorted(df[feature].dropna().unique().tolist())
+            for feature in categorical
+        }
+        return cls(numeric, categories, drop_first)
+
+    @classmethod
+    def from_columns(cls, columns) -> "FeatureEncoder":
+        """인코더가 저장되지 않은 예전 아티팩트용: 학습 컬럼 목록에서 인코더를 복원한다.
+
+        drop_first 로 빠진 값은 컬럼에 없으므로 "학습에 없던 값"과 똑같이 모두 0 으로 인코딩된다.
+        """
+        columns = [str(column) for column in columns]
+        numeric = []
+        categories: dict[str, list[str]] = {
+            feature: [] for feature in CATEGORICAL_FEATURES
+        }
+        for column in columns:
+            for feature in CATEGORICAL_FEATURES:
+                if column.startswith(f"{feature}_"):
+                    categories[feature].append(column[len(feature) + 1 :])
+                    break
+            else:
+                numeric.append(column)
+
+        encoder = cls(numeric, {f: v for f, v in categories.items() if v})
+        if encoder.columns != columns:
+            raise ValueError(f"Cannot rebuild an encoder for columns {columns}")
+        return encoder
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "numeric": self.numeric,
+            "categories": self.categories,
+            "drop_first": self.drop_first,
+        }
+
+    @classmethod
+    def from_dict(cls, spec: dict[str, Any]) -> "FeatureEncoder":
+        return cls(spec["numeric"], spec["categories"], spec.get("drop_first", ()))
+
+    def _category_columns(self, profiles, feature: str) -> np.ndarray:
+        if isinstance(profiles, pd.DataFrame):
+            # 대량 배치는 해시 조회로 범주 코드를 한 번에 구하고 정수 배열 인덱싱
+            # (학습에 없던 값의 코드 -1 은 마지막 칸의 -1 로)
+            codes = self._category_codes[feature].get_indexer(profiles[feature])
+            return self._code_columns[feature][codes]
+        table = self.category_index[feature]
+        return np.fromiter(
+            (table.get(profile[feature], -1) for profile in profiles),
+            dtype=np.intp,
+            count=len(profiles),
+        )
+
+    def encode(self, profiles) -> np.ndarray:
+        """DataFrame 또는 dict 리스트를 float64 (n, len(columns)) 행렬로 인코딩한다."""
+        n_rows = len(profiles)
+        encoded = np.zeros((n_rows, len(self.columns)), dtype=float)
+
+        for feature, idx in self.numeric_index.items():
+            encoded[:, idx] = _column_values(profiles, feature)
+
+        rows = np.arange(n_rows)
+        for feature in self.categories:
+            idx = self._category_columns(profiles, feature)
+            known = idx >= 0
+            encoded[rows[known], idx[known]] = 1.0
+
+        return encoded
+
+    def encode_frame(self, profiles) -> pd.DataFrame:
+        return pd.DataFrame(self.encode(profiles), columns=self.columns)
@@ -0,0 +1,250 @@
+from bisect import bisect_right
+from math import inf
+
+import numpy as np
+import pandas as pd
+
+# 입력 공간: Age 0-120 (정수) x Subscription x Frequency 는 유한,
+# Purchase Amount 만 연속값이다.
+AGE_COLUMN = "Age"
+AMOUNT_COLUMN = "Purchase Amount (USD)"
+SUBSCRIPTION_COLUMN = "Subscription Status"
+FREQUENCY_COLUMN = "Frequency of Purchases"
+MAX_AGE = 120
+
+
+def _lower_envelope(intercepts, slopes) -> tuple[list[float], list[int]]:
+    """직선 f_k(a) = intercepts[k] - slopes[k] * a 들의 하한 포락선.
+
+    반환값 (breaks, labels): a < breaks[0] 이면 labels[0],
+    breaks[i-1] <= a < breaks[i] 이면 labels[i].
+    """
+    # a -> -inf 에서는 기울기(slopes)가 가장 작은 직선이 가장 낮다. 같으면 절편이 작은 쪽
+    current = min(range(len(slopes)), key=lambda k: (slopes[k], intercepts[k], k))
+    position = -inf
+    breaks: list[float] = []
+    labels = [current]
+
+    while True:
+        next_label, next_break = None, inf
+        for k in range(len(slopes)):
+            if slopes[k] <= slopes[current]:
+                continue
+            crossing = (intercepts[k] - intercepts[current]) / (
+                slopes[k] - slopes[current]
+            )
+            if crossing < position:
+                continue
+            # 같은 지점에서 여러 직선이 만나면 이후에 가장 낮은(기울기가 큰) 직선을 택한다
+            if crossing < next_break or (
+                crossing == next_break and slopes[k] > slopes[next_label]
+            ):
+                next_label, next_break = k, crossing
+
+        if next_label is None:
+            return breaks, labels
+        breaks.append(next_break)
+        labels.append(next_label)
+        current, position = next_label, next_break
+
+
+class ClusterLookupTable:
+    """(age, subscription, frequency) 셀마다 구매 금액 구간 -> 군집 표를 미리 계산해 둔다.
+
+    셀이 고정되면 중심점 k 까지의 거리는
+    ||x - c_k||^2 = b_k - m_k * amount + (모든 k 에 공통인 amount^2 항) 이므로
+    군집은 amount 에 대해 조각별 상수이고, 경계는 직선들의 하한 포락선에서 나온다.
+    예측은 셀 인덱스 계산 + bisect 한 번이다.
+    """
+
+    def __init__(self, engine, max_age: int = MAX_AGE):
+        self.engine = engine
+        self.max_age = max_age
+
+        # 학습 컬럼에 있는 범주값 + 마지막 슬롯은 "표에 없는 값"(원-핫이 모두 0)
+        self.subscription_slots = list(engine.category_index[SUBSCRIPTION_COLUMN])
+        self.frequency_slots = list(engine.category_index[FREQUENCY_COLUMN])
+        self._subscription_index = {
+            value: slot for slot, value in enumerate(self.subscription_slots)
+        }
+        self._frequency_index = {
+            value: slot for slot, value in enumerate(self.frequency_slots)
+        }
+        self._n_subscription = len(self.subscription_slots) + 1
+        self._n_frequency = len(self.frequency_slots) + 1
+
+        self.breaks: list[list[float]] = []
+        self.labels: list[list[int]] = []
+        self._build()
+
+        # predict_many 용: 셀마다 경계/라벨을 같은 길이로 채운 배열 (경계는 inf, 라벨은 -1)
+        width = max((len(breaks) for breaks in self.breaks), default=0)
+        self._break_matrix = np.full((len(self.breaks), width), np.inf)
+        self._label_matrix = np.full((len(self.labels), width + 1), -1, dtype=int)
+        for cell, (breaks, labels) in enumerate(zip(self.breaks, self.labels)):
+            self._break_matrix[cell, : len(breaks)] = breaks
+            self._label_matrix[cell, : len(labels)] = labels
+
+    def _cell_profiles(self) -> list[dict]:
+        subscriptions = self.subscription_slots + [None]
+        frequencies = self.frequency_slots + [None]
+        return [
+            {
+                AGE_COLUMN: age,
+                AMOUNT_COLUMN: 0.0,
+                SUBSCRIPTION_COLUMN: subscription,
+                FREQUENCY_COLUMN: frequency,
+            }
+            for age in range(self.max_age + 1)
+            for subscription in subscriptions
+            for frequency in frequencies
+        ]
+
+    def _build(self):
+        engine = self.engine
+        amount_idx = engine.numeric_index[AMOUNT_COLUMN]
+        amount_weight = engine.inv_scale[amount_idx]
+
+        # amount = 0 에서의 거리가 절편, 기울기는 셀과 무관하게 중심점마다 고정
+        intercepts = engine.squared_distances(engine.encode(self._cell_profiles()))
+        slopes = (2.0 * amount_weight * engine.centroids[:, amount_idx]).tolist()
+
+        for cell_intercepts in intercepts.tolist():
+            breaks, labels = _lower_envelope(cell_intercepts, slopes)
+            self.breaks.append(breaks)
+            self.labels.append(labels)
+
+    def _cell(self, age, subscription, frequency) -> int | None:
+        if isinstance(age, float) and age.is_integer():
+            age = int(age)
+        if not isinstance(age, (int, np.integer)) or not 0 <= age <= self.max_age:
+            return None
+        sub_slot = self._subscription_index.get(subscription, self._n_subscription - 1)
+        freq_slot = self._frequency_index.get(frequency, self._n_frequency - 1)
+        return (int(age) * self._n_subscription + sub_slot) * self._n_frequency + (
+            freq_slot
+        )
+
+    def predict_one(self, profile: dict) -> int:
+        cell = self._cell(
+            profile[AGE_COLUMN],
+            profile[SUBSCRIPTION_COLUMN],
+            profile[FREQUENCY_COLUMN],
+        )
+        # 표 범위를 벗어난 나이(소수, 음수 등)는 compiled 경로로 계산
+        if cell is None:
+            return self.engine.predict_one(profile)
+        labels = self.labels[cell]
+        return labels[bisect_right(self.breaks[cell], float(profile[AMOUNT_COLUMN]))]
+
+    def predict_many(self, profiles: list[dict] | pd.DataFrame) -> np.ndarray:
+        """predict_one 의 배치 버전. 셀 인덱스와 구간 위치를 배열 연산으로 한 번에 구한다.
+
+        표 범위를 벗어난 나이나 숫자가 아닌 값이 있는 행만 compiled 경로로 계산한다.
+        """
+        if len(profiles) == 0:
+            return np.empty(0, dtype=int)
+        ages = _numeric(_column(profiles, AGE_COLUMN))
+        amounts = _numeric(_column(profiles, AMOUNT_COLUMN))
+        sub_slots = np.fromiter(
+            (
+                self._subscription_index.get(value, self._n_subscription - 1)
+                for value in _column(profiles, SUBSCRIPTION_COLUMN)
+            ),
+            dtype=int,
+            count=len(ages),
+        )
+        freq_slots = np.fromiter(
+            (
+                self._frequency_index.get(value, self._n_frequency - 1)
+                for value in _column(profiles, FREQUENCY_COLUMN)
+            ),
+            dtype=int,
+            count=len(ages),
+        )
+
+        with np.errstate(invalid="ignore"):
+            in_table = (
+                (ages >= 0)
+                & (ages <= self.max_age)
+                & (ages == np.floor(ages))
+                & np.isfinite(amounts)
+            )
+        labels = np.empty(len(ages), dtype=int)
+        rows = np.flatnonzero(in_table)
+        cells = (
+            ages[rows].astype(int) * self._n_subscription + sub_slots[rows]
+        ) * self._n_frequency + freq_slots[rows]
+        # bisect_right 위치 = amount 이하인 경계의 개수
+        positions = (self._break_matrix[cells] <= amounts[rows, None]).sum(axis=1)
+        labels[rows] = self._label_matrix[cells, positions]
+
+        outside = np.flatnonzero(~in_table)
+        if len(outside):
+            if isinstance(profiles, pd.DataFrame):
+                rest = profiles.iloc[outside]
+            else:
+                rest = [profiles[idx] for idx in outside]
+            labels[outside] = self.engine.predict(rest)
+        return labels
+
+    # 검증용 격자: 학습 컬럼에 있는 모든 범주 조합 x 나이 x amounts (컬럼별 배열)
+    def grid_columns(self, amounts) -> dict[str, np.ndarray]:
+        amounts = np.asarray(amounts, dtype=float)
+        ages, subscriptions, frequencies = zip(
+            *[
+                (age, subscription, frequency)
+                for age in range(self.max_age + 1)
+                for subscription in self.subscription_slots
+                for frequency in self.frequency_slots
+            ]
+        )
+        return {
+            AGE_COLUMN: np.repeat(ages, len(amounts)),
+            AMOUNT_COLUMN: np.tile(amounts, len(ages)),
+            SUBSCRIPTION_COLUMN: np.repeat(
+                np.asarray(subscriptions, dtype=object), len(amounts)
+            ),
+            FREQUENCY_COLUMN: np.repeat(
+                np.asarray(frequencies, dtype=object), len(amounts)
+            ),
+        }
+
+    def predict_columns(self, columns: dict[str, np.ndarray]) -> np.ndarray:
+        rows = zip(
+            columns[AGE_COLUMN].tolist(),
+            columns[SUBSCRIPTION_COLUMN].tolist(),
+            columns[FREQUENCY_COLUMN].tolist(),
+            columns[AMOUNT_COLUMN].tolist(),
+        )
+        labels = []
+        for age, subscription, frequency, amount in rows:
+            cell = self._cell(age, subscription, frequency)
+            labels.append(self.labels[cell][bisect_right(self.breaks[cell], amount)])
+        return np.asarray(labels, dtype=int)
+
+
+def _column(profiles, name: str) -> np.ndarray:
+    if isinstance(profiles, pd.DataFrame):
+        return profiles[name].to_numpy()
+    return np.asarray([profile[name] for profile in profiles], dtype=object)
+
+
+def _numeric(values: np.ndarray) -> np.ndarray:
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        # 숫자가 아닌 값은 NaN (표 밖으로 보내 compiled 경로가 처리한다)
+        return pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+
+
+def verify_lookup_table(table: ClusterLookupTable, predict_labels, amounts) -> int:
+    """모든 (age, subscription, frequency) 셀 x amounts 격자에서 표와 기준 예측을 비교한다.
+
+    predict_labels 는 DataFrame 을 받아 라벨 배열을 돌려주는 기준 경로
+    (보통 CustomerAnalyzer 의 sklearn 경로)이며, 불일치 건수를 반환한다.
+    """
+    columns = table.grid_columns(amounts)
+    expected = np.asarray(predict_labels(pd.DataFrame(columns)))
+    actual = table.predict_columns(columns)
+    return int((expected != actual).sum())
@@ -0,0 +1,184 @@
+import threading
+from pathlib import Path
+
+import structlog
+
+from .analysis import CustomerAnalyzer
+
+log = structlog.get_logger()
+
+VERSIONS_DIR_NAME = "versions"
+ARTIFACT_FILES = ("model.bundle", "model.pkl")
+
+# 새 모델을 교체 전에 한 번 돌려보는 검증용 프로필
+CANARY_PROFILES = [
+    {
+        "Age": 30,
+        "Purchase Amount (USD)": 100.0,
+        "Subscription Status": "Yes",
+        "Frequency of Purchases": "Monthly",
+    },
+    {
+        "Age": 55,
+        "Purchase Amount (USD)": 20.0,
+        "Subscription Status": "No",
+        "Frequency of Purchases": "Annually",
+    },
+]
+
+
+def load_analyzer(
+    directory: Path, mode: str = "compiled", verify_lookup: bool = True
+) -> CustomerAnalyzer:
+    """아티팩트 디렉터리 하나에서 CustomerAnalyzer 를 만든다 (번들이 있으면 번들 우선)."""
+    directory = Path(directory)
+    return CustomerAnalyzer(
+        model_path=str(directory / "model.pkl"),
+        scaler_path=str(directory / "scaler.pkl"),
+        columns_path=str(directory / "columns.pkl"),
+        bundle_path=str(directory / "model.bundle"),
+        mode=mode,
+        verify_lookup=verify_lookup,
+    )
+
+
+class ModelRegistry:
+    """서빙 중인 CustomerAnalyzer 를 들고 있다가, 새 버전을 로드/검증한 뒤 원자적으로 교체한다.
+
+    아티팩트 디렉터리 구조:
+        <artifacts_dir>/model.bundle ...            # 버전 디렉터리가 없을 때의 기본 모델
+        <artifacts_dir>/versions/<version>/...      # 이름순으로 가장 마지막 버전이 활성 모델
+
+    요청은 시작할 때 registry.analyzer 를 한 번 읽어 끝까지 그 인스턴스를 쓰므로,
+    교체 중에도 진행 중인 요청은 이전 모델로 마무리되고 새 요청부터 새 모델을 쓴다.
+    """
+
+    def __init__(
+        self,
+        artifacts_dir: Path,
+        mode: str = "compiled",
+        verify_lookup: bool = True,
+    ):
+        self.artifacts_dir = Path(artifacts_dir)
+        self.mode = mode
+        self.verify_lookup = verify_lookup
+        # 로드는 한 번에 하나씩 (교체 자체는 속성 대입 한 번이라 잠금 없이 읽어도 안전)
+        self._reload_lock = threading.Lock()
+        self._watcher: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._failed_signature: tuple | None = None
+
+        directory = self.resolve_latest()
+        self._analyzer = self._load(directory)
+        self._directory = directory
+        self._signature = self._directory_signature(directory)
+
+    @property
+    def analyzer(self) -> CustomerAnalyzer:
+        return self._analyzer
+
+    @property
+    def version(self) -> str:
+        return self._analyzer.model_version
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def resolve_latest(self) -> Path:
+        versions_dir = self.artifacts_dir / VERSIONS_DIR_NAME
+        if versions_dir.is_dir():
+            candidates = sorted(
+                path
+                for path in versions_dir.iterdir()
+                if path.is_dir() and any((path / f).exists() for f in ARTIFACT_FILES)
+            )
+            if candidates:
+                return candidates[-1]
+        return self.artifacts_dir
+
+    @staticmethod
+    def _directory_signature(directory: Path) -> tuple:
+        stats = []
+        for name in ARTIFACT_FILES:
+            path = directory / name
+            if path.exists():
+                stat = path.stat()
+                stats.append((name, stat.st_mtime_ns, stat.st_size))
+        return (str(directory), tuple(stats))
+
+    def _load(self, directory: Path) -> CustomerAnalyzer:
+        analyzer = load_analyzer(directory, self.mode, self.verify_lookup)
+        self._validate(analyzer)
+        return analyzer
+
+    @staticmethod
+    def _validate(analyzer: CustomerAnalyzer):
+        results = analyzer.predict_many(CANARY_PROFILES)
+        n_clusters = len(analyzer.engine.centroids)
+        if len(results) != len(CANARY_PROFILES) or not all(
+            0 <= result["predicted_cluster"] < n_clusters for result in results
+        ):
+            raise ValueError("Model failed canary prediction.")
+        single = analyzer.predict_new_customer(CANARY_PROFILES[0])
+        if single != results[0]:
+            raise ValueError("Single and batch predictions disagree.")
+
+    def reload(self, directory: Path | None = None) -> dict:
+        """새 버전을 로드/검증하고 교체한다. 실패하면 예외를 던지고 기존 모델이 계속 서빙된다."""
+        with self._reload_lock:
+            directory = Path(directory) if directory else self.resolve_latest()
+            signature = self._directory_signature(directory)
+            previous = self.version
+
+            analyzer = self._load(directory)
+
+            # 참조 하나만 바꾸는 원자적 교체
+            self._analyzer = analyzer
+            self._directory = directory
+            self._signature = signature
+
+        log.info(
+            "model_reloaded",
+            previous_version=previous,
+            model_version=analyzer.model_version,
+            directory=str(directory),
+        )
+        return {
+            "previous_version": previous,
+            "model_version": analyzer.model_version,
+            "changed": previous != analyzer.model_version,
+            "directory": str(directory),
+        }
+
+    def check_for_update(self) -> dict | None:
+        directory = self.resolve_latest()
+        signature = self._directory_signature(directory)
+        # 이미 실패한 같은 아티팩트는 파일이 다시 바뀔 때까지 재시도하지 않는다
+        if signature in (self._signature, self._failed_signature):
+            return None
+        try:
+            return self.reload(directory)
+        except Exception:
+            self._failed_signature = signature
+            raise
+
+    def start_watcher(self, interval: float):
+        """interval 초마다 아티팩트 디렉터리를 확인해 바뀌었으면 백그라운드 스레드에서 교체한다."""
+        if interval <= 0 or self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop.wait(interval):
+                try:
+                    self.check_for_update()
+                except Exception as exc:
+                    log.error("model_reload_failed", exception=str(exc))
+
+        self._watcher = threading.Thread(
+            target=watch, name="model-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
@@ -0,0 +1,85 @@
+import json
+
+from benchmarks import (
+    compare,
+    rag_ann,
+    rag_async,
+    rag_pushdown,
+    rag_quantize,
+    rag_rank,
+    train,
+)
+
+
+def test_train_benchmark_writes_comparable_results(tmp_path):
+    results = train.run(rows=[2000], score_batch=500, workdir=tmp_path)
+
+    stages = [result["stage"] for result in results]
+    assert stages == ["generate", "load", "encode", "scale", "fit", "dump", "score"]
+    assert all(result["seconds"] >= 0 and "peak_mb" in result for result in results)
+
+    report = {"environment": {"commit": None}, "results": results}
+    slower = {
+        "environment": {"commit": None},
+        "results": [
+            {**result, "seconds": result["seconds"] * 2 + 1} for result in results
+        ],
+    }
+    baseline_path = tmp_path / "baseline.json"
+    current_path = tmp_path / "current.json"
+    baseline_path.write_text(json.dumps(report))
+    current_path.write_text(json.dumps(slower))
+
+    assert compare.main([str(baseline_path), str(baseline_path)]) == 0
+    assert compare.main([str(baseline_path), str(current_path)]) == 1
+
+
+def test_rag_rank_benchmark_agrees_with_legacy():
+    results = rag_rank.run(personas=[7, 500], dim=16, top_k=3, memory="none")
+
+    ranked = [result for result in results if result["stage"] == "rank_personas"]
+    assert [result["rows"] for result in ranked] == [7, 500]
+    assert all(result["matches_legacy"] for result in ranked)
+
+
+def test_rag_ann_benchmark_reports_recall():
+    results = rag_ann.run(
+        personas=[400], nprobe=[1, 6], dim=8, topics=20, queries=20, nlist=6
+    )
+
+    ivf = [result for result in results if result["stage"] == "ivf"]
+    assert [result["nprobe"] for result in ivf] == [1, 6]
+    # 모든 목록을 보면 정확 검색과 같다
+    assert ivf[-1]["recall"] == 1.0
+
+
+def test_rag_pushdown_benchmark_transfers_only_top_k():
+    results = rag_pushdown.run(personas=[50, 200], dim=8, top_k=3, memory="none")
+
+    server = [result for result in results if result["stage"] == "server"]
+    client = [result for result in results if result["stage"] == "client"]
+    assert all(result["matches_client"] for result in server)
+    # 서버 모드 전송량은 테이블 크기와 상관없이 거의 같다
+    assert server[1]["bytes"] < server[0]["bytes"] * 1.1
+    assert client[1]["bytes"] > client[0]["bytes"] * 3
+
+
+def test_rag_quantize_benchmark_reports_agreement():
+    results = rag_quantize.run(personas=[3000], dim=64, queries=5, top_k=3)
+
+    by_stage = {result["stage"]: result for result in results}
+    assert by_stage["float64"]["matches_cosine_similarity"]
+    assert by_stage["int8"]["candidate_mb"] < by_stage["float32"]["candidate_mb"]
+    assert all(by_stage[kind]["recall"] > 0.9 for kind in rag_quantize.KINDS)
+
+
+def test_rag_async_benchmark_reports_both_paths():
+    results = rag_async.run(
+        concurrency=[4], personas=20, dim=8, latency_ms=50, workers=1, memory="none"
+    )
+
+    assert [result["stage"] for result in results] == ["sync", "async"]
+    assert all(result["rows"] == 4 and result["mean_ms"] > 0 for result in results)
+    # 스레드 하나로 질의 4개 x 왕복 2번(50ms)을 차례로 기다리므로 적어도 0.4초
+    # (겹침 자체는 tests/rag/test_async_retriever.py 에서 호출 구간으로 확인한다)
+    assert results[0]["seconds"] >= 0.4
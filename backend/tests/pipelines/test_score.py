@@ -0,0 +1,97 @@
+import pandas as pd
+
+from config.settings import setting
+from pipelines.score.score import PROFILE_COLUMNS, UNASSIGNED, score_file
+from serving.models.analysis import CustomerAnalyzer
+
+DATA_PATH = setting.base_dir.parent.parent / "data" / "shopping_trends.csv"
+
+
+def test_score_file_matches_analyzer(tmp_path):
+    output = tmp_path / "scores.parquet"
+
+    stats = score_file(DATA_PATH, output, workers=2, chunk_size=500)
+
+    scored = pd.read_parquet(output)
+    source = pd.read_csv(DATA_PATH)
+    analyzer = CustomerAnalyzer(
+        model_path=str(setting.model_path),
+        scaler_path=str(setting.scaler_path),
+        columns_path=str(setting.columns_path),
+    )
+    expected = analyzer.predict_many(source[PROFILE_COLUMNS])
+
+    assert stats["rows"] == len(source) == len(scored)
+    assert scored["Customer ID"].tolist() == source["Customer ID"].tolist()
+    assert scored["predicted_cluster"].tolist() == [
+        item["predicted_cluster"] for item in expected
+    ]
+    assert scored["cluster_name"].tolist() == [
+        item["cluster_name"] for item in expected
+    ]
+
+
+def test_score_file_rejects_rows_the_api_would_reject(tmp_path):
+    source = tmp_path / "customers.csv"
+    source.write_text(
+        "Customer ID,Age,Purchase Amount (USD),Subscription Status,"
+        "Frequency of Purchases\n"
+        "1,30,50.0, yes ,Weekly\n"
+        "2,200,50.0,No,Weekly\n"
+        "3,abc,50.0,No,Weekly\n"
+        "4,30,-1,Maybe,Daily\n"
+        "5,45,,No,Monthly\n"
+        "6,45,120.5,No,Monthly\n",
+        encoding="utf-8",
+    )
+    output = tmp_path / "scores.parquet"
+    rejects_path = tmp_path / "rejects.csv"
+
+    stats = score_file(source, output, rejects_path=rejects_path)
+
+    scored = pd.read_parquet(output)
+    rejects = pd.read_csv(rejects_path)
+    analyzer = CustomerAnalyzer(
+        model_path=str(setting.model_path),
+        scaler_path=str(setting.scaler_path),
+        columns_path=str(setting.columns_path),
+    )
+    expected = analyzer.predict_many(
+        [
+            {
+                "Age": 30,
+                "Purchase Amount (USD)": 50.0,
+                "Subscription Status": "Yes",
+                "Frequency of Purchases": "Weekly",
+            },
+            {
+                "Age": 45,
+                "Purchase Amount (USD)": 120.5,
+                "Subscription Status": "No",
+                "Frequency of Purchases": "Monthly",
+            },
+        ]
+    )
+
+    assert stats["rows"] == len(scored) == 6 and stats["rejected"] == 4
+    labels = scored["predicted_cluster"].tolist()
+    assert [labels[0], labels[5]] == [item["predicted_cluster"] for item in expected]
+    assert labels[1:5] == [UNASSIGNED] * 4
+    assert rejects["row"].tolist() == [2, 3, 4, 5]
+    assert rejects["Customer ID"].tolist() == [2, 3, 4, 5]
+    assert rejects["error"].iloc[0].startswith("Age:")
+    assert rejects["error"].iloc[2].count(";") == 2
+    assert rejects["error"].iloc[3].startswith("Purchase Amount (USD):")
+
+
+def test_score_file_writes_output_for_empty_input(tmp_path):
+    source = tmp_path / "empty.csv"
+    source.write_text(",".join(["Customer ID", *PROFILE_COLUMNS]) + "\n")
+    output = tmp_path / "scores.parquet"
+
+    stats = score_file(source, output)
+
+    scored = pd.read_parquet(output)
+    assert stats["rows"] == stats["rejected"] == 0
+    assert list(scored.columns) == ["Customer ID", "predicted_cluster", "cluster_name"]
+    assert scored.empty
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from pipelines.train import train
+from pipelines.train.sweep import main, report, sweep
+
+
+@pytest.fixture(autouse=True)
+def feature_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(train, "FEATURE_CACHE_DIR", tmp_path / "cache")
+
+
+def test_sweep_picks_k_by_sampled_silhouette():
+    summary = sweep(k_values=range(5, 9), workers=2, sample_size=1000)
+    result = report(summary)
+
+    assert [row["k"] for row in result["results"]] == [5, 6, 7, 8]
+    assert result["sample_size"] == 1000
+    best = max(result["results"], key=lambda row: row["silhouette"])
+    assert result["best_k"] == best["k"] == summary["best_model"].n_clusters
+
+    # inertia 는 k 가 커질수록 줄어든다
+    inertias = [row["inertia"] for row in result["results"]]
+    assert inertias == sorted(inertias, reverse=True)
+
+    json.dumps(result)
+
+
+def test_sweep_cli_writes_report(tmp_path):
+    report_path = tmp_path / "sweep.json"
+    main(
+        ["--k-min", "6", "--k-max", "7", "--workers", "2", "--report", str(report_path)]
+    )
+
+    saved = json.loads(report_path.read_text(encoding="utf-8"))
+    assert {row["k"] for row in saved["results"]} == {6, 7}
@@ -0,0 +1,55 @@
+import pandas as pd
+
+from pipelines.synthetic import generate
+from pipelines.synthetic.generate import (
+    CATEGORY_COLUMNS,
+    fit_profile,
+    generate_frame,
+    write_csv,
+)
+from pipelines.train.train import DEFAULT_DATA_PATH, FEATURE_COLUMNS
+
+
+def test_same_seed_and_block_size_give_same_rows(monkeypatch, tmp_path):
+    profile = fit_profile()
+    # 5000행이 블록 5개로 나뉘도록 블록 크기를 줄인다
+    monkeypatch.setattr(generate, "BLOCK_SIZE", 1000)
+    first = generate_frame(5000, seed=7, profile=profile)
+    assert generate_frame(5000, seed=7, profile=profile).equals(first)
+    assert not generate_frame(5000, seed=8, profile=profile).equals(first)
+
+    # 블록 단위로 이어 쓴 CSV 도 한 번에 만든 프레임과 같다
+    path = tmp_path / "synthetic.csv"
+    write_csv(path, 5000, seed=7, profile=profile)
+    pd.testing.assert_frame_equal(pd.read_csv(path), first, check_dtype=False)
+
+    # 블록 크기가 바뀌면 블록 경계와 난수 흐름이 달라진다
+    monkeypatch.setattr(generate, "BLOCK_SIZE", 5000)
+    assert not generate_frame(5000, seed=7, profile=profile).equals(first)
+
+
+def test_synthetic_data_matches_source_distribution():
+    source = pd.read_csv(DEFAULT_DATA_PATH, usecols=FEATURE_COLUMNS)
+    synthetic = generate_frame(200_000, seed=0, profile=fit_profile())
+
+    for column in CATEGORY_COLUMNS:
+        expected = source[column].value_counts(normalize=True)
+        actual = synthetic[column].value_counts(normalize=True)
+        assert set(actual.index) == set(expected.index)
+        assert (actual - expected).abs().max() < 0.01
+
+    for column in ("Age", "Purchase Amount (USD)"):
+        assert abs(synthetic[column].mean() - source[column].mean()) < 0.5
+        assert synthetic[column].between(
+            source[column].min(), source[column].max()
+        ).all()
+
+
+def test_write_csv_is_readable_by_training(tmp_path):
+    path = tmp_path / "synthetic.csv"
+    stats = write_csv(path, 2500, seed=1)
+
+    df = pd.read_csv(path)
+    assert stats["rows"] == len(df) == 2500
+    assert df["Customer ID"].is_unique
+    assert set(FEATURE_COLUMNS) <= set(df.columns)
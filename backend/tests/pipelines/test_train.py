@@ -0,0 +1,70 @@
+import joblib
+import numpy as np
+import pandas as pd
+
+from pipelines.train import train
+from pipelines.train.feature_cache import load_or_build
+from pipelines.train.train import (
+    DEFAULT_DATA_PATH,
+    preprocess,
+    train_save_model_streaming,
+)
+from serving.models.registry import load_analyzer
+
+
+def _artifact_paths(directory):
+    return {
+        "model_path": directory / "model.pkl",
+        "scaler_path": directory / "scaler.pkl",
+        "columns_path": directory / "columns.pkl",
+        "bundle_path": directory / "model.bundle",
+    }
+
+
+def test_streaming_training_matches_full_preprocessing(tmp_path):
+    # 청크 크기를 작게 잡아 청크마다 범주 구성이 달라지는 경우까지 확인
+    paths = _artifact_paths(tmp_path)
+    train_save_model_streaming(chunk_size=250, **paths)
+
+    full, _ = preprocess(pd.read_csv(DEFAULT_DATA_PATH))
+    columns = joblib.load(paths["columns_path"])
+    scaler = joblib.load(paths["scaler_path"])
+
+    assert list(columns) == list(full.columns)
+    np.testing.assert_allclose(scaler.mean_, full.mean().to_numpy())
+    np.testing.assert_allclose(scaler.scale_, full.std(ddof=0).to_numpy())
+
+    # 서빙 쪽이 그대로 로드할 수 있는 아티팩트여야 한다
+    for mode in ("sklearn", "compiled"):
+        analyzer = load_analyzer(tmp_path, mode=mode)
+        labels = analyzer.predict_labels(pd.read_csv(DEFAULT_DATA_PATH).head(200))
+        assert set(labels) <= set(range(7))
+
+
+def test_feature_cache_is_keyed_by_file_content(tmp_path, monkeypatch):
+    monkeypatch.setattr(train, "FEATURE_CACHE_DIR", tmp_path / "cache")
+    data_path = tmp_path / "data.csv"
+    data_path.write_bytes(DEFAULT_DATA_PATH.read_bytes())
+
+    def build(path):
+        return train._read_and_preprocess(path)
+
+    version = train.PREPROCESS_VERSION
+    first, meta, hit = load_or_build(data_path, build, version, tmp_path / "cache")
+    assert not hit
+    cached, cached_meta, hit = load_or_build(
+        data_path, build, version, tmp_path / "cache"
+    )
+    assert hit and cached_meta == meta
+    pd.testing.assert_frame_equal(cached, first)
+
+    features, encoder = train.load_features(data_path)
+    pd.testing.assert_frame_equal(features, first)
+    assert encoder.to_dict() == meta["encoder"]
+
+    # 전처리 버전이나 파일 내용이 바뀌면 다시 만든다
+    assert not load_or_build(data_path, build, version + 1, tmp_path / "cache")[2]
+    with open(data_path, "a", encoding="utf-8") as f:
+        f.write(DEFAULT_DATA_PATH.read_text(encoding="utf-8").splitlines()[1] + "\n")
+    rebuilt, _, hit = load_or_build(data_path, build, version, tmp_path / "cache")
+    assert not hit and len(rebuilt) == len(first) + 1
@@ -0,0 +1,118 @@
+import numpy as np
+
+from config.settings import setting
+from rag import retriever
+from rag.ann import IVFIndex, PersonaIndex
+from rag.persona_cache import PersonaMatrix
+
+
+def _rows(embeddings, prefix="segment"):
+    return [
+        {"cluster_name": f"{prefix}_{idx}", "embedding": vector}
+        for idx, vector in enumerate(embeddings)
+    ]
+
+
+def test_ivf_matches_exact_search_when_probing_every_list(tmp_path):
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(500, 16)).astype(np.float32)
+    matrix = PersonaMatrix.from_rows(_rows(embeddings))
+    keys = [f"segment_{idx}" for idx in range(500)]
+    index = IVFIndex.build(keys, embeddings, nlist=8)
+    query = rng.normal(size=16)
+
+    expected = [(m["cluster_name"], m["score"]) for m in matrix.search(query, 5)]
+    found = index.search(query, 5, nprobe=index.nlist)
+    assert [key for key, _ in found] == [key for key, _ in expected]
+    np.testing.assert_allclose([s for _, s in found], [s for _, s in expected], 1e-5)
+
+    # 저장 후 다시 읽어도 같은 결과
+    index.save(tmp_path / "index.npz")
+    loaded = IVFIndex.load(tmp_path / "index.npz")
+    assert len(loaded) == 500 and loaded.search(query, 5, index.nlist) == found
+
+    # 증분 갱신: 같은 키는 교체되고, 지운 키는 더 이상 나오지 않는다
+    loaded.add(["segment_0"], [query])
+    assert loaded.search(query, 1, nprobe=1)[0][0] == "segment_0"
+    loaded.remove(["segment_0"])
+    assert len(loaded) == 499
+    assert "segment_0" not in [key for key, _ in loaded.search(query, 10, 8)]
+
+
+def test_persona_index_syncs_changes_and_persists(tmp_path):
+    rng = np.random.default_rng(1)
+    embeddings = rng.normal(size=(300, 8))
+    path = tmp_path / "personas.npz"
+    index = PersonaIndex(path, nlist=4, background=False)
+
+    first = PersonaMatrix.from_rows(_rows(embeddings))
+    snapshot = index.sync(first)
+    assert index.rebuilds == 1 and path.exists()
+    assert index.sync(first) is snapshot  # 같은 행렬이면 다시 맞추지 않는다
+
+    # 재시작: 디스크에서 읽고 바뀐 페르소나 하나와 새 페르소나 하나만 반영한다
+    changed = embeddings.copy()
+    changed[3] = -changed[3]
+    rows = _rows(changed) + [{"cluster_name": "new", "embedding": rng.normal(size=8)}]
+    restarted = PersonaIndex(path, nlist=4, background=False)
+    matrix = PersonaMatrix.from_rows(rows[1:])  # segment_0 은 삭제됨
+    results = restarted.search(matrix, changed[3], top_k=1, nprobe=4)
+    assert restarted.rebuilds == 0 and restarted.updates == 1
+    assert results[0]["cluster_name"] == "segment_3"
+    assert len(restarted.index) == 300
+
+    # store 의 upsert 경로. 공개된 인덱스는 고치지 않고 사본을 저장한다
+    published = restarted.index
+    restarted.upsert([{"cluster_name": "segment_5", "embedding": changed[3] * 2}])
+    assert len(IVFIndex.load(path)) == 300
+    assert restarted.index is not published
+    assert np.allclose(
+        published.vectors_for(["segment_5"])[0], matrix.embeddings[4], atol=1e-6
+    )
+
+
+def test_search_with_older_matrix_never_mixes_snapshots():
+    rng = np.random.default_rng(3)
+    embeddings = rng.normal(size=(60, 8))
+    index = PersonaIndex(None, nlist=4, background=False)
+    rows = [
+        {"cluster_name": f"s{idx}", "embedding": vector}
+        for idx, vector in enumerate(embeddings)
+    ]
+    old = PersonaMatrix.from_rows(rows)
+    old_snapshot = index.sync(old)
+
+    # 다른 스레드가 행이 지워지고 순서가 바뀐 새 행렬로 맞춘다
+    new = PersonaMatrix.from_rows(rows[::-1][:40])
+    index.sync(new)
+    assert old_snapshot.index is not index.index
+    assert len(old_snapshot.index) == 60
+
+    # 이전 행렬로 검색하면 새 키 -> 행 번호를 섞지 않고 정확 검색으로 돌린다(None)
+    assert index.search(old, embeddings[11], top_k=3, nprobe=4) is None
+    found = index.search(new, embeddings[38], top_k=1, nprobe=4)
+    assert found[0]["cluster_name"] == "s38"
+
+
+def test_retriever_uses_ann_index_above_threshold(tmp_path, monkeypatch):
+    rng = np.random.default_rng(2)
+    rows = _rows(rng.normal(size=(200, 8)))
+    matrix = PersonaMatrix.from_rows(rows)
+    monkeypatch.setattr(retriever, "persona_index", PersonaIndex(None, nlist=4))
+    monkeypatch.setattr(setting, "rag_ann_index", "ivf")
+    monkeypatch.setattr(setting, "rag_ann_nprobe", 4)
+
+    monkeypatch.setattr(setting, "rag_ann_min_personas", 1000)
+    exact = retriever.search_personas(matrix, rows[7]["embedding"], 3)
+    assert retriever.persona_index.index is None
+
+    # 첫 조회는 학습을 백그라운드로 넘기고 정확 검색으로 답한다
+    monkeypatch.setattr(setting, "rag_ann_min_personas", 100)
+    first = retriever.search_personas(matrix, rows[7]["embedding"], 3)
+    assert first == exact
+    retriever.persona_index.wait(timeout=30)
+    assert len(retriever.persona_index.index) == 200
+
+    approx = retriever.search_personas(matrix, rows[7]["embedding"], 3)
+    assert [m["cluster_name"] for m in approx] == [m["cluster_name"] for m in exact]
+    assert retriever.persona_index.rebuilds == 1
@@ -0,0 +1,140 @@
+import asyncio
+import time
+
+import numpy as np
+
+from config.settings import setting
+from rag import retriever
+from rag.providers import HashingProvider
+from services import supabase_client
+from services.local_supabase import AsyncLocalSupabaseClient, LocalSupabaseClient
+
+TITLES = ("충성도 높은 VIP 고객", "가격에 민감한 고객", "신규 고객", "휴면 고객")
+
+
+class SlowProvider(HashingProvider):
+    """OpenAI 왕복처럼 delay 초 기다렸다가 임베딩을 돌려준다. 호출 구간을 기록한다."""
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__(dim=64)
+        self.delay = delay
+        self.calls: list[tuple[float, float]] = []
+
+    async def aembed_query(self, text):
+        start = time.perf_counter()
+        await asyncio.sleep(self.delay)
+        self.calls.append((start, time.perf_counter()))
+        return self.embed_query(text)
+
+
+def _setup(monkeypatch, delay=0.0, rpc_functions=("match_personas",)):
+    provider = SlowProvider(delay)
+    client = LocalSupabaseClient(rpc_functions=rpc_functions)
+    client.table("personas").upsert(
+        [
+            {
+                "title": title,
+                "description": f"{title} 설명",
+                "cluster_name": f"segment_{idx}",
+                "embedding": provider.embed_query(f"persona: {title}"),
+            }
+            for idx, title in enumerate(TITLES)
+        ],
+        on_conflict="cluster_name",
+    ).execute()
+    client.reset_counters()
+
+    async def get_async_client():
+        return AsyncLocalSupabaseClient(client, latency=delay)
+
+    monkeypatch.setattr(retriever, "configured_embedding_provider", lambda: provider)
+    monkeypatch.setattr(retriever, "get_supabase_client", lambda: client)
+    monkeypatch.setattr(retriever, "get_async_supabase_client", get_async_client)
+    monkeypatch.setattr(retriever, "_server_search_disabled_until", 0.0)
+    retriever.invalidate_persona_cache()
+    client.provider = provider
+    return client
+
+
+def test_async_retrieve_matches_sync(monkeypatch):
+    _setup(monkeypatch)
+
+    for title in TITLES:
+        expected = retriever.retrieve_personas(persona_name=title, top_k=3)
+        retriever.invalidate_persona_cache()
+        matches = asyncio.run(retriever.aretrieve_personas(persona_name=title, top_k=3))
+        assert [m["cluster_name"] for m in matches] == [
+            m["cluster_name"] for m in expected
+        ]
+        np.testing.assert_allclose(
+            [m["score"] for m in matches], [m["score"] for m in expected], atol=1e-6
+        )
+    retriever.invalidate_persona_cache()
+
+
+def test_embedding_and_fetch_overlap_and_share_one_load(monkeypatch):
+    client = _setup(monkeypatch, delay=0.05)
+    fetches: list[tuple[float, float]] = []
+    afetch_personas = retriever.afetch_personas
+
+    async def recording_fetch():
+        start = time.perf_counter()
+        rows = await afetch_personas()
+        fetches.append((start, time.perf_counter()))
+        return rows
+
+    monkeypatch.setattr(retriever, "afetch_personas", recording_fetch)
+
+    async def main():
+        return await asyncio.gather(
+            *(retriever.aretrieve_personas(persona_name=title) for title in TITLES)
+        )
+
+    results = asyncio.run(main())
+    assert [r[0]["cluster_name"] for r in results] == [
+        f"segment_{idx}" for idx in range(len(TITLES))
+    ]
+    # 동시에 들어온 질의들이 페르소나 조회 하나를 함께 기다린다
+    assert client.requests == 1 and len(fetches) == 1
+    # 임베딩이 페르소나 조회가 끝나기 전에 시작되고, 조회도 임베딩이 끝나기 전에 시작된다
+    [(fetch_start, fetch_end)] = fetches
+    for embed_start, embed_end in client.provider.calls:
+        assert embed_start < fetch_end and fetch_start < embed_end
+    retriever.invalidate_persona_cache()
+
+
+def test_async_server_mode_and_fallback(monkeypatch):
+    client = _setup(monkeypatch)
+    monkeypatch.setattr(setting, "rag_search_mode", "server")
+
+    matches = asyncio.run(retriever.aretrieve_personas(persona_name="신규 고객"))
+    assert matches[0]["cluster_name"] == "segment_2"
+    assert client.requests == 1
+
+    client = _setup(monkeypatch, rpc_functions=())
+    matches = asyncio.run(retriever.aretrieve_personas(persona_name="휴면 고객"))
+    assert matches[0]["cluster_name"] == "segment_3"
+    # 실패한 RPC 1회 + 테이블 조회 1회
+    assert client.requests == 1
+    retriever.invalidate_persona_cache()
+
+
+def test_async_supabase_client_is_reused_per_loop_and_closed(monkeypatch):
+    monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "service-role-key")
+
+    async def main():
+        first, second = await asyncio.gather(
+            supabase_client.get_async_supabase_client(),
+            supabase_client.get_async_supabase_client(),
+        )
+        assert first is second
+        assert await supabase_client.get_async_supabase_client() is first
+        await supabase_client.close_async_supabase_client()
+        return first
+
+    client = asyncio.run(main())
+    assert client.postgrest.session.is_closed
+    # 다른 이벤트 루프는 자기 연결 풀을 새로 만든다
+    other = asyncio.run(main())
+    assert other is not client
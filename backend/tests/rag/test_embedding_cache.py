@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from rag import retriever
+from rag.embedding_cache import EmbeddingCache
+
+
+def test_lru_evicts_by_size_and_disk_survives_restart(tmp_path):
+    path = tmp_path / "embeddings.sqlite"
+    # float32 4차원 벡터 = 16 바이트, 두 개까지만 메모리에 둔다
+    cache = EmbeddingCache(path, max_bytes=32)
+    for idx in range(3):
+        cache.put("model", f"text {idx}", [idx] * 4)
+
+    assert cache.stats()["entries"] == 2 and cache.evictions == 1
+    # 메모리에서 밀려난 항목은 디스크에서 읽는다
+    np.testing.assert_array_equal(cache.get("model", "text 0"), [0.0] * 4)
+    assert cache.disk_hits == 1
+
+    # 새 프로세스(재시작/다른 워커)도 같은 파일을 읽는다
+    restarted = EmbeddingCache(path, max_bytes=32)
+    np.testing.assert_array_equal(restarted.get("model", "text 2"), [2.0] * 4)
+    # 공백 차이는 같은 질의로, 모델이 다르면 다른 키로 본다
+    assert restarted.get("model", "  text\n2 ") is not None
+    assert restarted.get("other-model", "text 2") is None
+    assert restarted.stats()["misses"] == 1
+
+
+def test_embed_query_reuses_cached_vectors(tmp_path, monkeypatch):
+    calls = []
+
+    class FakeProvider:
+        name = "fake-model"
+        cacheable = True
+
+        def embed_query(self, text):
+            calls.append(text)
+            return [0.5, 0.25, 1.0]
+
+    monkeypatch.setattr(
+        retriever, "configured_embedding_provider", lambda: FakeProvider()
+    )
+    monkeypatch.setattr(
+        retriever, "query_embedding_cache", EmbeddingCache(tmp_path / "e.sqlite")
+    )
+
+    first = retriever.embed_query("profile:\n- Age: 30")
+    second = retriever.embed_query("profile:\n- Age: 30")
+    assert calls == ["profile:\n- Age: 30"]
+    assert first is second
+    assert first.dtype == np.float32 and not first.flags.writeable
+    assert retriever.query_embedding_cache.stats()["memory_hits"] == 1
+
+
+def test_async_embed_query_keeps_sqlite_off_the_event_loop(tmp_path, monkeypatch):
+    class FakeProvider:
+        name = "fake-model"
+        cacheable = True
+
+        async def aembed_query(self, text):
+            return [0.5, 0.25, 1.0]
+
+    cache = EmbeddingCache(tmp_path / "e.sqlite")
+    disk_threads = []
+    for name in ("_read_disk", "_write_disk"):
+        original = getattr(cache, name)
+
+        def spy(*args, _original=original):
+            disk_threads.append(threading.get_ident())
+            return _original(*args)
+
+        monkeypatch.setattr(cache, name, spy)
+    monkeypatch.setattr(
+        retriever, "configured_embedding_provider", lambda: FakeProvider()
+    )
+    monkeypatch.setattr(retriever, "query_embedding_cache", cache)
+
+    async def main():
+        first = await retriever.aembed_query("profile:\n- Age: 30")
+        second = await retriever.aembed_query("profile:\n- Age: 30")
+        return first, second, threading.get_ident()
+
+    first, second, loop_thread = asyncio.run(main())
+    assert first is second
+    # 미스 때 디스크 읽기 1번 + 쓰기 1번, 두 번째는 메모리 적중이라 디스크를 보지 않는다
+    assert len(disk_threads) == 2 and loop_thread not in disk_threads
+    assert cache.stats()["memory_hits"] == 1 and cache.stats()["misses"] == 1
@@ -0,0 +1,109 @@
+import json
+
+import numpy as np
+import pytest
+
+from rag import persona_cache, retriever
+from rag.persona_cache import PersonaCache, PersonaMatrix
+from rag.retriever import rank_personas
+
+
+def _personas(n: int, dim: int = 16, seed: int = 0) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "title": f"persona {idx}",
+            "description": "",
+            "cluster_name": f"segment_{idx}",
+            "embedding": rng.normal(size=dim).tolist(),
+        }
+        for idx in range(n)
+    ]
+
+
+def test_matrix_search_matches_rank_personas():
+    personas = _personas(50)
+    personas[3]["embedding"] = [0.0] * 16  # 길이 0 벡터는 -1 점
+    personas[7]["embedding"] = None  # 임베딩 없는 행은 후보에서 제외
+    query = np.random.default_rng(1).normal(size=16).tolist()
+    expected = rank_personas(query, personas, top_k=50)
+
+    # pgvector 컬럼은 문자열로 온다
+    rows = [dict(persona) for persona in personas]
+    rows[9]["embedding"] = json.dumps(rows[9]["embedding"])
+    matrix = PersonaMatrix.from_rows(rows)
+    actual = matrix.search(query, top_k=50)
+
+    assert len(matrix) == 49
+    assert [m["cluster_name"] for m in actual] == [
+        m["cluster_name"] for m in expected
+    ]
+    assert [m["score"] for m in actual] == pytest.approx(
+        [m["score"] for m in expected], abs=1e-5
+    )
+
+
+def test_cache_reuses_matrix_until_ttl_or_invalidation(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(persona_cache.time, "monotonic", lambda: now[0])
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return _personas(3)
+
+    cache = PersonaCache(loader, ttl=60)
+    first = cache.get()
+    assert cache.get() is first and len(calls) == 1
+
+    cache.invalidate()
+    assert cache.get() is not first and len(calls) == 2
+
+    now[0] += 61
+    cache.get()
+    assert len(calls) == 3
+    assert cache.stats()["hits"] == 1
+
+
+def test_retrieve_personas_fetches_once(monkeypatch):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return _personas(7)
+
+    monkeypatch.setattr(retriever, "fetch_personas", fetch)
+    monkeypatch.setattr(retriever, "embed_query", lambda text: [1.0] * 16)
+    retriever.invalidate_persona_cache()
+
+    first = retriever.retrieve_personas(query_text="a", top_k=3)
+    second = retriever.retrieve_personas(query_text="b", top_k=3)
+    assert first == second and len(first) == 3
+    assert len(calls) == 1
+
+    retriever.invalidate_persona_cache()
+
+
+def test_search_many_matches_search_in_chunks():
+    rng = np.random.default_rng(3)
+    rows = [
+        {"cluster_name": f"segment_{idx}", "embedding": vector}
+        for idx, vector in enumerate(rng.normal(size=(50, 8)))
+    ]
+    rows[4]["embedding"] = [0.0] * 8
+    matrix = PersonaMatrix.from_rows(rows)
+    queries = rng.normal(size=(7, 8))
+    queries[2] = 0.0
+    top_ks = [1, 3, 5, 2, 50, 4, 1]
+
+    # 50 페르소나 x 2 질의씩 나눠 곱한다
+    batched = matrix.search_many(queries, top_ks, max_scores=100)
+    for matches, query, top_k in zip(batched, queries, top_ks):
+        single = matrix.search(query, top_k)
+        # 행렬-행렬 곱과 행렬-벡터 곱은 float32 반올림만 다르다
+        assert [m["cluster_name"] for m in matches] == [
+            m["cluster_name"] for m in single
+        ]
+        np.testing.assert_allclose(
+            [m["score"] for m in matches], [m["score"] for m in single], atol=1e-6
+        )
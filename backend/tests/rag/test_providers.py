@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from rag import embeddings, retriever
+from rag.providers import HashingProvider, get_embedding_provider
+
+
+def test_hashing_provider_is_deterministic_and_normalized():
+    provider = HashingProvider(dim=256)
+    first = provider.embed_query("충성도 높은 VIP 고객")
+
+    assert first == HashingProvider(dim=256).embed_query("충성도 높은 VIP 고객")
+    assert len(first) == 256
+    assert np.linalg.norm(first) == pytest.approx(1.0)
+    assert provider.embed_documents(["충성도 높은 VIP 고객"]) == [first]
+    assert not any(provider.embed_query("!!!"))  # 토큰이 없으면 0 벡터
+
+    with pytest.raises(ValueError):
+        get_embedding_provider("unknown")
+
+
+def test_offline_pipeline_retrieves_matching_persona(monkeypatch):
+    provider = HashingProvider(dim=512)
+    monkeypatch.setattr(embeddings, "configured_embedding_provider", lambda: provider)
+    monkeypatch.setattr(retriever, "configured_embedding_provider", lambda: provider)
+
+    # rag/store.py 가 Supabase 에 저장하는 것과 같은 행을 로컬에서 만든다
+    docs, vectors = embeddings.run_embedding_task()
+    rows = [
+        {"title": doc.metadata["name"], "embedding": vector}
+        for doc, vector in zip(docs, vectors)
+    ]
+    monkeypatch.setattr(retriever, "fetch_personas", lambda: rows)
+    retriever.invalidate_persona_cache()
+
+    for doc in docs:
+        best = retriever.retrieve_best_persona(
+            persona_name=doc.metadata["name"],
+            persona_description=doc.metadata["description"],
+        )
+        assert best["title"] == doc.metadata["name"]
+
+    retriever.invalidate_persona_cache()
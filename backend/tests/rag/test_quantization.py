@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from rag.persona_cache import PersonaCache, PersonaMatrix
+from rag.quantization import QuantizedMatrix
+
+
+def _assert_same(found, expected):
+    # 후보는 원래 정밀도로 다시 점수를 내므로 순위와 점수가 같다 (BLAS 반올림 차이만 허용)
+    assert [m["cluster_name"] for m in found] == [m["cluster_name"] for m in expected]
+    np.testing.assert_allclose(
+        [m["score"] for m in found], [m["score"] for m in expected], atol=1e-6
+    )
+
+
+def _rows(n=400, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, dim))
+    embeddings = centers[rng.integers(20, size=n)] + rng.normal(size=(n, dim))
+    rows = [
+        {"cluster_name": f"segment_{idx}", "embedding": vector}
+        for idx, vector in enumerate(embeddings)
+    ]
+    rows[5]["embedding"] = np.zeros(dim)
+    return rows, rng.normal(size=(10, dim))
+
+
+@pytest.mark.parametrize("kind, ratio", [("float16", 2), ("int8", 4)])
+def test_quantized_search_rescored_matches_exact(kind, ratio):
+    rows, queries = _rows()
+    exact = PersonaMatrix.from_rows(rows)
+    quantized = exact.quantize(kind)
+
+    assert quantized.quantized.kind == kind
+    assert quantized.candidate_nbytes <= exact.candidate_nbytes / ratio + 400 * 4
+    for query in queries:
+        _assert_same(quantized.search(query, 5), exact.search(query, 5))
+    _assert_same(quantized.search(np.zeros(32), 3), exact.search(np.zeros(32), 3))
+    for found, query in zip(quantized.search_many(queries, [3] * 10), queries):
+        _assert_same(found, exact.search(query, 3))
+
+
+def test_int8_codes_keep_per_vector_scale():
+    vectors = np.array([[0.5, -0.25, 0.0], [0.0, 0.0, 0.0]], dtype=np.float32)
+    quantized = QuantizedMatrix.from_embeddings(vectors, "int8")
+
+    np.testing.assert_array_equal(quantized.codes[0], [127, -64, 0])
+    np.testing.assert_allclose(
+        quantized.codes[0] * quantized.scales[0], vectors[0], atol=0.01
+    )
+    assert quantized.scales[1] == 0
+    with pytest.raises(ValueError):
+        QuantizedMatrix.from_embeddings(vectors, "int4")
+
+
+def test_persona_cache_quantizes_loaded_matrix():
+    rows, queries = _rows()
+    cache = PersonaCache(lambda: rows, ttl=60, quantization="int8", spill=False)
+
+    matrix = cache.get()
+    assert matrix.quantized is not None
+    assert cache.stats()["candidate_bytes"] == matrix.quantized.nbytes
+    exact = PersonaMatrix.from_rows(rows)
+    _assert_same(matrix.search(queries[0], 1), exact.search(queries[0], 1))
@@ -0,0 +1,38 @@
+import numpy as np
+
+from benchmarks.reference import legacy_rank
+from rag.ranking import top_k_indices
+from rag.retriever import EMBEDDING_COLUMN, rank_personas
+
+
+def test_rank_personas_matches_legacy_ranking():
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(300, 32))
+    embeddings[10] = embeddings[200]  # 동점: 원래 순서(10 이 먼저)를 유지해야 한다
+    embeddings[20] = 0.0
+    personas = [
+        {"cluster_name": f"segment_{idx}", EMBEDDING_COLUMN: vector.tolist()}
+        for idx, vector in enumerate(embeddings)
+    ]
+    personas.append({"cluster_name": "empty", EMBEDDING_COLUMN: []})
+
+    for query in (embeddings[200].tolist(), rng.normal(size=32).tolist()):
+        for top_k in (1, 5, 301, 1000):
+            expected = legacy_rank(query, personas, top_k)
+            actual = rank_personas(query, personas, top_k=top_k)
+            assert [m["cluster_name"] for m in actual] == [
+                m["cluster_name"] for m in expected
+            ]
+            np.testing.assert_allclose(
+                [m["score"] for m in actual], [m["score"] for m in expected]
+            )
+
+    assert rank_personas([1.0] * 32, [], top_k=3) == []
+
+
+def test_top_k_indices_breaks_ties_by_index():
+    scores = np.array([0.5, 0.9, 0.5, 0.9, 0.1, 0.5])
+    assert top_k_indices(scores, 3).tolist() == [1, 3, 0]
+    assert top_k_indices(scores, 4).tolist() == [1, 3, 0, 2]
+    assert top_k_indices(scores, 10).tolist() == [1, 3, 0, 2, 5, 4]
+    assert top_k_indices(scores, 0).tolist() == []
@@ -0,0 +1,63 @@
+import numpy as np
+
+from config.settings import setting
+from rag import retriever
+from rag.providers import HashingProvider
+from services.local_supabase import LocalSupabaseClient
+
+TITLES = ("충성도 높은 VIP 고객", "가격에 민감한 고객", "신규 고객", "휴면 고객")
+
+
+def _setup(monkeypatch, rpc_functions=("match_personas",)):
+    provider = HashingProvider(dim=64)
+    client = LocalSupabaseClient(rpc_functions=rpc_functions)
+    client.table("personas").upsert(
+        [
+            {
+                "title": title,
+                "description": f"{title} 설명",
+                "cluster_name": f"segment_{idx}",
+                "embedding": provider.embed_query(f"persona: {title}"),
+            }
+            for idx, title in enumerate(TITLES)
+        ],
+        on_conflict="cluster_name",
+    ).execute()
+    client.reset_counters()
+    monkeypatch.setattr(retriever, "configured_embedding_provider", lambda: provider)
+    monkeypatch.setattr(retriever, "get_supabase_client", lambda: client)
+    monkeypatch.setattr(retriever, "_server_search_disabled_until", 0.0)
+    retriever.invalidate_persona_cache()
+    return client
+
+
+def test_server_mode_returns_client_ranking_with_less_transfer(monkeypatch):
+    client = _setup(monkeypatch)
+
+    local = retriever.retrieve_personas(persona_name="신규 고객", top_k=3)
+    client_bytes = client.bytes_received
+
+    monkeypatch.setattr(setting, "rag_search_mode", "server")
+    client.reset_counters()
+    server = retriever.retrieve_personas(persona_name="신규 고객", top_k=3)
+
+    assert [m["cluster_name"] for m in server] == [m["cluster_name"] for m in local]
+    np.testing.assert_allclose(
+        [m["score"] for m in server], [m["score"] for m in local], atol=1e-5
+    )
+    assert set(server[0]) == {"title", "description", "cluster_name", "score"}
+    assert client.requests == 1 and client.bytes_received < client_bytes / 4
+    retriever.invalidate_persona_cache()
+
+
+def test_server_mode_falls_back_when_function_is_missing(monkeypatch):
+    client = _setup(monkeypatch, rpc_functions=())
+    monkeypatch.setattr(setting, "rag_search_mode", "server")
+
+    best = retriever.retrieve_best_persona(persona_name="휴면 고객")
+    assert best["cluster_name"] == "segment_3"
+    # 실패한 RPC 1회 + 테이블 조회 1회. 재시도 간격 동안은 RPC 를 다시 부르지 않는다
+    assert client.requests == 1
+    retriever.retrieve_best_persona(persona_name="신규 고객")
+    assert client.requests == 1
+    retriever.invalidate_persona_cache()
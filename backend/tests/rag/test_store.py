@@ -0,0 +1,92 @@
+import importlib
+
+from langchain_core.documents import Document
+
+from rag import providers, store
+from rag.embeddings import build_persona_documents
+from rag.providers import HashingProvider
+from services.local_supabase import LocalSupabaseClient
+
+
+class FlakyProvider(HashingProvider):
+    """첫 호출은 실패하고, 임베딩한 텍스트 수를 센다."""
+
+    def __init__(self):
+        super().__init__(dim=32)
+        self.calls = 0
+        self.embedded = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.calls == 1:
+            raise ConnectionError("rate limited")
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+def _sync(client, provider, docs, **kwargs):
+    return store.sync_personas(
+        docs=docs,
+        provider=provider,
+        client=client,
+        batch_size=3,
+        workers=2,
+        backoff=0,
+        chunk_size=4,
+        **kwargs,
+    )
+
+
+def test_sync_embeds_only_new_or_changed_personas():
+    client = LocalSupabaseClient()
+    provider = FlakyProvider()
+    docs = build_persona_documents()
+
+    first = _sync(client, provider, docs)
+    assert (first["new"], first["embedded"], first["upserted"]) == (7, 7, 7)
+    # 실패한 배치 1회 재시도 + 배치 3개
+    assert provider.calls == 4
+    stored = client.table("personas").select("*").execute().data
+    assert len(stored) == 7 and all(row["content_hash"] for row in stored)
+
+    # 그대로 다시 돌리면 임베딩하지 않는다
+    second = _sync(client, provider, docs)
+    assert (second["unchanged"], second["embedded"]) == (7, 0)
+    assert provider.embedded == 7
+
+    # 한 페르소나만 바꾸고, 하나는 새로 넣고, 하나는 문서에서 뺀다
+    changed = docs[1:]
+    changed[0] = Document(
+        page_content=changed[0].page_content + " (수정)", metadata=changed[0].metadata
+    )
+    changed.append(
+        Document(
+            page_content="유형: 신규",
+            metadata={"segment_id": 7, "name": "신규", "description": "새 페르소나"},
+        )
+    )
+    client.reset_counters()
+    dry = _sync(client, provider, changed, dry_run=True)
+    assert (dry["new"], dry["changed"], dry["stale"], dry["embedded"]) == (1, 1, 1, 0)
+    assert dry["keys"] == {
+        "new": ["segment_7"],
+        "changed": ["segment_1"],
+        "stale": ["segment_0"],
+    }
+    assert client.requests == 1  # 해시 조회만
+
+    third = _sync(client, provider, changed)
+    assert third["embedded"] == 2 and provider.embedded == 9
+    assert _sync(client, provider, changed)["embedded"] == 0
+
+    # 모델(제공자)이 바뀌면 해시가 달라져 모두 다시 임베딩한다
+    assert _sync(client, HashingProvider(dim=16), changed)["changed"] == 7
+
+
+def test_importing_store_makes_no_embedding_calls(monkeypatch):
+    def fail():
+        raise AssertionError("embedding provider used at import time")
+
+    monkeypatch.setattr(providers, "configured_embedding_provider", fail)
+    monkeypatch.setattr(store, "configured_embedding_provider", fail)
+    importlib.reload(store)
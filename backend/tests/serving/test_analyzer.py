@@ -0,0 +1,198 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from config.settings import setting
+from serving.models.analysis import CLUSTER_INFO, CustomerAnalyzer
+from serving.models.bundle import load_bundle, write_bundle
+from serving.models.lookup import ClusterLookupTable, verify_lookup_table
+
+DATA_PATH = setting.base_dir.parent.parent / "data" / "shopping_trends.csv"
+PROFILE_COLUMNS = [
+    "Age",
+    "Purchase Amount (USD)",
+    "Subscription Status",
+    "Frequency of Purchases",
+]
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return CustomerAnalyzer(
+        model_path=str(setting.model_path),
+        scaler_path=str(setting.scaler_path),
+        columns_path=str(setting.columns_path),
+    )
+
+
+@pytest.fixture(scope="module")
+def profiles():
+    df = pd.read_csv(DATA_PATH, usecols=PROFILE_COLUMNS)
+    return df[PROFILE_COLUMNS].to_dict(orient="records")
+
+
+def test_predict_many_matches_single_path(analyzer, profiles):
+    # 단건 경로는 느리므로 일정 간격으로 샘플링해 비교
+    sample = profiles[::13]
+
+    batch = analyzer.predict_many(sample)
+    single = [analyzer.predict_new_customer(profile) for profile in sample]
+
+    assert batch == single
+
+
+def test_predict_many_empty(analyzer):
+    assert analyzer.predict_many([]) == []
+
+
+def test_compiled_engine_matches_pickled_model(analyzer):
+    # 전체 데이터셋에서 compiled 경로와 피클된 scaler + KMeans 의 결과가 한 건도 다르지 않아야 한다
+    df = pd.read_csv(DATA_PATH, usecols=PROFILE_COLUMNS)
+
+    expected = analyzer.model.predict(
+        pd.DataFrame(
+            analyzer.scaler.transform(analyzer._encode_many(df)),
+            columns=analyzer.original_columns,
+        )
+    )
+    compiled = analyzer.engine.predict(df)
+
+    assert (compiled == expected).all()
+    assert analyzer.engine.predict_one(df.iloc[0].to_dict()) == expected[0]
+
+
+def test_compiled_mode_predict_new_customer():
+    compiled = CustomerAnalyzer(
+        model_path=str(setting.model_path),
+        scaler_path=str(setting.scaler_path),
+        columns_path=str(setting.columns_path),
+        mode="compiled",
+    )
+    profile = {
+        "Age": 30,
+        "Purchase Amount (USD)": 100.0,
+        "Subscription Status": "Yes",
+        "Frequency of Purchases": "Monthly",
+    }
+    reference = CustomerAnalyzer(
+        model_path=str(setting.model_path),
+        scaler_path=str(setting.scaler_path),
+        columns_path=str(setting.columns_path),
+    )
+
+    assert compiled.predict_new_customer(profile) == reference.predict_new_customer(
+        profile
+    )
+
+
+def test_lookup_table_matches_kmeans_on_dense_grid(analyzer):
+    table = ClusterLookupTable(analyzer.engine)
+    amounts = np.arange(0.0, 400.0, 0.5)
+
+    assert verify_lookup_table(table, analyzer._predict_labels_sklearn, amounts) == 0
+
+
+def test_lookup_mode_matches_dataset(analyzer, profiles):
+    lookup = CustomerAnalyzer(
+        model_path=str(setting.model_path),
+        scaler_path=str(setting.scaler_path),
+        columns_path=str(setting.columns_path),
+        mode="lookup",
+    )
+
+    expected = analyzer.predict_labels(profiles)
+    actual = [lookup.predict_new_customer(p)["predicted_cluster"] for p in profiles]
+
+    assert actual == expected.tolist()
+
+
+def test_lookup_mode_batch_path_uses_table(analyzer, profiles, monkeypatch):
+    lookup = CustomerAnalyzer(
+        model_path=str(setting.model_path),
+        scaler_path=str(setting.scaler_path),
+        columns_path=str(setting.columns_path),
+        mode="lookup",
+        verify_lookup=False,
+    )
+    expected = analyzer.predict_labels(profiles)
+
+    # POST /api/analysis 의 배치 경로(predict_many -> predict_labels)가 경계표만 쓴다
+    def compiled_predict(rows):
+        raise AssertionError("lookup mode should not fall back for in-table rows")
+
+    monkeypatch.setattr(lookup.engine, "predict", compiled_predict)
+    assert lookup.predict_labels(profiles).tolist() == expected.tolist()
+    assert [r["predicted_cluster"] for r in lookup.predict_many(profiles[:50])] == (
+        expected[:50].tolist()
+    )
+    monkeypatch.undo()
+
+    # 표 밖의 나이(소수)만 compiled 경로로 계산한다
+    odd = [{**profiles[0], "Age": 30.5}, profiles[1]]
+    assert lookup.predict_labels(odd).tolist() == analyzer.predict_labels(odd).tolist()
+
+
+def test_bundle_roundtrip_matches_joblib(analyzer, profiles, tmp_path):
+    bundle_path = write_bundle(
+        tmp_path / "model.bundle",
+        centroids=analyzer.model.cluster_centers_,
+        scaler_mean=analyzer.scaler.mean_,
+        scaler_scale=analyzer.scaler.scale_,
+        columns=analyzer.original_columns,
+        cluster_info=CLUSTER_INFO,
+    )
+    bundle = load_bundle(bundle_path)
+
+    assert isinstance(bundle.centroids, np.memmap)
+    assert bundle.columns == list(analyzer.original_columns)
+    assert bundle.cluster_info == CLUSTER_INFO
+
+    from_bundle = CustomerAnalyzer(
+        model_path="missing.pkl",
+        scaler_path="missing.pkl",
+        columns_path="missing.pkl",
+        mode="compiled",
+        bundle_path=str(bundle_path),
+    )
+
+    assert from_bundle.model is None
+    assert from_bundle.model_version == analyzer.model_version
+    assert from_bundle.predict_many(profiles) == analyzer.predict_many(profiles)
+
+
+def test_missing_bundle_falls_back_to_joblib(tmp_path):
+    fallback = CustomerAnalyzer(
+        model_path=str(setting.model_path),
+        scaler_path=str(setting.scaler_path),
+        columns_path=str(setting.columns_path),
+        mode="compiled",
+        bundle_path=str(tmp_path / "absent.bundle"),
+    )
+
+    assert fallback.bundle is None
+    assert fallback.model is not None
+
+
+def test_distances_match_kmeans_transform(analyzer, profiles):
+    sample = profiles[::7]
+    detailed = analyzer.predict_many(sample, include_distances=True)
+
+    scaled = pd.DataFrame(
+        analyzer.scaler.transform(analyzer._encode_many(sample)),
+        columns=analyzer.original_columns,
+    )
+    expected = analyzer.model.transform(scaled)
+
+    distances = np.array([result["distances"] for result in detailed])
+    np.testing.assert_allclose(distances, expected, atol=1e-9)
+
+    # 라벨과 기본 결과 필드는 거리 없는 경로와 같다
+    plain = analyzer.predict_many(sample)
+    assert [
+        {key: result[key] for key in plain[0]} for result in detailed
+    ] == plain
+
+    for result in detailed:
+        assert result["predicted_cluster"] == int(np.argmin(result["distances"]))
+        assert 0.0 < result["confidence"] <= 1.0
+        assert 0.0 <= result["margin"] <= 1.0
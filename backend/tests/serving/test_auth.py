@@ -1,5 +1,8 @@
 import pytest
+from jose import jwt
 from starlette.testclient import TestClient
+from rag.retriever import persona_cache
+from serving.api import auth
 from serving.api.main import app
 from dotenv import load_dotenv
 
@@ -35,5 +38,52 @@ def test_access_analysis_with_invalid_token(monkeypatch):
     assert response.status_code == 401
 
 
+def _token(**claims):
+    return jwt.encode(
+        {"sub": "someone", **claims}, auth.SECRET_KEY, algorithm=auth.ALGORITHM
+    )
+
+
+def test_admin_reload_refuses_ordinary_user_token(monkeypatch):
+    """로그인한 일반 사용자(authenticated) 토큰으로는 모델을 다시 읽을 수 없다"""
+    monkeypatch.setenv("DISABLE_AUTH", "0")
+    monkeypatch.setattr(auth, "SECRET_KEY", "test-secret")
+    client = TestClient(app)
+
+    user = _token(role="authenticated", user_metadata={"role": "admin"})
+    response = client.post(
+        "/admin/reload", headers={"Authorization": f"Bearer {user}"}
+    )
+    assert response.status_code == 403
+
+    admin = _token(role="service_role")
+    response = client.post(
+        "/admin/reload", headers={"Authorization": f"Bearer {admin}"}
+    )
+    assert response.status_code == 200
+
+
+def test_admin_rag_invalidate_refuses_ordinary_user_token(monkeypatch):
+    """일반 사용자가 페르소나 캐시를 비워 매 조회마다 전체 테이블을 받게 할 수 없다"""
+    monkeypatch.setenv("DISABLE_AUTH", "0")
+    monkeypatch.setattr(auth, "SECRET_KEY", "test-secret")
+    client = TestClient(app)
+    invalidations = persona_cache.invalidations
+
+    user = _token(role="authenticated")
+    response = client.post(
+        "/admin/rag/invalidate", headers={"Authorization": f"Bearer {user}"}
+    )
+    assert response.status_code == 403
+    assert persona_cache.invalidations == invalidations
+
+    admin = _token(role="authenticated", app_metadata={"role": "admin"})
+    response = client.post(
+        "/admin/rag/invalidate", headers={"Authorization": f"Bearer {admin}"}
+    )
+    assert response.status_code == 200
+    assert persona_cache.invalidations == invalidations + 1
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
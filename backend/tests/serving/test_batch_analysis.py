@@ -1,4 +1,5 @@
 # FastAPI의 TestClient를 사용해 실제 서버를 띄우지 않고 엔드포인트를 호출
+import pytest
 from starlette.testclient import TestClient
 from serving.api.main import app
 
@@ -69,3 +70,27 @@ def test_batch_analysis_empty_list(monkeypatch):
     assert res.status_code == 200
     assert res.json() == []
     assert res.headers.get("X-Request-ID")
+
+
+def test_batch_analysis_include_distances(monkeypatch):
+    monkeypatch.setenv("DISABLE_AUTH", "1")
+    client = TestClient(app)
+
+    payload = {"profiles": [VAILD_PROFILE_1, VAILD_PROFILE_2]}
+    plain = client.post("/api/analysis/batch", json=payload).json()
+    res = client.post("/api/analysis/batch?include_distances=true", json=payload)
+
+    assert res.status_code == 200
+    assert "distances" not in plain[0]
+    for item, base in zip(res.json(), plain):
+        assert len(item["distances"]) == 7
+        assert item["predicted_cluster"] == base["predicted_cluster"]
+        assert 0 < item["confidence"] <= 1
+        assert 0 <= item["margin"] <= 1
+
+    single = client.post(
+        "/api/analysis/?include_distances=true", json=VAILD_PROFILE_1
+    ).json()
+    batched = res.json()[0]
+    assert single["predicted_cluster"] == batched["predicted_cluster"]
+    assert single["distances"] == pytest.approx(batched["distances"])
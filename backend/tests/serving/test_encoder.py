@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from config.settings import setting
+from serving.models.encoder import FeatureEncoder
+
+DATA_PATH = setting.base_dir.parent.parent / "data" / "shopping_trends.csv"
+PROFILE_COLUMNS = [
+    "Age",
+    "Purchase Amount (USD)",
+    "Subscription Status",
+    "Frequency of Purchases",
+]
+
+
+def _legacy_get_dummies(df: pd.DataFrame) -> pd.DataFrame:
+    # 예전 train.py 의 전처리 (인코더 도입 전 기준)
+    df = pd.get_dummies(
+        df[PROFILE_COLUMNS], columns=["Subscription Status"], drop_first=True
+    )
+    df = pd.get_dummies(df, columns=["Frequency of Purchases"])
+    return df.astype(float)
+
+
+def test_encoder_matches_training_get_dummies():
+    df = pd.read_csv(DATA_PATH, usecols=PROFILE_COLUMNS)
+    encoder = FeatureEncoder.fit(df)
+
+    expected = _legacy_get_dummies(df)
+    encoded = encoder.encode_frame(df)
+
+    assert encoder.columns == list(expected.columns)
+    pd.testing.assert_frame_equal(encoded, expected)
+
+    # dict 리스트 경로도 같은 행렬을 만든다
+    records = df.to_dict(orient="records")
+    np.testing.assert_array_equal(encoder.encode(records), encoded.to_numpy())
+
+
+def test_unknown_and_dropped_values_encode_to_zero():
+    encoder = FeatureEncoder.fit(pd.read_csv(DATA_PATH, usecols=PROFILE_COLUMNS))
+    profiles = [
+        {
+            "Age": 30,
+            "Purchase Amount (USD)": 10.0,
+            "Subscription Status": "No",
+            "Frequency of Purchases": "Hourly",
+        }
+    ]
+    for encoded in (encoder.encode(profiles), encoder.encode(pd.DataFrame(profiles))):
+        assert encoded[0].tolist() == [30.0, 10.0] + [0.0] * (len(encoder.columns) - 2)
+
+
+def test_encoder_roundtrip_and_legacy_columns():
+    encoder = FeatureEncoder.fit(pd.read_csv(DATA_PATH, usecols=PROFILE_COLUMNS))
+
+    restored = FeatureEncoder.from_dict(encoder.to_dict())
+    assert restored.columns == encoder.columns
+    assert restored.drop_first == ["Subscription Status"]
+
+    # 인코더 없이 컬럼 목록만 있는 예전 아티팩트도 같은 컬럼으로 복원된다
+    legacy = FeatureEncoder.from_columns(encoder.columns)
+    assert legacy.columns == encoder.columns
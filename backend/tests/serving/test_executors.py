@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+import pytest
+from starlette.testclient import TestClient
+
+from operation.core.executors import BoundedExecutor, ExecutorSaturated
+from serving.api.main import app
+from serving.api.routes import analysis_router
+
+PROFILE = {
+    "Age": 30,
+    "Purchase Amount (USD)": 120.0,
+    "Subscription Status": "Yes",
+    "Frequency of Purchases": "Monthly",
+}
+
+
+def test_bounded_executor_rejects_when_full():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def run():
+        running = [
+            asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)
+        ]
+        await asyncio.sleep(0.05)
+        assert executor.stats()["active"] == 1
+        assert executor.stats()["queue_depth"] == 1
+
+        with pytest.raises(ExecutorSaturated) as exc_info:
+            await executor.run(release.wait)
+
+        release.set()
+        await asyncio.gather(*running)
+        return exc_info.value
+
+    exc = asyncio.run(run())
+    assert exc.status_code == 503
+    assert exc.headers == {"Retry-After": "1"}
+
+    stats = executor.stats()
+    assert stats["rejected"] == 1
+    assert stats["submitted"] == 2
+    assert stats["active"] == stats["queue_depth"] == 0
+    executor.shutdown()
+
+
+def test_saturated_inference_returns_503_with_retry_after(monkeypatch):
+    monkeypatch.setenv("DISABLE_AUTH", "1")
+    saturated = BoundedExecutor("inference", max_workers=1, max_queue=0)
+    saturated._in_flight = saturated.capacity
+    monkeypatch.setattr(analysis_router, "inference_executor", saturated)
+
+    client = TestClient(app)
+    res = client.post("/api/analysis/batch", json={"profiles": [PROFILE]})
+
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "1"
+    assert res.json()["error_code"] == "SERVER_BUSY"
+    assert client.get("/metrics").json()["executors"]["inference"]
@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+from starlette.testclient import TestClient
+
+from serving.api.batching import MicroBatcher
+from serving.api.main import app
+
+PROFILE = {
+    "Age": 30,
+    "Purchase Amount (USD)": 120.0,
+    "Subscription Status": "Yes",
+    "Frequency of Purchases": "Monthly",
+}
+
+
+async def _slow_double(items):
+    await asyncio.sleep(0.01)
+    return [item * 2 for item in items]
+
+
+def test_concurrent_submits_are_batched_in_order():
+    batcher = MicroBatcher(_slow_double, max_batch_size=16, max_wait=0.005)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(100)))
+
+    assert asyncio.run(run()) == [i * 2 for i in range(100)]
+
+    stats = batcher.stats()
+    assert stats["items"] == 100
+    assert stats["batches"] < 100
+    assert stats["batch_size"]["max"] <= 16
+
+
+def test_low_traffic_adds_no_window():
+    batcher = MicroBatcher(_slow_double, max_batch_size=16, max_wait=0.5)
+
+    async def run():
+        results = []
+        for i in range(10):
+            results.append(await batcher.submit(i))
+        return results
+
+    started = time.perf_counter()
+    assert asyncio.run(run()) == [i * 2 for i in range(10)]
+    # 한 건씩 오면 매번 바로 처리되어 max_wait(0.5s) 를 기다리지 않는다
+    assert time.perf_counter() - started < 0.5
+    assert batcher.stats()["window_ms"] == 0.0
+    assert batcher.stats()["batch_size"]["max"] == 1
+
+
+def test_failing_item_does_not_fail_its_batch():
+    async def score(items):
+        if "bad" in items:
+            raise ValueError("bad item")
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher(score, max_batch_size=8)
+
+    async def run():
+        return await asyncio.gather(
+            *(batcher.submit(item) for item in ["a", "bad", "c"]),
+            return_exceptions=True,
+        )
+
+    first, bad, last = asyncio.run(run())
+    assert (first, last) == ("A", "C")
+    assert isinstance(bad, ValueError)
+
+
+def test_analysis_endpoint_uses_batcher(monkeypatch):
+    monkeypatch.setenv("DISABLE_AUTH", "1")
+    client = TestClient(app)
+
+    res = client.post("/api/analysis/", json=PROFILE)
+    assert res.status_code == 200
+    assert res.headers.get("X-Model-Version")
+
+    metrics = client.get("/metrics").json()["analysis_batcher"]
+    assert metrics["items"] >= 1
+    assert set(metrics["queue_wait_ms"]) == {"p50", "p99"}
@@ -0,0 +1,101 @@
+import shutil
+import threading
+
+import pytest
+from starlette.testclient import TestClient
+
+from config.settings import setting
+from serving.api.main import app
+from serving.models.bundle import load_bundle, write_bundle
+from serving.models.registry import CANARY_PROFILES, ModelRegistry
+
+
+@pytest.fixture
+def artifacts_dir(tmp_path):
+    shutil.copy(setting.bundle_path, tmp_path / "model.bundle")
+    return tmp_path
+
+
+def _write_version(artifacts_dir, version, model_version):
+    bundle = load_bundle(setting.bundle_path)
+    version_dir = artifacts_dir / "versions" / version
+    version_dir.mkdir(parents=True)
+    write_bundle(
+        version_dir / "model.bundle",
+        centroids=bundle.centroids,
+        scaler_mean=bundle.scaler_mean,
+        scaler_scale=bundle.scaler_scale,
+        columns=bundle.columns,
+        cluster_info=bundle.cluster_info,
+        model_version=model_version,
+    )
+    return version_dir
+
+
+def test_reload_swaps_to_latest_version(artifacts_dir):
+    registry = ModelRegistry(artifacts_dir)
+    initial = registry.version
+
+    _write_version(artifacts_dir, "001", "v1")
+    _write_version(artifacts_dir, "002", "v2")
+
+    result = registry.check_for_update()
+
+    assert result["previous_version"] == initial
+    assert registry.version == "v2"
+    assert registry.check_for_update() is None
+
+
+def test_failed_reload_keeps_serving_previous_model(artifacts_dir):
+    registry = ModelRegistry(artifacts_dir)
+    previous = registry.analyzer
+
+    broken = artifacts_dir / "versions" / "003"
+    broken.mkdir(parents=True)
+    (broken / "model.bundle").write_bytes(b"not a bundle")
+
+    with pytest.raises(ValueError):
+        registry.reload()
+
+    assert registry.analyzer is previous
+
+
+def test_requests_succeed_during_swap(artifacts_dir):
+    registry = ModelRegistry(artifacts_dir)
+    errors = []
+    stop = threading.Event()
+
+    def hammer():
+        while not stop.is_set():
+            try:
+                registry.analyzer.predict_many(CANARY_PROFILES)
+            except Exception as exc:  # pragma: no cover - 실패 시 원인 확인용
+                errors.append(exc)
+
+    threads = [threading.Thread(target=hammer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for i in range(5):
+        _write_version(artifacts_dir, f"{i:03d}", f"v{i}")
+        registry.reload()
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert registry.version == "v4"
+
+
+def test_model_version_reported(monkeypatch):
+    monkeypatch.setenv("DISABLE_AUTH", "1")
+    monkeypatch.setenv("SUPABASE_JWT_SECRET", "changeme")
+    client = TestClient(app)
+
+    ready = client.get("/readyz").json()
+    res = client.post("/api/analysis", json=CANARY_PROFILES[0])
+    reload = client.post("/admin/reload")
+
+    assert ready["model_version"]
+    assert res.headers["X-Model-Version"] == ready["model_version"]
+    assert reload.status_code == 200
+    assert reload.json()["model_version"] == ready["model_version"]
@@ -0,0 +1,83 @@
+from starlette.testclient import TestClient
+
+from config.settings import setting
+from rag import retriever
+from rag.providers import HashingProvider
+from serving.api.main import app
+
+PERSONAS = [
+    ("충성도 높은 VIP 고객", "높은 구매액과 정기 구독을 유지하는 고객"),
+    ("가격에 민감한 고객", "할인과 쿠폰이 있을 때만 구매하는 고객"),
+    ("신규 고객", "최근에 처음 구매한 고객"),
+]
+
+
+class CountingProvider(HashingProvider):
+    def __init__(self):
+        super().__init__(dim=128)
+        self.document_calls = 0
+
+    def embed_documents(self, texts):
+        self.document_calls += 1
+        return super().embed_documents(texts)
+
+
+def _setup(monkeypatch):
+    monkeypatch.setenv("DISABLE_AUTH", "1")
+    provider = CountingProvider()
+    rows = [
+        {
+            "title": title,
+            "description": description,
+            "cluster_name": f"segment_{idx}",
+            "embedding": provider.embed_query(f"persona: {title}"),
+        }
+        for idx, (title, description) in enumerate(PERSONAS)
+    ]
+    fetches = []
+    monkeypatch.setattr(retriever, "configured_embedding_provider", lambda: provider)
+    monkeypatch.setattr(retriever, "fetch_personas", lambda: fetches.append(1) or rows)
+
+    # /api/rag/query 는 비동기 경로(afetch_personas)로 읽는다
+    async def afetch_personas():
+        fetches.append(1)
+        return rows
+
+    monkeypatch.setattr(retriever, "afetch_personas", afetch_personas)
+    retriever.invalidate_persona_cache()
+    return provider, fetches
+
+
+def test_batch_query_matches_single_queries_with_one_embedding_call(monkeypatch):
+    provider, fetches = _setup(monkeypatch)
+    monkeypatch.setattr(retriever.persona_cache, "ttl", 0)
+    client = TestClient(app)
+
+    queries = [{"persona_name": title, "top_k": 2} for title, _ in PERSONAS]
+    queries.append({"query_text": "할인 쿠폰 구매", "top_k": 3})
+    res = client.post("/api/rag/query/batch", json={"queries": queries})
+
+    assert res.status_code == 200
+    results = res.json()["results"]
+    assert provider.document_calls == 1 and len(fetches) == 1
+    assert [len(result["matches"]) for result in results] == [2, 2, 2, 3]
+    for result, query in zip(results, queries):
+        single = client.post("/api/rag/query", json=query).json()
+        assert [m["cluster_name"] for m in result["matches"]] == [
+            m["cluster_name"] for m in single["matches"]
+        ]
+    retriever.invalidate_persona_cache()
+
+
+def test_batch_query_limits_and_empty(monkeypatch):
+    _setup(monkeypatch)
+    client = TestClient(app)
+
+    res = client.post("/api/rag/query/batch", json={"queries": []})
+    assert res.status_code == 200 and res.json() == {"results": []}
+
+    monkeypatch.setattr(setting, "rag_batch_max_queries", 1)
+    queries = [{"query_text": "a"}, {"query_text": "b"}]
+    res = client.post("/api/rag/query/batch", json={"queries": queries})
+    assert res.status_code == 413
+    retriever.invalidate_persona_cache()
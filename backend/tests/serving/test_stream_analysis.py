@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+
+from starlette.testclient import TestClient
+from serving.api.main import app
+
+CSV_UPLOAD = (
+    "Customer ID,Age,Purchase Amount (USD),Subscription Status,Frequency of Purchases\n"
+    "1,55,53,Yes,Fortnightly\n"
+    "2,19,64,No,Weekly\n"
+    "3,abc,64,No,Weekly\n"
+    "\n"
+    "4,45,60.5,No,Every Day\n"
+    "5,30,120,Yes,Monthly\n"
+)
+
+
+def test_stream_csv_to_ndjson_reports_invalid_rows_inline(monkeypatch):
+    monkeypatch.setenv("DISABLE_AUTH", "1")
+    client = TestClient(app)
+
+    res = client.post(
+        "/api/analysis/stream",
+        content=CSV_UPLOAD.encode(),
+        headers={"Content-Type": "text/csv"},
+    )
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert [row["line"] for row in rows] == [2, 3, 4, 6, 7]
+    assert [("error" in row) for row in rows] == [False, False, True, True, False]
+    assert "Age" in rows[2]["error"]
+    assert "Frequency of Purchases" in rows[3]["error"]
+    assert all(
+        isinstance(row["predicted_cluster"], int) for row in rows if "error" not in row
+    )
+
+
+def test_stream_ndjson_to_csv_matches_batch(monkeypatch):
+    monkeypatch.setenv("DISABLE_AUTH", "1")
+    client = TestClient(app)
+
+    profiles = [
+        {
+            "Age": 30,
+            "Purchase Amount (USD)": 120.0,
+            "Subscription Status": "Yes",
+            "Frequency of Purchases": "Monthly",
+        },
+        {
+            "Age": 45,
+            "Purchase Amount (USD)": 60.5,
+            "Subscription Status": "No",
+            "Frequency of Purchases": "Weekly",
+        },
+    ]
+    body = "\n".join(json.dumps(profile) for profile in profiles) + "\nnot json\n"
+
+    res = client.post(
+        "/api/analysis/stream?output=csv",
+        content=body.encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert res.status_code == 200
+
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    batch = client.post("/api/analysis/batch", json={"profiles": profiles}).json()
+
+    assert [int(row["predicted_cluster"]) for row in rows[:2]] == [
+        item["predicted_cluster"] for item in batch
+    ]
+    assert rows[2]["line"] == "3" and rows[2]["error"].startswith("invalid JSON")
+
+
+def test_stream_unsupported_media_type(monkeypatch):
+    monkeypatch.setenv("DISABLE_AUTH", "1")
+    client = TestClient(app)
+
+    res = client.post(
+        "/api/analysis/stream",
+        content=b"{}",
+        headers={"Content-Type": "application/json"},
+    )
+
+    assert res.status_code == 415
+
+
+def test_stream_csv_quoted_newline_across_chunks(monkeypatch):
+    from config.settings import setting
+
+    monkeypatch.setenv("DISABLE_AUTH", "1")
+    monkeypatch.setattr(setting, "stream_chunk_size", 2)
+    client = TestClient(app)
+
+    upload = (
+        "Customer ID,Item Purchased,Age,Purchase Amount (USD),"
+        "Subscription Status,Frequency of Purchases\n"
+        '1,"Blouse\nwith note",55,53,Yes,Fortnightly\n'
+        "2,Sweater,19,64,No,Weekly\n"
+        "3,Jeans,50,73,Yes,Weekly\n"
+    )
+    res = client.post(
+        "/api/analysis/stream",
+        content=upload.encode(),
+        headers={"Content-Type": "text/csv"},
+    )
+
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert [row["line"] for row in rows] == [2, 4, 5]
+    assert not any("error" in row for row in rows)
+
+
+def test_stream_scoring_failure_reported_inline(monkeypatch):
+    from serving.api.routes import analysis_router
+
+    def broken_predict_many(profiles):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setenv("DISABLE_AUTH", "1")
+    monkeypatch.setattr(
+        analysis_router.registry.analyzer, "predict_many", broken_predict_many
+    )
+    client = TestClient(app)
+
+    res = client.post(
+        "/api/analysis/stream",
+        content=CSV_UPLOAD.encode(),
+        headers={"Content-Type": "text/csv"},
+    )
+
+    assert res.status_code == 200
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert [row["line"] for row in rows] == [2, 3, 4, 6, 7]
+    assert rows[0]["error"] == "scoring failed: model unavailable"
+    assert "Age" in rows[2]["error"]